@@ -2,10 +2,25 @@ import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app.config.config import settings
+from app.config.extensions import close_repository
 from app.routes.access_routes import router as access_router
+from app.routes.maintenance_routes import router as maintenance_router
+from app.routes.analytics_routes import router as analytics_router
+from app.routes.alert_routes import router as alert_router
+from app.services.retention_service import retention_purger
+from app.services.partition_maintainer import partition_maintainer
+from app.services.access_archive import access_archive
+from app.services.storage_gc import storage_gc
+from app.services.count_cache import access_count_cache
+from app.services.readiness import readiness_probe
+from app.services.alerts import burst_detector
+from app.utils.admission import AdmissionMiddleware
+from app.utils.dataloader import LoaderScopeMiddleware
+from app.utils.metrics import MetricsMiddleware, registry
+from app.utils.tracing import TracingMiddleware, trace_exporter
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -19,12 +34,53 @@ async def lifespan(app: FastAPI):
         os.makedirs(upload_folder, exist_ok=True)
         print(f"📁 Created upload directory: {upload_folder}")
     
+    # Start storage garbage collector (deletes only enqueue storage removals)
+    storage_gc.start()
+    print("🗑️ Storage garbage collector started")
+    
+    # Start background refresh of cached history counts
+    if settings.HISTORY_COUNT_MODE == "cached":
+        access_count_cache.start()
+        print("🔢 History count cache started")
+    
+    # Keep upcoming access partitions created, independently of retention
+    if settings.ACCESS_PARTITIONED:
+        partition_maintainer.start()
+        print(f"📅 Access partition maintainer started ({settings.ACCESS_PARTITIONS_AHEAD} months ahead)")
+    
+    # Start background retention purger
+    if settings.RETENTION_ENABLED:
+        retention_purger.start()
+        mode = "dry-run" if settings.RETENTION_DRY_RUN else "active"
+        print(f"🧹 Retention purger started ({mode})")
+    
+    # Start background archiving of closed months for analytics
+    if settings.ARCHIVE_ENABLED:
+        access_archive.start()
+        print(f"🗄️ Access archive started ({settings.ARCHIVE_DIR})")
+    
+    # Warm first-request paths before taking traffic, then keep the readiness result fresh
+    if settings.WARMUP_ENABLED:
+        await readiness_probe.warm_up(app)
+        steps = ", ".join(f"{name} {ms:g}ms" for name, ms in readiness_probe.stats['warm_up_ms'].items())
+        print(f"🔥 Warm-up finished ({steps})")
+    readiness_probe.start()
+    
     print("✅ DoorGuardian API started successfully!")
     
     yield
     
     # Shutdown
     print("🛑 Shutting down DoorGuardian API...")
+    burst_detector.close()
+    await readiness_probe.stop()
+    await retention_purger.stop()
+    await partition_maintainer.stop()
+    await access_archive.stop()
+    await storage_gc.stop()
+    await access_count_cache.stop()
+    await close_repository()
+    trace_exporter.close()
 
 def create_app() -> FastAPI:
     """Create FastAPI application with configuration"""
@@ -49,8 +105,26 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
     
+    # Request-scoped batching loaders for image lookups (innermost)
+    app.add_middleware(LoaderScopeMiddleware)
+    
+    # Concurrency limits and load shedding for /register and /history
+    if settings.ADMISSION_ENABLED:
+        app.add_middleware(AdmissionMiddleware)
+    
+    # Request latency, status and in-flight metrics per route
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+    
+    # Per-request trace spans, trace id header and slow request log (outermost)
+    if settings.TRACING_ENABLED:
+        app.add_middleware(TracingMiddleware)
+    
     # Include routers
     app.include_router(access_router)
+    app.include_router(maintenance_router)
+    app.include_router(analytics_router)
+    app.include_router(alert_router)
     
     # Global exception handlers
     @app.exception_handler(404)
@@ -92,6 +166,12 @@ def create_app() -> FastAPI:
             "health": "/api/v1/health"
         }
     
+    # Prometheus scrape endpoint
+    if settings.METRICS_ENABLED:
+        @app.get(settings.METRICS_PATH, include_in_schema=False)
+        async def metrics():
+            return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+    
     # API info endpoint
     @app.get(settings.API_V1_STR)
     async def api_info():
@@ -103,7 +183,15 @@ def create_app() -> FastAPI:
                 "GET /api/v1/history": "Retrieve access history with pagination and filtering",
                 "POST /api/v1/register": "Register new access record with optional image",
                 "DELETE /api/v1/history/{id}": "Delete access record by ID",
-                "GET /api/v1/health": "Health check endpoint"
+                "GET /api/v1/health": "Health check endpoint",
+                "GET /api/v1/ready": "Readiness probe (cached dependency checks)",
+                "GET /api/v1/retention": "Retention purger progress metrics",
+                "GET /api/v1/storage-gc": "Storage garbage collector metrics",
+                "GET /api/v1/archive": "Analytics archive progress and archived months",
+                "GET /api/v1/analytics/denial-rate": "Denial rate by weekday, hour or month from the archive",
+                "GET /api/v1/analytics/heatmap": "Weekday by hour access heatmap from the archive",
+                "GET /api/v1/alerts": "Recent denied-attempt bursts",
+                "GET /api/v1/alerts/stream": "Server-Sent Events stream of new denied-attempt bursts"
             },
             "docs": "/docs",
             "redoc": "/redoc"
@@ -1,5 +1,6 @@
 import os
-from typing import List, Union
+from functools import lru_cache
+from typing import List, Optional, Union
 
 try:
     from pydantic_settings import BaseSettings
@@ -27,6 +28,16 @@ class Settings(BaseSettings):
     # Security (obrigatório do .env)
     SECRET_KEY: str
     
+    # Database backend: "supabase" (PostgREST) or "postgres" (direct asyncpg pool)
+    DATABASE_BACKEND: str = "supabase"
+    DATABASE_URL: Optional[str] = None
+    POSTGRES_POOL_MIN_SIZE: int = 1
+    POSTGRES_POOL_MAX_SIZE: int = 10
+    POSTGRES_STATEMENT_CACHE_SIZE: int = 100
+    POSTGRES_COMMAND_TIMEOUT: float = 10.0
+    # Per-request timeout of the PostgREST client used by the "supabase" backend
+    POSTGREST_TIMEOUT: float = 30.0
+    
     # File Upload Configuration
     UPLOAD_FOLDER: str
     MAX_FILE_SIZE: int
@@ -35,6 +46,11 @@ class Settings(BaseSettings):
     ALLOWED_FILE_TYPES: List[str] = ["image/jpeg", "image/png", "image/gif", "image/webp"]
     ALLOWED_EXTENSIONS: List[str] = ["jpg", "jpeg", "png", "gif", "webp"]
     
+    # Images per /register request - podem ser sobrescritos via .env
+    REGISTER_MAX_IMAGES: int = 8
+    UPLOAD_CONCURRENCY: int = 8
+    UPLOAD_THREADS: int = 16
+    
     # CORS Configuration - podem ser sobrescritos via .env
     BACKEND_CORS_ORIGINS: List[str] = [
         "http://localhost:3000",
@@ -42,7 +58,83 @@ class Settings(BaseSettings):
         "http://127.0.0.1:3000",
         "http://127.0.0.1:8000"
     ]
-    
+
+    # Metrics - podem ser sobrescritos via .env
+    METRICS_ENABLED: bool = True
+    METRICS_PATH: str = "/metrics"
+
+    # Request tracing - podem ser sobrescritos via .env
+    TRACING_ENABLED: bool = True
+    TRACING_HEADER: str = "X-Trace-Id"
+    TRACING_SLOW_REQUEST_MS: float = 1000.0
+    TRACING_EXPORTER: str = "none"
+    TRACING_EXPORT_PATH: str = "traces.jsonl"
+
+    # Warm-up and readiness probe - podem ser sobrescritos via .env
+    WARMUP_ENABLED: bool = True
+    READINESS_REFRESH_SECONDS: float = 10.0
+    READINESS_TIMEOUT_SECONDS: float = 5.0
+    READINESS_CHECK_STORAGE: bool = True
+
+    # Admission control for /register and /history - podem ser sobrescritos via .env
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENCY: int = 32
+    ADMISSION_SHARED_QUEUE: int = 128
+    ADMISSION_REGISTER_CONCURRENCY: int = 24
+    ADMISSION_REGISTER_QUEUE: int = 128
+    ADMISSION_REGISTER_QUEUE_TIMEOUT_MS: float = 2000.0
+    ADMISSION_HISTORY_CONCURRENCY: int = 16
+    ADMISSION_HISTORY_QUEUE: int = 32
+    ADMISSION_HISTORY_QUEUE_TIMEOUT_MS: float = 500.0
+    ADMISSION_RETRY_AFTER_SECONDS: float = 1.0
+
+    # Idempotency-Key store for /register - podem ser sobrescritos via .env
+    IDEMPOTENCY_TTL_SECONDS: int = 3600
+    IDEMPOTENCY_MAX_KEYS: int = 10000
+
+    # Denied-attempt burst alerts, rules are "<denied attempts>/<seconds>" - podem ser sobrescritos via .env
+    ALERTS_ENABLED: bool = True
+    ALERT_RULES: List[str] = ["5/60"]
+    ALERT_HISTORY_SIZE: int = 100
+    ALERT_SUBSCRIBER_QUEUE: int = 100
+    ALERT_STREAM_HEARTBEAT_SECONDS: float = 15.0
+
+    # History pagination count: exact, planned, estimated or cached
+    HISTORY_COUNT_MODE: str = "exact"
+    HISTORY_COUNT_REFRESH_SECONDS: int = 300
+
+    # Retention Configuration - podem ser sobrescritos via .env
+    RETENTION_ENABLED: bool = False
+    RETENTION_DRY_RUN: bool = False
+    RETENTION_IMAGE_DAYS: int = 90
+    RETENTION_ACCESS_DAYS: int = 365
+    RETENTION_BATCH_SIZE: int = 200
+    RETENTION_BATCH_DELAY_SECONDS: float = 1.0
+    RETENTION_MAX_BATCHES_PER_RUN: int = 50
+    RETENTION_INTERVAL_SECONDS: int = 3600
+
+    # Columnar archive for analytics - podem ser sobrescritos via .env
+    ARCHIVE_ENABLED: bool = False
+    ARCHIVE_DIR: str = "archive"
+    ARCHIVE_GRACE_DAYS: int = 1
+    ARCHIVE_BATCH_SIZE: int = 5000
+    ARCHIVE_INTERVAL_SECONDS: int = 21600
+
+    # Access table partitioning (database/migrations/002_partition_access_by_month.sql)
+    ACCESS_PARTITIONED: bool = False
+    ACCESS_PARTITIONS_AHEAD: int = 3
+    ACCESS_PARTITIONS_INTERVAL_SECONDS: int = 21600
+
+    # Storage Garbage Collector - podem ser sobrescritos via .env
+    STORAGE_GC_BATCH_SIZE: int = 100
+    STORAGE_GC_BATCH_DELAY_SECONDS: float = 0.5
+    STORAGE_GC_FLUSH_INTERVAL_SECONDS: float = 5.0
+    STORAGE_GC_MAX_PENDING: int = 10000
+    STORAGE_GC_MAX_ATTEMPTS: int = 5
+    STORAGE_GC_RECONCILE_ENABLED: bool = True
+    STORAGE_GC_RECONCILE_INTERVAL_SECONDS: int = 21600
+    STORAGE_GC_GRACE_SECONDS: int = 3600
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -55,6 +147,30 @@ class Settings(BaseSettings):
             return [item.strip() for item in v.split(",") if item.strip()]
         return v
     
+    @validator('DATABASE_BACKEND')
+    @classmethod
+    def validate_database_backend(cls, v):
+        """Ensure the database backend is one of the supported implementations"""
+        if v not in ("supabase", "postgres"):
+            raise ValueError("DATABASE_BACKEND must be 'supabase' or 'postgres'")
+        return v
+    
+    @validator('HISTORY_COUNT_MODE')
+    @classmethod
+    def validate_history_count_mode(cls, v):
+        """Ensure the history count mode is one of the supported strategies"""
+        if v not in ("exact", "planned", "estimated", "cached"):
+            raise ValueError("HISTORY_COUNT_MODE must be 'exact', 'planned', 'estimated' or 'cached'")
+        return v
+    
+    @validator('TRACING_EXPORTER')
+    @classmethod
+    def validate_tracing_exporter(cls, v):
+        """Ensure the trace exporter is one of the supported outputs"""
+        if v not in ("none", "log", "jsonl"):
+            raise ValueError("TRACING_EXPORTER must be 'none', 'log' or 'jsonl'")
+        return v
+    
     @validator('ALLOWED_FILE_TYPES', pre=True)
     @classmethod 
     def parse_allowed_file_types(cls, v):
@@ -71,5 +187,36 @@ class Settings(BaseSettings):
             return [item.strip() for item in v.split(",") if item.strip()]
         return v
 
-# Create settings instance
-settings = Settings()
\ No newline at end of file
+    @validator('ALERT_RULES', pre=True)
+    @classmethod
+    def parse_alert_rules(cls, v):
+        """Parse and check alert rules from environment variable (comma-separated string)"""
+        if isinstance(v, str):
+            v = [item.strip() for item in v.split(",") if item.strip()]
+        for rule in v:
+            threshold, _, window_seconds = rule.partition("/")
+            try:
+                valid = int(threshold) >= 1 and float(window_seconds) > 0
+            except ValueError:
+                valid = False
+            if not valid:
+                raise ValueError(f"ALERT_RULES entries must look like '5/60' (denied attempts/seconds), got '{rule}'")
+        return v
+
+@lru_cache()
+def get_settings() -> Settings:
+    """Build the settings from the environment and .env on first use"""
+    return Settings()
+
+class _LazySettings:
+    """Stand-in for the Settings instance that builds it on first attribute access.
+    
+    Importing modules that read settings no longer parses the environment, so
+    imports stay cheap and tools can import the app without a complete .env.
+    """
+    
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+# Create settings instance (built on first access)
+settings = _LazySettings()
\ No newline at end of file
@@ -1,22 +1,129 @@
 import os
-from supabase import create_client, Client
+import threading
 
-def get_supabase_client() -> Client:
+class SupabaseDataClient:
+    """Database and storage side of the Supabase client.
+    
+    ``supabase.create_client`` also builds the auth (gotrue) and realtime
+    clients and looks up a session, none of which the API uses. This client
+    talks to the same PostgREST and Storage endpoints with the same headers,
+    imports postgrest/storage3 on first use and keeps their HTTP connections
+    alive between calls.
+    """
+    
+    def __init__(self, url: str, key: str):
+        self.supabase_url = url.rstrip("/")
+        self.supabase_key = key
+        self.headers = {
+            "X-Client-Info": "doorguardian-api",
+            "apiKey": key,
+            "Authorization": f"Bearer {key}"
+        }
+        self._postgrest = None
+        self._storage = None
+        self._lock = threading.Lock()
+    
+    @property
+    def postgrest(self):
+        if self._postgrest is None:
+            with self._lock:
+                if self._postgrest is None:
+                    from httpx import Timeout
+                    from postgrest import SyncPostgrestClient
+                    from app.config.config import settings
+                    # Bounded so a hung request cannot hold a to_thread worker forever
+                    self._postgrest = SyncPostgrestClient(
+                        f"{self.supabase_url}/rest/v1",
+                        headers=self.headers,
+                        timeout=Timeout(settings.POSTGREST_TIMEOUT)
+                    )
+        return self._postgrest
+    
+    @property
+    def storage(self):
+        if self._storage is None:
+            with self._lock:
+                if self._storage is None:
+                    from storage3 import SyncStorageClient
+                    self._storage = SyncStorageClient(f"{self.supabase_url}/storage/v1/", headers=self.headers)
+        return self._storage
+    
+    def table(self, table_name: str):
+        return self.postgrest.from_(table_name)
+    
+    def from_(self, table_name: str):
+        return self.postgrest.from_(table_name)
+    
+    def rpc(self, fn: str, params: dict = None, count: str = None, head: bool = False):
+        return self.postgrest.rpc(fn, params or {}, count, head)
+
+def create_client(url: str, key: str) -> SupabaseDataClient:
+    """Create a client for the Supabase REST and Storage APIs"""
+    return SupabaseDataClient(url, key)
+
+# Clients are created once per process and shared
+_supabase_client = None
+_supabase_admin_client = None
+
+def get_supabase_client() -> SupabaseDataClient:
     """Get Supabase client with anon key"""
-    url = os.environ.get("SUPABASE_URL")
-    key = os.environ.get("SUPABASE_KEY")
+    global _supabase_client
     
-    if not url or not key:
-        raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment variables")
+    if _supabase_client is None:
+        url = os.environ.get("SUPABASE_URL")
+        key = os.environ.get("SUPABASE_KEY")
+        
+        if not url or not key:
+            raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment variables")
+        
+        _supabase_client = create_client(url, key)
     
-    return create_client(url, key)
+    return _supabase_client
 
-def get_supabase_admin_client() -> Client:
+def get_supabase_admin_client() -> SupabaseDataClient:
     """Get Supabase client with service role key for admin operations"""
-    url = os.environ.get("SUPABASE_URL")
-    service_key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+    global _supabase_admin_client
+    
+    if _supabase_admin_client is None:
+        url = os.environ.get("SUPABASE_URL")
+        service_key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+        
+        if not url or not service_key:
+            raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set in environment variables")
+        
+        _supabase_admin_client = create_client(url, service_key)
+    
+    return _supabase_admin_client
+
+# Data repository selected by Settings.DATABASE_BACKEND, created on first use
+_repository = None
+
+def get_repository():
+    """Get the data repository for the configured database backend"""
+    global _repository
     
-    if not url or not service_key:
-        raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set in environment variables")
+    if _repository is None:
+        from app.config.config import settings
+        
+        if settings.DATABASE_BACKEND == "postgres":
+            from app.repositories.postgres_repository import PostgresRepository
+            _repository = PostgresRepository(
+                settings.DATABASE_URL,
+                min_size=settings.POSTGRES_POOL_MIN_SIZE,
+                max_size=settings.POSTGRES_POOL_MAX_SIZE,
+                statement_cache_size=settings.POSTGRES_STATEMENT_CACHE_SIZE,
+                command_timeout=settings.POSTGRES_COMMAND_TIMEOUT
+            )
+        else:
+            from app.repositories.supabase_repository import SupabaseRepository
+            _repository = SupabaseRepository()
+    
+    return _repository
+
+async def close_repository() -> None:
+    """Close the data repository connections, if one was created"""
+    global _repository
     
-    return create_client(url, service_key)
\ No newline at end of file
+    if _repository is not None:
+        await _repository.close()
+        _repository = None
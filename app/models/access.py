@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 import uuid
 from .image import Image
@@ -43,7 +43,8 @@ class Access(AccessBase):
 
 class AccessWithImage(Access):
     """Access model with embedded image data"""
-    image: Optional[Image] = Field(None, description="Associated image data")
+    image: Optional[Image] = Field(None, description="Associated image data (the first image)")
+    images: List[Image] = Field(default_factory=list, description="All associated images in upload order")
     
     class Config:
         from_attributes = True
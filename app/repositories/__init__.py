@@ -0,0 +1 @@
+# Empty file to make repositories a Python package
\ No newline at end of file
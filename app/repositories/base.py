@@ -0,0 +1,148 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.models.access import AccessCreate, AccessWithImage
+from app.models.image import Image, ImageCreate
+
+
+class AccessNotCreated(Exception):
+    """Raised by ``create_access`` when no access record was committed.
+
+    Storage objects uploaded for the record are then unreferenced and can be
+    removed; any other error may come after the commit.
+    """
+
+
+class Repository(ABC):
+    """Data access interface for the access and images tables.
+
+    Services only talk to the database through this interface, so the backend
+    (PostgREST through Supabase, or a direct Postgres pool) is chosen by
+    ``Settings.DATABASE_BACKEND``. Storage objects are not handled here.
+    """
+
+    # Access records
+
+    @abstractmethod
+    async def get_access_history(
+        self,
+        offset: int,
+        limit: int,
+        sort_by: str,
+        sort_order: str,
+        access_filter: Optional[bool],
+        date_from: Optional[datetime],
+        date_to: Optional[datetime],
+        count_mode: Optional[str]
+    ) -> Tuple[List[AccessWithImage], Optional[int]]:
+        """Get one page of access records with their images and the total (None when count_mode is None)"""
+
+    @abstractmethod
+    async def count_access(self, access_filter: Optional[bool] = None) -> int:
+        """Exact number of access records, optionally filtered by access status"""
+
+    @abstractmethod
+    async def get_access(self, access_id: str) -> Optional[AccessWithImage]:
+        """Get an access record with its images"""
+
+    @abstractmethod
+    async def create_access(
+        self,
+        access_data: AccessCreate,
+        images_data: Optional[List[ImageCreate]] = None
+    ) -> AccessWithImage:
+        """Create an access record with its image records (in order), linked through access_images"""
+
+    @abstractmethod
+    async def delete_access(self, access_id: str) -> Optional[AccessWithImage]:
+        """Delete an access record and its image records, returns the deleted record"""
+
+    # Image records
+
+    @abstractmethod
+    async def create_image(self, image_data: ImageCreate) -> Image:
+        """Create an image record"""
+
+    @abstractmethod
+    async def get_image(self, image_id: str) -> Optional[Image]:
+        """Get an image record by ID"""
+
+    @abstractmethod
+    async def get_images(self, image_ids: List[str]) -> Dict[str, Image]:
+        """Get image records by ID in one round trip, keyed by ID (missing IDs are left out)"""
+
+    @abstractmethod
+    async def delete_image(self, image_id: str) -> bool:
+        """Delete an image record by ID"""
+
+    @abstractmethod
+    async def find_referenced_paths(self, file_paths: List[str]) -> Set[str]:
+        """Return the subset of storage paths that an image record points to"""
+
+    # Retention
+
+    @abstractmethod
+    async def count_expired(self, table: str, column: str, cutoff: datetime) -> int:
+        """Count rows of a table whose timestamp column is older than the cutoff"""
+
+    @abstractmethod
+    async def list_expired_images(self, cutoff: datetime, limit: int) -> List[Dict[str, Any]]:
+        """Oldest image records created before the cutoff, as dicts with id and file_path"""
+
+    @abstractmethod
+    async def detach_images(self, image_ids: List[str]) -> int:
+        """Clear image_id and image_url of the access records pointing to these images, returns the number updated"""
+
+    @abstractmethod
+    async def delete_images(self, image_ids: List[str]) -> int:
+        """Delete image records by ID, returns the number deleted"""
+
+    @abstractmethod
+    async def list_expired_access_ids(self, cutoff: datetime, limit: int) -> List[str]:
+        """IDs of the oldest access records dated before the cutoff"""
+
+    @abstractmethod
+    async def delete_access_batch(self, access_ids: List[str], cutoff: datetime) -> int:
+        """Delete access records by ID (bounded by the cutoff for partition pruning)"""
+
+    @abstractmethod
+    async def drop_access_partitions_before(self, cutoff: datetime) -> int:
+        """Drop monthly access partitions entirely older than the cutoff"""
+
+    @abstractmethod
+    async def ensure_access_partitions(self, months_ahead: int) -> int:
+        """Create the monthly access partitions for the current and next months, returns how many are ready"""
+
+    # Archive
+
+    @abstractmethod
+    async def get_oldest_access_date(self) -> Optional[datetime]:
+        """Date of the oldest access record, None when the table is empty"""
+
+    @abstractmethod
+    async def list_access_between(
+        self,
+        start: datetime,
+        end: datetime,
+        after: Optional[Tuple[datetime, str]],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Access rows dated in [start, end) ordered by date and ID, as dicts with id, access, date and image_id.
+
+        ``after`` is the (date, id) of the last row of the previous page (keyset
+        pagination), None for the first page.
+        """
+
+    @abstractmethod
+    async def count_access_between(self, start: datetime, end: datetime) -> int:
+        """Number of access rows dated in [start, end)"""
+
+    # Lifecycle
+
+    @abstractmethod
+    async def ping(self) -> None:
+        """Cheap round trip that reads the access table, raises if the database is unreachable"""
+
+    async def close(self) -> None:
+        """Release connections held by the backend"""
@@ -0,0 +1,489 @@
+import asyncio
+import json
+import re
+import uuid
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.models.access import AccessCreate, AccessWithImage
+from app.models.image import Image, ImageCreate
+from app.repositories.base import AccessNotCreated, Repository
+from app.utils.metrics import db_query_duration_seconds
+from app.utils.tracing import record_span
+
+# Access rows joined with their first image as a JSON object, like PostgREST's images(*),
+# and all of their images from access_images as a JSON array in upload order
+ACCESS_SELECT = """
+    SELECT a.*, row_to_json(i) AS images, (
+        SELECT json_agg(row_to_json(li) ORDER BY ai.position)
+        FROM public.access_images ai
+        JOIN public.images li ON li.id = ai.image_id
+        WHERE ai.access_id = a.id
+    ) AS image_list
+    FROM public.access a
+    LEFT JOIN public.images i ON i.id = a.image_id
+"""
+
+SORT_COLUMNS = {"date", "created_at"}
+EXPIRY_COLUMNS = {("images", "created_at"), ("access", "date")}
+
+LEADING_WORD = re.compile(r"\s*(\w+)")
+FUNCTION_CALL = re.compile(r"^\s*SELECT\s+public\.(\w+)\(", re.IGNORECASE)
+TABLE_REFERENCE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+(?:public\.)?(\w+)", re.IGNORECASE)
+
+
+def _utc(value: datetime) -> datetime:
+    """Treat naive datetimes as UTC, like the Supabase backend does"""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _as_uuid(value: str) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=256)
+def _query_operation(query: str) -> str:
+    """Label a statement like the Supabase backend does: <table>.<action> or rpc.<function>"""
+    # asyncpg resets connections when they are released back to the pool
+    if query.startswith("SELECT pg_advisory_unlock_all()"):
+        return "connection.reset"
+
+    function = FUNCTION_CALL.match(query)
+    if function:
+        return f"rpc.{function.group(1)}"
+
+    verb = LEADING_WORD.match(query)
+    action = verb.group(1).lower() if verb else "unknown"
+    if action in ("begin", "commit", "rollback", "savepoint", "release"):
+        return f"transaction.{action}"
+
+    table = TABLE_REFERENCE.search(query)
+    return f"{table.group(1) if table else 'unknown'}.{action}"
+
+
+def _observe_query(record) -> None:
+    # Runs via call_soon in the context of the query, so the span lands in the request trace
+    operation = _query_operation(record.query)
+    db_query_duration_seconds.observe(record.elapsed, backend="postgres", operation=operation)
+    record_span(f"db {operation}", record.elapsed)
+
+
+def _row_to_dict(row) -> Dict[str, Any]:
+    return {key: str(value) if isinstance(value, uuid.UUID) else value for key, value in row.items()}
+
+
+def _to_access_with_image(row) -> AccessWithImage:
+    record = _row_to_dict(row)
+    image_data = record.pop('images', None)
+    image_list = record.pop('image_list', None)
+
+    result = AccessWithImage(**record)
+    if image_data:
+        result.image = Image(**image_data)
+    if image_list:
+        result.images = [Image(**image) for image in image_list]
+    elif result.image:
+        # Records written before access_images existed
+        result.images = [result.image]
+    return result
+
+
+class PostgresRepository(Repository):
+    """Repository backed by a direct asyncpg connection pool.
+
+    asyncpg prepares every statement and caches it per connection, so the
+    fixed set of queries below is parsed and planned once per connection.
+    Writes that touch several rows run in a single transaction.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        statement_cache_size: int = 100,
+        command_timeout: float = 10.0,
+        estimated_count_threshold: int = 1000
+    ):
+        if not dsn:
+            raise ValueError("DATABASE_URL must be set when DATABASE_BACKEND is 'postgres'")
+
+        self._dsn = dsn
+        self._min_size = min_size
+        self._max_size = max_size
+        self._statement_cache_size = statement_cache_size
+        self._command_timeout = command_timeout
+        self._estimated_count_threshold = estimated_count_threshold
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+
+    async def _get_pool(self):
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    import asyncpg
+
+                    self._pool = await asyncpg.create_pool(
+                        self._dsn,
+                        min_size=self._min_size,
+                        max_size=self._max_size,
+                        # Set to 0 behind pgbouncer in transaction mode
+                        statement_cache_size=self._statement_cache_size,
+                        command_timeout=self._command_timeout,
+                        init=self._init_connection
+                    )
+        return self._pool
+
+    @staticmethod
+    async def _init_connection(conn) -> None:
+        for type_name in ("json", "jsonb"):
+            await conn.set_type_codec(type_name, encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+        # Times every round trip on the connection for the query latency metrics
+        conn.add_query_logger(_observe_query)
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    @staticmethod
+    def _access_filters(
+        access_filter: Optional[bool],
+        date_from: Optional[datetime],
+        date_to: Optional[datetime]
+    ) -> Tuple[str, List[Any]]:
+        conditions: List[str] = []
+        args: List[Any] = []
+
+        if access_filter is not None:
+            args.append(access_filter)
+            conditions.append(f"a.access = ${len(args)}")
+
+        if date_from:
+            args.append(_utc(date_from))
+            conditions.append(f"a.date >= ${len(args)}")
+
+        if date_to:
+            args.append(_utc(date_to))
+            conditions.append(f"a.date <= ${len(args)}")
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, args
+
+    async def _count(self, conn, where: str, args: List[Any], count_mode: str) -> int:
+        if count_mode in ("planned", "estimated"):
+            plan = await conn.fetchval(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM public.access a {where}", *args)
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = int(plan[0]["Plan"]["Plan Rows"])
+
+            # Like PostgREST, "estimated" is exact for small results
+            if count_mode == "planned" or estimate > self._estimated_count_threshold:
+                return estimate
+
+        return await conn.fetchval(f"SELECT count(*) FROM public.access a {where}", *args)
+
+    async def get_access_history(
+        self,
+        offset: int,
+        limit: int,
+        sort_by: str,
+        sort_order: str,
+        access_filter: Optional[bool],
+        date_from: Optional[datetime],
+        date_to: Optional[datetime],
+        count_mode: Optional[str]
+    ) -> Tuple[List[AccessWithImage], Optional[int]]:
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"Unsupported sort field: {sort_by}")
+
+        where, args = self._access_filters(access_filter, date_from, date_to)
+        direction = "DESC" if sort_order == "desc" else "ASC"
+        page_args = args + [limit, offset]
+
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                f"{ACCESS_SELECT} {where} ORDER BY a.{sort_by} {direction} "
+                f"LIMIT ${len(args) + 1} OFFSET ${len(args) + 2}",
+                *page_args
+            )
+            total = await self._count(conn, where, args, count_mode) if count_mode else None
+
+        return [_to_access_with_image(row) for row in rows], total
+
+    async def count_access(self, access_filter: Optional[bool] = None) -> int:
+        where, args = self._access_filters(access_filter, None, None)
+
+        pool = await self._get_pool()
+        return await pool.fetchval(f"SELECT count(*) FROM public.access a {where}", *args)
+
+    async def get_access(self, access_id: str) -> Optional[AccessWithImage]:
+        access_uuid = _as_uuid(access_id)
+        if access_uuid is None:
+            return None
+
+        pool = await self._get_pool()
+        row = await pool.fetchrow(f"{ACCESS_SELECT} WHERE a.id = $1", access_uuid)
+        return _to_access_with_image(row) if row else None
+
+    async def create_access(
+        self,
+        access_data: AccessCreate,
+        images_data: Optional[List[ImageCreate]] = None
+    ) -> AccessWithImage:
+        images_data = images_data or []
+
+        pool = await self._get_pool()
+        try:
+            async with pool.acquire() as conn:
+                # Image inserts, access insert, links and the joined read share one transaction
+                async with conn.transaction():
+                    image_id = _as_uuid(access_data.image_id) if access_data.image_id else None
+
+                    image_ids = []
+                    if images_data:
+                        # One statement for all images, ordered like the request
+                        rows = await conn.fetch(
+                            """
+                            INSERT INTO public.images (filename, original_filename, file_path, file_size, mime_type)
+                            SELECT * FROM unnest($1::text[], $2::text[], $3::text[], $4::integer[], $5::text[])
+                            RETURNING id, file_path
+                            """,
+                            [image.filename for image in images_data],
+                            [image.original_filename for image in images_data],
+                            [image.file_path for image in images_data],
+                            [image.file_size for image in images_data],
+                            [image.mime_type for image in images_data]
+                        )
+                        ids_by_path = {row['file_path']: row['id'] for row in rows}
+                        image_ids = [ids_by_path[image.file_path] for image in images_data]
+                        image_id = image_ids[0]
+
+                    # The trigger will automatically populate image_url if image_id is provided
+                    access_id = await conn.fetchval(
+                        "INSERT INTO public.access (access, date, image_id) VALUES ($1, $2, $3) RETURNING id",
+                        access_data.access,
+                        _utc(access_data.date),
+                        image_id
+                    )
+
+                    if image_ids:
+                        await conn.execute(
+                            """
+                            INSERT INTO public.access_images (access_id, image_id, position)
+                            SELECT $1, image_id, position - 1
+                            FROM unnest($2::uuid[]) WITH ORDINALITY AS t(image_id, position)
+                            """,
+                            access_id,
+                            image_ids
+                        )
+
+                    row = await conn.fetchrow(f"{ACCESS_SELECT} WHERE a.id = $1", access_id)
+        except Exception as e:
+            # The transaction rolled back, nothing points to the uploaded objects
+            raise AccessNotCreated(str(e)) from e
+
+        return _to_access_with_image(row)
+
+    async def delete_access(self, access_id: str) -> Optional[AccessWithImage]:
+        access_uuid = _as_uuid(access_id)
+        if access_uuid is None:
+            return None
+
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                row = await conn.fetchrow(f"{ACCESS_SELECT} WHERE a.id = $1 FOR UPDATE OF a", access_uuid)
+                if row is None:
+                    return None
+
+                record = _to_access_with_image(row)
+
+                await conn.execute("DELETE FROM public.access WHERE id = $1", access_uuid)
+                # The access_images links go with their images (ON DELETE CASCADE)
+                if record.images:
+                    await conn.execute(
+                        "DELETE FROM public.images WHERE id = ANY($1::uuid[])",
+                        [_as_uuid(image.id) for image in record.images]
+                    )
+
+        return record
+
+    async def create_image(self, image_data: ImageCreate) -> Image:
+        pool = await self._get_pool()
+        row = await pool.fetchrow(
+            """
+            INSERT INTO public.images (filename, original_filename, file_path, file_size, mime_type)
+            VALUES ($1, $2, $3, $4, $5)
+            RETURNING *
+            """,
+            image_data.filename,
+            image_data.original_filename,
+            image_data.file_path,
+            image_data.file_size,
+            image_data.mime_type
+        )
+        return Image(**_row_to_dict(row))
+
+    async def get_image(self, image_id: str) -> Optional[Image]:
+        image_uuid = _as_uuid(image_id)
+        if image_uuid is None:
+            return None
+
+        pool = await self._get_pool()
+        row = await pool.fetchrow("SELECT * FROM public.images WHERE id = $1", image_uuid)
+        return Image(**_row_to_dict(row)) if row else None
+
+    async def get_images(self, image_ids: List[str]) -> Dict[str, Image]:
+        ids = [image_uuid for image_uuid in map(_as_uuid, image_ids) if image_uuid]
+        if not ids:
+            return {}
+
+        pool = await self._get_pool()
+        rows = await pool.fetch("SELECT * FROM public.images WHERE id = ANY($1::uuid[])", ids)
+        return {str(row['id']): Image(**_row_to_dict(row)) for row in rows}
+
+    async def delete_image(self, image_id: str) -> bool:
+        image_uuid = _as_uuid(image_id)
+        if image_uuid is None:
+            return False
+
+        pool = await self._get_pool()
+        result = await pool.execute("DELETE FROM public.images WHERE id = $1", image_uuid)
+        return result != "DELETE 0"
+
+    async def find_referenced_paths(self, file_paths: List[str]) -> Set[str]:
+        if not file_paths:
+            return set()
+
+        pool = await self._get_pool()
+        rows = await pool.fetch(
+            "SELECT file_path FROM public.images WHERE file_path = ANY($1::text[])",
+            file_paths
+        )
+        return {row['file_path'] for row in rows}
+
+    async def count_expired(self, table: str, column: str, cutoff: datetime) -> int:
+        if (table, column) not in EXPIRY_COLUMNS:
+            raise ValueError(f"Unsupported expiry column: {table}.{column}")
+
+        pool = await self._get_pool()
+        return await pool.fetchval(f"SELECT count(*) FROM public.{table} WHERE {column} < $1", _utc(cutoff))
+
+    async def list_expired_images(self, cutoff: datetime, limit: int) -> List[Dict[str, Any]]:
+        pool = await self._get_pool()
+        rows = await pool.fetch(
+            "SELECT id, file_path FROM public.images WHERE created_at < $1 ORDER BY created_at LIMIT $2",
+            _utc(cutoff),
+            limit
+        )
+        return [_row_to_dict(row) for row in rows]
+
+    async def detach_images(self, image_ids: List[str]) -> int:
+        ids = [image_uuid for image_uuid in map(_as_uuid, image_ids) if image_uuid]
+        if not ids:
+            return 0
+
+        pool = await self._get_pool()
+        result = await pool.execute(
+            "UPDATE public.access SET image_id = NULL, image_url = NULL WHERE image_id = ANY($1::uuid[])",
+            ids
+        )
+        return int(result.split()[-1])
+
+    async def delete_images(self, image_ids: List[str]) -> int:
+        ids = [image_uuid for image_uuid in map(_as_uuid, image_ids) if image_uuid]
+        if not ids:
+            return 0
+
+        pool = await self._get_pool()
+        result = await pool.execute("DELETE FROM public.images WHERE id = ANY($1::uuid[])", ids)
+        return int(result.split()[-1])
+
+    async def list_expired_access_ids(self, cutoff: datetime, limit: int) -> List[str]:
+        pool = await self._get_pool()
+        rows = await pool.fetch(
+            "SELECT id FROM public.access WHERE date < $1 ORDER BY date LIMIT $2",
+            _utc(cutoff),
+            limit
+        )
+        return [str(row['id']) for row in rows]
+
+    async def delete_access_batch(self, access_ids: List[str], cutoff: datetime) -> int:
+        ids = [access_uuid for access_uuid in map(_as_uuid, access_ids) if access_uuid]
+        if not ids:
+            return 0
+
+        pool = await self._get_pool()
+        result = await pool.execute(
+            "DELETE FROM public.access WHERE id = ANY($1::uuid[]) AND date < $2",
+            ids,
+            _utc(cutoff)
+        )
+        return int(result.split()[-1])
+
+    async def ping(self) -> None:
+        # Also opens the pool's initial connections on the first call
+        pool = await self._get_pool()
+        await pool.fetchval("SELECT id FROM public.access LIMIT 1")
+
+    async def drop_access_partitions_before(self, cutoff: datetime) -> int:
+        pool = await self._get_pool()
+        return await pool.fetchval("SELECT public.drop_access_partitions_before($1)", _utc(cutoff))
+
+    async def ensure_access_partitions(self, months_ahead: int) -> int:
+        pool = await self._get_pool()
+        return await pool.fetchval("SELECT public.ensure_access_partitions(0, $1)", months_ahead)
+
+    async def get_oldest_access_date(self) -> Optional[datetime]:
+        pool = await self._get_pool()
+        return await pool.fetchval("SELECT min(date) FROM public.access")
+
+    async def list_access_between(
+        self,
+        start: datetime,
+        end: datetime,
+        after: Optional[Tuple[datetime, str]],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        pool = await self._get_pool()
+        if after is None:
+            rows = await pool.fetch(
+                """
+                SELECT id, access, date, image_id FROM public.access
+                WHERE date >= $1 AND date < $2
+                ORDER BY date, id
+                LIMIT $3
+                """,
+                _utc(start),
+                _utc(end),
+                limit
+            )
+        else:
+            # date >= $1 keeps the scan on idx_access_date, the row comparison breaks ties on id
+            rows = await pool.fetch(
+                """
+                SELECT id, access, date, image_id FROM public.access
+                WHERE date >= $1 AND date < $3 AND (date, id) > ($1, $2)
+                ORDER BY date, id
+                LIMIT $4
+                """,
+                _utc(after[0]),
+                _as_uuid(after[1]),
+                _utc(end),
+                limit
+            )
+        return [_row_to_dict(row) for row in rows]
+
+    async def count_access_between(self, start: datetime, end: datetime) -> int:
+        pool = await self._get_pool()
+        return await pool.fetchval(
+            "SELECT count(*) FROM public.access WHERE date >= $1 AND date < $2",
+            _utc(start),
+            _utc(end)
+        )
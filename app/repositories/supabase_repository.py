@@ -0,0 +1,417 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.config.extensions import get_supabase_admin_client
+from app.models.access import AccessCreate, AccessWithImage
+from app.models.image import Image, ImageCreate
+from app.repositories.base import AccessNotCreated, Repository
+from app.utils.metrics import db_query_duration_seconds
+from app.utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+def _to_access_with_image(record: Dict[str, Any]) -> AccessWithImage:
+    """Build an AccessWithImage from a PostgREST row with embedded images(*)"""
+    record = dict(record)
+    image_data = record.pop('images', None)
+
+    result = AccessWithImage(**record)
+    if image_data:
+        result.image = Image(**image_data)
+        # Replaced by _attach_images when the record has access_images links
+        result.images = [result.image]
+    return result
+
+
+class SupabaseRepository(Repository):
+    """Repository backed by PostgREST through the Supabase client"""
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        # Use service role client to bypass RLS
+        return self._client or get_supabase_admin_client()
+
+    async def _execute(self, query, operation: str):
+        """Run a blocking PostgREST request without stalling the event loop.
+
+        ``operation`` names the round trip as ``<table>.<action>`` (or
+        ``rpc.<function>``) for the query latency metrics and trace spans.
+        """
+        with span(f"db {operation}"), db_query_duration_seconds.time(backend="supabase", operation=operation):
+            return await asyncio.to_thread(query.execute)
+
+    async def _attach_images(self, records: List[AccessWithImage]) -> None:
+        """Fill in all images of the records with one access_images request.
+
+        access_images has no foreign key to the partitioned access table, so
+        PostgREST cannot embed it in the access select.
+        """
+        access_ids = [record.id for record in records if record.image_id]
+        if not access_ids:
+            return
+
+        response = await self._execute(
+            self.client.table("access_images")
+            .select("access_id, position, images(*)")
+            .in_("access_id", access_ids),
+            "access_images.select"
+        )
+
+        linked: Dict[str, List[Tuple[int, Image]]] = {}
+        for row in response.data or []:
+            if row.get('images'):
+                linked.setdefault(str(row['access_id']), []).append((row['position'], Image(**row['images'])))
+
+        for record in records:
+            if record.id in linked:
+                record.images = [image for _, image in sorted(linked[record.id], key=lambda item: item[0])]
+
+    async def get_access_history(
+        self,
+        offset: int,
+        limit: int,
+        sort_by: str,
+        sort_order: str,
+        access_filter: Optional[bool],
+        date_from: Optional[datetime],
+        date_to: Optional[datetime],
+        count_mode: Optional[str]
+    ) -> Tuple[List[AccessWithImage], Optional[int]]:
+        # Filters are pushed down to the database so date ranges only touch
+        # the matching monthly partitions of the access table
+        query = (
+            self.client.table("access")
+            .select("*, images(*)", count=count_mode)
+        )
+
+        if access_filter is not None:
+            query = query.eq("access", access_filter)
+
+        if date_from:
+            query = query.gte("date", date_from.isoformat())
+
+        if date_to:
+            query = query.lte("date", date_to.isoformat())
+
+        response = await self._execute(
+            query
+            .order(sort_by, desc=sort_order == "desc")
+            .range(offset, offset + limit - 1),
+            "access.select"
+        )
+
+        access_records = []
+        for record in response.data or []:
+            try:
+                access_records.append(_to_access_with_image(record))
+            except Exception:
+                # Skip invalid records
+                continue
+
+        await self._attach_images(access_records)
+
+        total = (response.count or 0) if count_mode else None
+        return access_records, total
+
+    async def count_access(self, access_filter: Optional[bool] = None) -> int:
+        query = self.client.table("access").select("id", count="exact", head=True)
+        if access_filter is not None:
+            query = query.eq("access", access_filter)
+
+        response = await self._execute(query, "access.count")
+        return response.count or 0
+
+    async def get_access(self, access_id: str) -> Optional[AccessWithImage]:
+        response = await self._execute(
+            self.client.table("access")
+            .select("*, images(*)")
+            .eq("id", access_id),
+            "access.select"
+        )
+
+        if not response.data:
+            return None
+
+        result = _to_access_with_image(response.data[0])
+        await self._attach_images([result])
+        return result
+
+    async def create_access(
+        self,
+        access_data: AccessCreate,
+        images_data: Optional[List[ImageCreate]] = None
+    ) -> AccessWithImage:
+        image_id = access_data.image_id
+
+        # PostgREST cannot span requests with one transaction, so the image
+        # records (and their links) are removed again if a later insert fails
+        created_images: List[Image] = []
+        access_id = None
+        try:
+            if images_data:
+                images_response = await self._execute(
+                    self.client.table("images").insert([image.model_dump() for image in images_data]),
+                    "images.insert"
+                )
+                if len(images_response.data or []) != len(images_data):
+                    raise Exception("Failed to create image records")
+
+                images_by_path = {row['file_path']: Image(**row) for row in images_response.data}
+                created_images = [images_by_path[image.file_path] for image in images_data]
+                image_id = created_images[0].id
+
+            # The trigger will automatically populate image_url if image_id is provided
+            insert_response = await self._execute(
+                self.client.table("access")
+                .insert({
+                    "access": access_data.access,
+                    "date": access_data.date.isoformat(),
+                    "image_id": image_id,
+                    "created_at": datetime.utcnow().isoformat(),
+                    "updated_at": datetime.utcnow().isoformat()
+                }),
+                "access.insert"
+            )
+
+            if not insert_response.data:
+                raise Exception("Failed to create access record")
+            access_id = insert_response.data[0]["id"]
+
+            if created_images:
+                await self._execute(
+                    self.client.table("access_images")
+                    .insert([
+                        {"access_id": access_id, "image_id": image.id, "position": position}
+                        for position, image in enumerate(created_images)
+                    ]),
+                    "access_images.insert"
+                )
+        except Exception as e:
+            if created_images:
+                try:
+                    if access_id:
+                        await self._execute(
+                            self.client.table("access").delete().eq("id", access_id),
+                            "access.delete"
+                        )
+                    await self.delete_images([image.id for image in created_images])
+                except Exception as cleanup_error:
+                    logger.warning(f"Could not remove image records {[image.id for image in created_images]}: {cleanup_error}")
+            raise AccessNotCreated(str(e)) from e
+
+        # Fetch the complete record with image data and image_url populated by trigger
+        result = await self.get_access(access_id)
+        if result is None:
+            raise Exception("Failed to fetch created access record")
+
+        return result
+
+    async def delete_access(self, access_id: str) -> Optional[AccessWithImage]:
+        access_record = await self.get_access(access_id)
+        if access_record is None:
+            return None
+
+        # The access row goes first: if the image delete fails afterwards, only
+        # image rows no record points to are left behind, instead of a record
+        # whose image_id was cleared by ON DELETE SET NULL
+        delete_response = await self._execute(
+            self.client.table("access")
+            .delete()
+            .eq("id", access_id),
+            "access.delete"
+        )
+        if not delete_response.data:
+            return None
+
+        # The access_images links go with their images (ON DELETE CASCADE)
+        if access_record.images:
+            image_ids = [image.id for image in access_record.images]
+            try:
+                await self.delete_images(image_ids)
+            except Exception as e:
+                logger.warning(f"Could not remove image records {image_ids} of deleted access {access_id}: {e}")
+
+        return access_record
+
+    async def create_image(self, image_data: ImageCreate) -> Image:
+        response = await self._execute(
+            self.client.table("images").insert(image_data.model_dump()),
+            "images.insert"
+        )
+
+        if not response.data:
+            raise Exception("Failed to create image record")
+
+        return Image(**response.data[0])
+
+    async def get_image(self, image_id: str) -> Optional[Image]:
+        response = await self._execute(
+            self.client.table("images").select("*").eq("id", image_id),
+            "images.select"
+        )
+
+        if response.data:
+            return Image(**response.data[0])
+
+        return None
+
+    async def get_images(self, image_ids: List[str]) -> Dict[str, Image]:
+        if not image_ids:
+            return {}
+
+        response = await self._execute(
+            self.client.table("images").select("*").in_("id", image_ids),
+            "images.select"
+        )
+        return {str(row['id']): Image(**row) for row in response.data or []}
+
+    async def delete_image(self, image_id: str) -> bool:
+        response = await self._execute(
+            self.client.table("images").delete().eq("id", image_id),
+            "images.delete"
+        )
+        return len(response.data) > 0
+
+    async def find_referenced_paths(self, file_paths: List[str]) -> Set[str]:
+        if not file_paths:
+            return set()
+
+        response = await self._execute(
+            self.client.table("images")
+            .select("file_path")
+            .in_("file_path", file_paths),
+            "images.select"
+        )
+        return {row['file_path'] for row in response.data or []}
+
+    async def count_expired(self, table: str, column: str, cutoff: datetime) -> int:
+        response = await self._execute(
+            self.client.table(table)
+            .select("id", count="exact", head=True)
+            .lt(column, cutoff.isoformat()),
+            f"{table}.count"
+        )
+        return response.count or 0
+
+    async def list_expired_images(self, cutoff: datetime, limit: int) -> List[Dict[str, Any]]:
+        response = await self._execute(
+            self.client.table("images")
+            .select("id, file_path")
+            .lt("created_at", cutoff.isoformat())
+            .order("created_at")
+            .limit(limit),
+            "images.select"
+        )
+        return response.data or []
+
+    async def detach_images(self, image_ids: List[str]) -> int:
+        if not image_ids:
+            return 0
+
+        response = await self._execute(
+            self.client.table("access")
+            .update({"image_id": None, "image_url": None})
+            .in_("image_id", image_ids),
+            "access.update"
+        )
+        return len(response.data or [])
+
+    async def delete_images(self, image_ids: List[str]) -> int:
+        if not image_ids:
+            return 0
+
+        response = await self._execute(
+            self.client.table("images").delete().in_("id", image_ids),
+            "images.delete"
+        )
+        return len(response.data or [])
+
+    async def list_expired_access_ids(self, cutoff: datetime, limit: int) -> List[str]:
+        response = await self._execute(
+            self.client.table("access")
+            .select("id")
+            .lt("date", cutoff.isoformat())
+            .order("date")
+            .limit(limit),
+            "access.select"
+        )
+        return [row['id'] for row in response.data or []]
+
+    async def delete_access_batch(self, access_ids: List[str], cutoff: datetime) -> int:
+        if not access_ids:
+            return 0
+
+        response = await self._execute(
+            self.client.table("access")
+            .delete()
+            .in_("id", access_ids)
+            .lt("date", cutoff.isoformat()),
+            "access.delete"
+        )
+        return len(response.data or [])
+
+    async def ping(self) -> None:
+        await self._execute(self.client.table("access").select("id").limit(1), "access.select")
+
+    async def drop_access_partitions_before(self, cutoff: datetime) -> int:
+        response = await self._execute(
+            self.client.rpc("drop_access_partitions_before", {"cutoff": cutoff.isoformat()}),
+            "rpc.drop_access_partitions_before"
+        )
+        return response.data or 0
+
+    async def ensure_access_partitions(self, months_ahead: int) -> int:
+        response = await self._execute(
+            self.client.rpc("ensure_access_partitions", {"months_back": 0, "months_ahead": months_ahead}),
+            "rpc.ensure_access_partitions"
+        )
+        return response.data or 0
+
+    async def get_oldest_access_date(self) -> Optional[datetime]:
+        response = await self._execute(
+            self.client.table("access").select("date").order("date").limit(1),
+            "access.select"
+        )
+        if not response.data:
+            return None
+        return datetime.fromisoformat(response.data[0]['date'])
+
+    async def list_access_between(
+        self,
+        start: datetime,
+        end: datetime,
+        after: Optional[Tuple[datetime, str]],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        query = (
+            self.client.table("access")
+            .select("id, access, date, image_id")
+            .gte("date", (after[0] if after else start).isoformat())
+            .lt("date", end.isoformat())
+        )
+        if after is not None:
+            # Keyset condition (date, id) > after, timestamps are quoted for the "+" of the offset
+            after_date = after[0].isoformat()
+            query = query.or_(f'date.gt."{after_date}",and(date.eq."{after_date}",id.gt.{after[1]})')
+
+        response = await self._execute(query.order("date").order("id").limit(limit), "access.select")
+        return [
+            {**row, 'date': datetime.fromisoformat(row['date'])}
+            for row in response.data or []
+        ]
+
+    async def count_access_between(self, start: datetime, end: datetime) -> int:
+        response = await self._execute(
+            self.client.table("access")
+            .select("id", count="exact", head=True)
+            .gte("date", start.isoformat())
+            .lt("date", end.isoformat()),
+            "access.count"
+        )
+        return response.count or 0
@@ -1,13 +1,19 @@
+import asyncio
+import math
 import os
 from datetime import datetime
-from typing import Optional
-from fastapi import APIRouter, Query, HTTPException, UploadFile, File, Form, Depends
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Query, HTTPException, UploadFile, File, Form, Depends, Header, Response
 from fastapi.responses import JSONResponse
 
 from app.models.access import AccessCreate, AccessListResponse, AccessCreateResponse, AccessWithImage
 from app.models.image import ImageCreate
+from app.repositories.base import AccessNotCreated
 from app.services.database_service import AccessService
 from app.services.image_service import ImageService
+from app.services.idempotency import IdempotencyConflict, IdempotencyStoreFull, idempotency_store
+from app.services.storage_gc import storage_gc
+from app.services.readiness import readiness_probe
 from app.utils.file_utils import (
     allowed_file, 
     allowed_mime_type, 
@@ -15,6 +21,8 @@ from app.utils.file_utils import (
     generate_unique_filename, 
     get_file_info_from_upload
 )
+from app.utils.metrics import image_validation_duration_seconds
+from app.utils.tracing import span
 from app.config.config import settings
 
 # Create router
@@ -66,79 +74,141 @@ async def get_history(
 
 @router.post("/register", response_model=AccessCreateResponse)
 async def register_access(
+    response: Response,
     access: bool = Form(..., description="Access granted (true) or denied (false)"),
     date: Optional[datetime] = Form(None, description="Access date (ISO format, optional)"),
-    image: Optional[UploadFile] = File(None, description="Optional access image")
+    image: Optional[UploadFile] = File(None, description="Optional access image"),
+    images: Optional[List[UploadFile]] = File(None, description="Optional additional access images"),
+    idempotency_key: Optional[str] = Header(
+        None,
+        alias="Idempotency-Key",
+        max_length=255,
+        description="Unique key per access event, retries with the same key return the original record"
+    )
 ):
     """
-    Register a new access record with optional image.
+    Register a new access record with optional images.
     
     - **access**: Boolean indicating if access was granted or denied
     - **date**: Date and time of access (optional, defaults to current time)
     - **image**: Optional image file (PNG, JPG, JPEG, GIF, WEBP)
+    - **images**: Optional image files, repeat the field for each one (up to REGISTER_MAX_IMAGES in total)
+    - **Idempotency-Key** (header): Optional key making retries return the original record
     """
+    # `image` stays first so it remains the record's primary image
+    uploads = [upload for upload in [image, *(images or [])] if upload and upload.filename]
+    if len(uploads) > settings.REGISTER_MAX_IMAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many images. Maximum: {settings.REGISTER_MAX_IMAGES}"
+        )
+    
+    if not idempotency_key:
+        return await _register_access(access, date, uploads)
+    
+    # Same key with other data is a client bug, not a retry
+    fingerprint = (
+        access,
+        date.isoformat() if date else None,
+        tuple((upload.filename, upload.size) for upload in uploads)
+    )
+    try:
+        result, replayed = await idempotency_store.run(
+            idempotency_key, fingerprint, lambda: _register_access(access, date, uploads)
+        )
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotencyStoreFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, math.ceil(settings.ADMISSION_RETRY_AFTER_SECONDS)))}
+        )
+    
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+def _validate_image(upload: UploadFile, file_content: bytes) -> Dict[str, Any]:
+    """Check one uploaded image, returns its file info (runs in a worker thread)"""
+    # Get file info with content for better MIME type detection
+    with span("image.detect_type"), image_validation_duration_seconds.time(step="detect_type"):
+        file_info = get_file_info_from_upload(upload, len(file_content), file_content)
+    
+    # Validate MIME type
+    if not allowed_mime_type(file_info['mime_type']):
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Invalid file MIME type: {file_info['mime_type']}. Allowed: {settings.ALLOWED_FILE_TYPES}"
+        )
+    
+    # Validate file size
+    if file_info['size'] > settings.MAX_FILE_SIZE:
+        raise HTTPException(status_code=413, detail="File too large")
+    
+    # Validate image content
+    with span("image.verify"), image_validation_duration_seconds.time(step="verify"):
+        valid_image = validate_image_content(file_content)
+    if not valid_image:
+        raise HTTPException(status_code=400, detail="Invalid or corrupted image file")
+    
+    return file_info
+
+async def _register_access(access: bool, date: Optional[datetime], uploads: List[UploadFile]) -> AccessCreateResponse:
+    """Validate, upload and insert one access event with its images"""
+    # Track what was uploaded so a failure does not leave orphans behind
+    uploaded_paths: List[str] = []
+    
     try:
         # Use current time if date not provided
         access_date = date if date else datetime.utcnow()
         
-        # Handle image upload if present
-        image_id = None
-        if image and image.filename:
-            # Validate file type
-            if not allowed_file(image.filename):
-                raise HTTPException(
-                    status_code=400, 
-                    detail="Invalid file type. Allowed: png, jpg, jpeg, gif, webp"
-                )
-            
-            # Read file content
-            file_content = await image.read()
-            
-            # Get file info with content for better MIME type detection
-            file_info = get_file_info_from_upload(image, len(file_content), file_content)
-            
-            # Validate MIME type
-            if not allowed_mime_type(file_info['mime_type']):
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Invalid file MIME type: {file_info['mime_type']}. Allowed: {settings.ALLOWED_FILE_TYPES}"
-                )
-            
-            # Validate file size
-            if file_info['size'] > settings.MAX_FILE_SIZE:
-                raise HTTPException(status_code=413, detail="File too large")
-            
-            # Validate image content
-            if not validate_image_content(file_content):
-                raise HTTPException(status_code=400, detail="Invalid or corrupted image file")
+        # Handle image uploads if present
+        images_data: List[ImageCreate] = []
+        if uploads:
+            # Validate file types
+            for upload in uploads:
+                if not allowed_file(upload.filename):
+                    raise HTTPException(
+                        status_code=400, 
+                        detail="Invalid file type. Allowed: png, jpg, jpeg, gif, webp"
+                    )
             
-            # Generate unique filename
-            unique_filename = generate_unique_filename(image.filename)
-            file_path = f"access_images/{unique_filename}"
+            # Read file contents
+            with span("image.read"):
+                contents = await asyncio.gather(*(upload.read() for upload in uploads))
             
-            # Upload to Supabase storage
-            await ImageService.upload_image_to_storage(file_content, file_path, file_info['mime_type'])
+            # Pillow decoding is CPU bound, so every image is checked in a worker thread
+            files_info = await asyncio.gather(*(
+                asyncio.to_thread(_validate_image, upload, file_content)
+                for upload, file_content in zip(uploads, contents)
+            ))
             
-            # Create image record
-            image_data = ImageCreate(
-                filename=unique_filename,
-                original_filename=file_info['original_filename'],
-                file_path=file_path,
-                file_size=file_info['size'],
-                mime_type=file_info['mime_type']
-            )
+            # Generate unique filenames
+            for upload, file_info in zip(uploads, files_info):
+                unique_filename = generate_unique_filename(upload.filename)
+                images_data.append(ImageCreate(
+                    filename=unique_filename,
+                    original_filename=file_info['original_filename'],
+                    file_path=f"access_images/{unique_filename}",
+                    file_size=file_info['size'],
+                    mime_type=file_info['mime_type']
+                ))
             
-            image_record = await ImageService.create_image(image_data)
-            image_id = image_record.id
+            # Upload to Supabase storage, concurrently and bounded by UPLOAD_CONCURRENCY
+            await ImageService.upload_images_to_storage([
+                (file_content, image_data.file_path, image_data.mime_type)
+                for file_content, image_data in zip(contents, images_data)
+            ])
+            uploaded_paths = [image_data.file_path for image_data in images_data]
         
-        # Create access record
+        # Create access record, image records are created together with it
         access_data = AccessCreate(
             access=access,
-            date=access_date,
-            image_id=image_id
+            date=access_date
         )
         
-        access_record = await AccessService.create_access(access_data)
+        access_record = await AccessService.create_access(access_data, images_data)
         
         return AccessCreateResponse(
             message="Access record created successfully",
@@ -147,7 +217,13 @@ async def register_access(
         
     except HTTPException:
         raise
+    except AccessNotCreated as e:
+        # Nothing was committed, so no record points to the uploaded objects
+        storage_gc.enqueue(uploaded_paths)
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
     except Exception as e:
+        # The record may have been committed (e.g. the read after the insert
+        # failed), uploads left without one are found by the reconcile pass
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @router.delete("/history/{access_id}")
@@ -176,9 +252,30 @@ async def delete_access(access_id: str):
 # Health check endpoint
 @router.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (liveness only, no dependency checks)"""
     return {
         "status": "healthy",
         "message": "DoorGuardian API is running",
         "version": settings.VERSION
-    }
\ No newline at end of file
+    }
+
+# Readiness endpoint for load balancers
+@router.get("/ready")
+async def readiness_check():
+    """
+    Readiness check endpoint.
+    
+    Returns 200 once the worker is warmed up and its dependencies answered the
+    last background probe, 503 otherwise. The result is cached, so polling
+    this endpoint does not query the database.
+    """
+    ready = readiness_probe.ready
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "warmed_up": readiness_probe.stats['warmed_up'],
+            "checks": readiness_probe.stats['checks'],
+            "last_checked_at": readiness_probe.stats['last_checked_at']
+        }
+    )
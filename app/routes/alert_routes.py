@@ -0,0 +1,80 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+
+from app.services.alerts import CLOSED, burst_detector
+from app.config.config import settings
+
+# Create router
+router = APIRouter(prefix="/api/v1/alerts", tags=["alerts"])
+
+@router.get("")
+async def list_alerts(
+    limit: int = Query(50, ge=1, le=1000, description="Maximum number of alerts (most recent first)"),
+    after_id: int = Query(0, ge=0, description="Only alerts with a higher id, for polling clients")
+):
+    """
+    Recent denied-attempt bursts, most recent first.
+
+    An alert is raised when the denied attempts of one rule's window reach its
+    threshold (`ALERT_RULES`, e.g. `5/60` = 5 denials within 60 seconds).
+    Detection runs in memory as records are created, so this endpoint never
+    queries the database. Alerts are kept per worker, up to `ALERT_HISTORY_SIZE`.
+    """
+    return {
+        "enabled": settings.ALERTS_ENABLED,
+        "rules": list(settings.ALERT_RULES),
+        "alerts": burst_detector.recent(limit, after_id),
+        "stats": burst_detector.stats
+    }
+
+def _event(alert: Dict[str, Any]) -> str:
+    return f"id: {alert['id']}\nevent: alert\ndata: {json.dumps(alert)}\n\n"
+
+async def _alert_stream(last_event_id: int) -> AsyncIterator[str]:
+    # The replay snapshot is taken right after subscribing, before the first
+    # yield, so alerts raised later only arrive through the queue
+    queue = burst_detector.subscribe()
+    missed = list(reversed(burst_detector.recent(settings.ALERT_HISTORY_SIZE, last_event_id)))
+    try:
+        yield ": connected\n\n"
+        last_sent_id = last_event_id
+        for alert in missed:
+            yield _event(alert)
+            last_sent_id = alert['id']
+
+        while True:
+            try:
+                alert = await asyncio.wait_for(queue.get(), settings.ALERT_STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+
+            if alert is CLOSED:
+                return
+            # Ids only grow, so anything at or below the last sent id was already delivered
+            if alert['id'] <= last_sent_id:
+                continue
+            yield _event(alert)
+            last_sent_id = alert['id']
+    finally:
+        burst_detector.unsubscribe(queue)
+
+@router.get("/stream")
+async def stream_alerts(
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID", description="Replay alerts after this id on reconnect")
+):
+    """
+    Server-Sent Events stream pushing each alert as it is detected.
+
+    Reconnecting clients (e.g. `EventSource`) send `Last-Event-ID` and get the
+    alerts they missed from the recent history first.
+    """
+    return StreamingResponse(
+        _alert_stream(last_event_id or 0),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
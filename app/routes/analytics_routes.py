@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Query, HTTPException
+
+from app.services.access_archive import GROUP_BY, access_archive
+
+# Create router
+router = APIRouter(prefix="/api/v1/analytics", tags=["analytics"])
+
+@router.get("/denial-rate")
+async def denial_rate(
+    group_by: str = Query("weekday", description="Bucket by weekday, hour or month"),
+    date_from: Optional[datetime] = Query(None, description="Start date filter (ISO format)"),
+    date_to: Optional[datetime] = Query(None, description="End date filter (ISO format)"),
+    tz_offset_minutes: int = Query(0, ge=-720, le=840, description="UTC offset used for weekdays and hours")
+):
+    """
+    Access and denial counts with the denial rate per bucket.
+
+    Answered from the columnar archive of closed months, so it never queries
+    the database; `coverage` lists the archived months that were scanned.
+    """
+    if group_by not in GROUP_BY:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of: {', '.join(GROUP_BY)}")
+
+    return await access_archive.denial_rate(group_by, date_from, date_to, tz_offset_minutes)
+
+@router.get("/heatmap")
+async def heatmap(
+    date_from: Optional[datetime] = Query(None, description="Start date filter (ISO format)"),
+    date_to: Optional[datetime] = Query(None, description="End date filter (ISO format)"),
+    tz_offset_minutes: int = Query(0, ge=-720, le=840, description="UTC offset used for weekdays and hours")
+):
+    """
+    Accesses and denials as weekday (Monday first) by hour-of-day matrices.
+
+    Answered from the columnar archive of closed months.
+    """
+    return await access_archive.heatmap(date_from, date_to, tz_offset_minutes)
@@ -0,0 +1,51 @@
+from fastapi import APIRouter
+
+from app.services.retention_service import retention_purger
+from app.services.partition_maintainer import partition_maintainer
+from app.services.access_archive import access_archive
+from app.services.storage_gc import storage_gc
+from app.config.config import settings
+
+# Create router
+router = APIRouter(prefix="/api/v1", tags=["maintenance"])
+
+@router.get("/retention")
+async def retention_status():
+    """
+    Get progress metrics of the background retention purger.
+
+    Counters are cumulative since the process started.
+    """
+    return {
+        "enabled": settings.RETENTION_ENABLED,
+        "image_days": settings.RETENTION_IMAGE_DAYS,
+        "access_days": settings.RETENTION_ACCESS_DAYS,
+        "stats": retention_purger.stats,
+        "partitions": partition_maintainer.stats
+    }
+
+@router.get("/storage-gc")
+async def storage_gc_status():
+    """
+    Get metrics of the background storage garbage collector.
+
+    Counters are cumulative since the process started.
+    """
+    return {
+        "reconcile_enabled": settings.STORAGE_GC_RECONCILE_ENABLED,
+        "stats": storage_gc.stats
+    }
+
+@router.get("/archive")
+async def archive_status():
+    """
+    Get progress metrics of the analytics archive and the archived months.
+
+    Counters are cumulative since the process started.
+    """
+    return {
+        "enabled": settings.ARCHIVE_ENABLED,
+        "directory": settings.ARCHIVE_DIR,
+        "months": access_archive.list_months(),
+        "stats": access_archive.stats
+    }
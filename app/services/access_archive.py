@@ -0,0 +1,533 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from app.config.config import settings
+from app.config.extensions import get_repository
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMAT = 1
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECONDS_PER_HOUR = 3_600_000_000
+MICROSECONDS_PER_DAY = 24 * MICROSECONDS_PER_HOUR
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+GROUP_BY = ("weekday", "hour", "month")
+
+
+def _month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def _next_month(value: datetime) -> datetime:
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def _to_micros(value: datetime) -> int:
+    """Microseconds since the epoch, naive datetimes are UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def _naive_utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+class ArchivedMonth:
+    """Memory-mapped columns of one archived month, sorted by date.
+
+    - ``date``: int64 microseconds since the epoch (UTC)
+    - ``access``: bool
+    - ``denied_before``: int64 denied rows before each position (rows + 1 values),
+      so denials in any row range are a subtraction
+    - ``id``: access UUIDs as 16-byte void values
+    - ``image_code``: int32 index into ``image_ids`` (-1 without image)
+    - ``image_ids``: image UUIDs as 16-byte void values (the dictionary)
+    """
+
+    COLUMNS = ("date", "access", "denied_before", "id", "image_code", "image_ids")
+
+    def __init__(self, path: str):
+        import numpy as np
+
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as meta_file:
+            self.meta: Dict[str, Any] = json.load(meta_file)
+        self.month: str = self.meta['month']
+        self.rows: int = self.meta['rows']
+        for column in self.COLUMNS:
+            # Empty arrays cannot be memory-mapped
+            mode = "r" if self.rows else None
+            setattr(self, column, np.load(os.path.join(path, f"{column}.npy"), mmap_mode=mode))
+
+    def slice(self, start_us: Optional[int], end_us: Optional[int]) -> Tuple[int, int]:
+        """Row range with start <= date <= end, found by binary search"""
+        import numpy as np
+
+        low = 0 if start_us is None else int(np.searchsorted(self.date, start_us, side="left"))
+        high = self.rows if end_us is None else int(np.searchsorted(self.date, end_us, side="right"))
+        return low, high
+
+
+class _MonthColumns:
+    """Column chunks of one month, appended a page of rows at a time.
+
+    Each page becomes NumPy arrays as soon as it is fetched, so a month is
+    held as fixed-width chunks (about 42 bytes per row) instead of a list of
+    row dicts, and the chunks are concatenated once when the month is written.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self._chunks: Dict[str, List[Any]] = {'date': [], 'access': [], 'id': [], 'image': [], 'has_image': []}
+
+    def _append(self, **chunk) -> None:
+        for name, values in chunk.items():
+            self._chunks[name].append(values)
+        self.rows += len(chunk['date'])
+
+    def add_page(self, rows: List[Dict[str, Any]]) -> None:
+        import numpy as np
+
+        self._append(
+            date=np.array([_to_micros(row['date']) for row in rows], dtype=np.int64),
+            access=np.array([bool(row['access']) for row in rows], dtype=np.bool_),
+            # Raw 16-byte void values, the S dtype would strip trailing zero bytes
+            id=np.frombuffer(b"".join(uuid.UUID(str(row['id'])).bytes for row in rows), dtype="V16"),
+            image=np.frombuffer(
+                b"".join(uuid.UUID(str(row['image_id'])).bytes if row.get('image_id') else bytes(16) for row in rows),
+                dtype="V16"
+            ),
+            has_image=np.array([bool(row.get('image_id')) for row in rows], dtype=np.bool_),
+        )
+
+    def add_archived(self, month: ArchivedMonth, low: int, high: int) -> None:
+        """Rows [low, high) of an existing archive, e.g. those already purged from the database"""
+        import numpy as np
+
+        codes = np.asarray(month.image_code[low:high])
+        has_image = codes >= 0
+        image = np.zeros(high - low, dtype="V16")
+        image[has_image] = np.asarray(month.image_ids)[codes[has_image]]
+        self._append(
+            date=np.asarray(month.date[low:high]),
+            access=np.asarray(month.access[low:high]),
+            id=np.asarray(month.id[low:high]),
+            image=image,
+            has_image=has_image,
+        )
+
+    def columns(self) -> Dict[str, Any]:
+        import numpy as np
+
+        def column(name: str, dtype: str):
+            return np.concatenate(self._chunks[name]) if self._chunks[name] else np.zeros(0, dtype=dtype)
+
+        dates = column('date', "int64")
+        access = column('access', "bool")
+        image = column('image', "V16")
+        has_image = column('has_image', "bool")
+
+        # Image ids are dictionary-encoded, rows without image get -1
+        image_ids = np.unique(image[has_image])
+        image_codes = np.full(len(dates), -1, dtype=np.int32)
+        image_codes[has_image] = np.searchsorted(image_ids, image[has_image])
+
+        # Pages come ordered by date and id, the stable sort only guards the date order
+        order = np.argsort(dates, kind="stable")
+        access = access[order]
+        return {
+            'date': dates[order],
+            'access': access,
+            'denied_before': np.concatenate(([0], np.cumsum(~access, dtype=np.int64))),
+            'id': column('id', "V16")[order],
+            'image_code': image_codes[order],
+            'image_ids': image_ids,
+        }
+
+
+class AccessArchive:
+    """Columnar archive of closed months of access records for analytics.
+
+    A background job compacts every closed month into fixed-width NumPy
+    arrays under ``ARCHIVE_DIR/<YYYY-MM>/`` (written to a temporary directory
+    and renamed, so readers never see a partial month). Analytics queries scan
+    the memory-mapped arrays with vectorized operations instead of paging
+    through the database.
+
+    Only the worker holding the lock file in ``ARCHIVE_DIR`` builds months,
+    the other workers of the host just read them. A month whose database rows
+    outnumber its archive (records backfilled after it was archived) is
+    rebuilt on the next run, and the retention purger only deletes records of
+    months whose counts match (``verified_through``).
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._months: Dict[str, Tuple[int, ArchivedMonth]] = {}
+        self._lock_file = None
+        self.archived_through: Optional[datetime] = None
+        self.stats: Dict[str, Any] = {
+            'running': False,
+            'builder': None,
+            'runs': 0,
+            'months_archived': 0,
+            'months_rebuilt': 0,
+            'rows_archived': 0,
+            'archived_through': None,
+            'errors': 0,
+            'last_error': None,
+            'last_run_started_at': None,
+            'last_run_finished_at': None,
+            'last_run_duration_seconds': None,
+        }
+
+    # Background job
+
+    def start(self) -> None:
+        """Start the periodic archive loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_forever())
+            self.stats['running'] = True
+
+    async def stop(self) -> None:
+        """Cancel the archive loop, wait for it to finish and hand the builder lock over"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self.stats['running'] = False
+        self._release_builder_lock()
+
+    async def _run_forever(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats['errors'] += 1
+                self.stats['last_error'] = str(e)
+                logger.error(f"Archive run failed: {e}")
+
+            await asyncio.sleep(settings.ARCHIVE_INTERVAL_SECONDS)
+
+    def _acquire_builder_lock(self) -> bool:
+        """Hold an exclusive lock on ARCHIVE_DIR/.builder.lock for the life of the process"""
+        if self._lock_file is not None:
+            return True
+        if fcntl is None:
+            # No flock on Windows, where the development server runs a single worker
+            return True
+
+        os.makedirs(settings.ARCHIVE_DIR, exist_ok=True)
+        lock_file = open(os.path.join(settings.ARCHIVE_DIR, ".builder.lock"), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        self._lock_file = lock_file
+        return True
+
+    def _release_builder_lock(self) -> None:
+        if self._lock_file is not None:
+            # Closing the file releases the flock
+            self._lock_file.close()
+            self._lock_file = None
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Archive every closed month that is not in the archive yet or changed since"""
+        started = datetime.utcnow()
+        self.stats['last_run_started_at'] = started.isoformat()
+
+        self.stats['builder'] = self._acquire_builder_lock()
+        if self.stats['builder']:
+            await self._build(started)
+
+        finished = datetime.utcnow()
+        self.stats['runs'] += 1
+        self.stats['last_run_finished_at'] = finished.isoformat()
+        self.stats['last_run_duration_seconds'] = (finished - started).total_seconds()
+        return self.stats
+
+    async def _build(self, now: datetime) -> None:
+        repository = get_repository()
+        oldest = await repository.get_oldest_access_date()
+        # A month is closed once the grace period after its end has passed
+        closed_before = _month_start(now - timedelta(days=settings.ARCHIVE_GRACE_DAYS))
+        if oldest is None:
+            return
+
+        oldest = _naive_utc(oldest)
+        archived = set(self.list_months())
+        month = _month_start(oldest)
+        while month < closed_before:
+            label = month.strftime("%Y-%m")
+            if label not in archived:
+                rows = await self._archive_month(label, month, None)
+                self.stats['months_archived'] += 1
+                self.stats['rows_archived'] += rows
+                logger.info(f"Archived {rows} access records of {label}")
+            elif await self._is_stale(label, month, oldest):
+                rows = await self._archive_month(label, max(month, oldest), self._load_month(label))
+                self.stats['months_rebuilt'] += 1
+                logger.info(f"Re-archived {label} with {rows} access records after a backfill")
+
+            month = _next_month(month)
+
+        # Every record before this date is in the archive
+        self.archived_through = closed_before
+        self.stats['archived_through'] = closed_before.isoformat()
+
+    async def _is_stale(self, label: str, month: datetime, oldest: datetime) -> bool:
+        """True when the database holds more rows of the month than its archive.
+
+        Rows before ``oldest`` were purged from the database, so only the part
+        of the month still there is compared.
+        """
+        lower = max(month, oldest)
+        archived_month = self._load_month(label)
+        low, _ = archived_month.slice(_to_micros(lower), None)
+        count = await get_repository().count_access_between(lower, _next_month(month))
+        return count > archived_month.rows - low
+
+    async def verified_through(self, cutoff: datetime) -> datetime:
+        """Latest date, up to cutoff, before which every access record is in the archive.
+
+        Months are checked from the oldest record on: the first one that is
+        not archived yet or has rows missing from its archive bounds the date.
+        """
+        oldest = await get_repository().get_oldest_access_date()
+        if oldest is None:
+            return cutoff
+
+        oldest = _naive_utc(oldest)
+        archived = set(self.list_months())
+        month = _month_start(oldest)
+        while month < cutoff:
+            label = month.strftime("%Y-%m")
+            if label not in archived or await self._is_stale(label, month, oldest):
+                return month
+            month = _next_month(month)
+        return cutoff
+
+    async def _archive_month(self, label: str, start: datetime, previous: Optional[ArchivedMonth]) -> int:
+        """Write the month from the database rows dated from start, keeping the archived rows before it"""
+        repository = get_repository()
+        end = _next_month(_month_start(start))
+        columns = _MonthColumns()
+        if previous is not None:
+            low, _ = previous.slice(_to_micros(start), None)
+            columns.add_archived(previous, 0, low)
+
+        # Keyset pagination on (date, id), each page costs the same however deep into the month
+        after: Optional[Tuple[datetime, str]] = None
+        while True:
+            page = await repository.list_access_between(start, end, after, settings.ARCHIVE_BATCH_SIZE)
+            if page:
+                await asyncio.to_thread(columns.add_page, page)
+                after = (page[-1]['date'], str(page[-1]['id']))
+            if len(page) < settings.ARCHIVE_BATCH_SIZE:
+                break
+
+        await asyncio.to_thread(self._write_month, label, columns)
+        return columns.rows
+
+    def _write_month(self, label: str, month_columns: _MonthColumns) -> None:
+        import numpy as np
+
+        columns = month_columns.columns()
+        meta = {
+            'format': ARCHIVE_FORMAT,
+            'month': label,
+            'rows': month_columns.rows,
+            'denied': int(columns['denied_before'][-1]),
+            'archived_at': datetime.utcnow().isoformat(),
+        }
+
+        os.makedirs(settings.ARCHIVE_DIR, exist_ok=True)
+        final = os.path.join(settings.ARCHIVE_DIR, label)
+        temporary = os.path.join(settings.ARCHIVE_DIR, f".{label}.tmp-{os.getpid()}")
+        shutil.rmtree(temporary, ignore_errors=True)
+        os.makedirs(temporary)
+        for name, values in columns.items():
+            np.save(os.path.join(temporary, f"{name}.npy"), values)
+        with open(os.path.join(temporary, "meta.json"), "w", encoding="utf-8") as meta_file:
+            json.dump(meta, meta_file)
+
+        # A rebuilt month replaces the previous directory, readers holding its
+        # memory maps keep them until they notice the new meta.json
+        retired = os.path.join(settings.ARCHIVE_DIR, f".{label}.old-{os.getpid()}")
+        if os.path.exists(final):
+            shutil.rmtree(retired, ignore_errors=True)
+            os.rename(final, retired)
+        os.rename(temporary, final)
+        shutil.rmtree(retired, ignore_errors=True)
+
+    # Queries
+
+    def list_months(self) -> List[str]:
+        """Archived month labels (YYYY-MM), oldest first"""
+        if not os.path.isdir(settings.ARCHIVE_DIR):
+            return []
+        return sorted(
+            name for name in os.listdir(settings.ARCHIVE_DIR)
+            if not name.startswith(".") and os.path.exists(os.path.join(settings.ARCHIVE_DIR, name, "meta.json"))
+        )
+
+    def _load_month(self, label: str) -> ArchivedMonth:
+        """Cached month, reopened when it was rebuilt since it was loaded"""
+        path = os.path.join(settings.ARCHIVE_DIR, label)
+        version = os.stat(os.path.join(path, "meta.json")).st_mtime_ns
+        cached = self._months.get(label)
+        if cached is None or cached[0] != version:
+            cached = (version, ArchivedMonth(path))
+            self._months[label] = cached
+        return cached[1]
+
+    def _open_months(self, date_from: Optional[datetime], date_to: Optional[datetime]) -> List[ArchivedMonth]:
+        first = date_from.strftime("%Y-%m") if date_from else None
+        last = date_to.strftime("%Y-%m") if date_to else None
+
+        months = []
+        for label in self.list_months():
+            if (first and label < first) or (last and label > last):
+                continue
+            months.append(self._load_month(label))
+        return months
+
+    def _scan(
+        self,
+        date_from: Optional[datetime],
+        date_to: Optional[datetime],
+        tz_offset_minutes: int,
+        bucket: str,
+        buckets: int
+    ) -> Dict[str, Any]:
+        """Total and denied counts per bucket over the archived rows in range"""
+        import numpy as np
+
+        started = time.perf_counter()
+        date_from = _naive_utc(date_from) if date_from else None
+        date_to = _naive_utc(date_to) if date_to else None
+        start_us = _to_micros(date_from) if date_from else None
+        end_us = _to_micros(date_to) if date_to else None
+        offset_us = tz_offset_minutes * 60_000_000
+
+        totals = np.zeros(buckets, dtype=np.int64)
+        denied = np.zeros(buckets, dtype=np.int64)
+        per_month: Dict[str, Tuple[int, int]] = {}
+        months = self._open_months(date_from, date_to)
+
+        for month in months:
+            low, high = month.slice(start_us, end_us)
+            if low == high:
+                continue
+
+            if bucket == "month":
+                per_month[month.month] = (high - low, int(month.denied_before[high] - month.denied_before[low]))
+                continue
+
+            # Rows are sorted by date, so every local hour is a contiguous run:
+            # binary search the hour edges instead of touching every row
+            first_hour = (int(month.date[low]) + offset_us) // MICROSECONDS_PER_HOUR
+            last_hour = (int(month.date[high - 1]) + offset_us) // MICROSECONDS_PER_HOUR
+            hours = np.arange(first_hour, last_hour + 1, dtype=np.int64)
+            edges = low + np.searchsorted(month.date[low:high], hours * MICROSECONDS_PER_HOUR - offset_us)
+            edges = np.append(edges, high)
+            hour_totals = np.diff(edges)
+            hour_denied = np.diff(month.denied_before[edges])
+
+            # 1970-01-01 was a Thursday, weekday 0 is Monday
+            weekdays = (hours // 24 + 3) % 7
+            if bucket == "weekday":
+                keys = weekdays
+            elif bucket == "hour":
+                keys = hours % 24
+            else:
+                keys = weekdays * 24 + hours % 24
+
+            np.add.at(totals, keys, hour_totals)
+            np.add.at(denied, keys, hour_denied)
+
+        return {
+            'totals': totals,
+            'denied': denied,
+            'per_month': per_month,
+            'coverage': {
+                'months': [month.month for month in months],
+                'archived_through': self.stats['archived_through'],
+            },
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    async def denial_rate(
+        self,
+        group_by: str,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        tz_offset_minutes: int = 0
+    ) -> Dict[str, Any]:
+        """Access and denial counts grouped by weekday, hour of day or month"""
+        buckets = {'weekday': 7, 'hour': 24, 'month': 0}[group_by]
+        scan = await asyncio.to_thread(self._scan, date_from, date_to, tz_offset_minutes, group_by, buckets)
+
+        if group_by == "month":
+            counts = [(label, total, denied) for label, (total, denied) in sorted(scan['per_month'].items())]
+        else:
+            labels = WEEKDAYS if group_by == "weekday" else range(24)
+            counts = [
+                (label, int(total), int(denied))
+                for label, total, denied in zip(labels, scan['totals'], scan['denied'])
+            ]
+
+        total = sum(item[1] for item in counts)
+        denied = sum(item[2] for item in counts)
+        return {
+            'group_by': group_by,
+            'total': total,
+            'denied': denied,
+            'denial_rate': denied / total if total else None,
+            'buckets': [
+                {'key': label, 'total': total, 'denied': denied, 'denial_rate': denied / total if total else None}
+                for label, total, denied in counts
+            ],
+            'coverage': scan['coverage'],
+            'elapsed_ms': scan['elapsed_ms'],
+        }
+
+    async def heatmap(
+        self,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        tz_offset_minutes: int = 0
+    ) -> Dict[str, Any]:
+        """Weekday by hour-of-day matrices of accesses and denials"""
+        scan = await asyncio.to_thread(self._scan, date_from, date_to, tz_offset_minutes, "heatmap", 7 * 24)
+        return {
+            'weekdays': list(WEEKDAYS),
+            'total': scan['totals'].reshape(7, 24).tolist(),
+            'denied': scan['denied'].reshape(7, 24).tolist(),
+            'coverage': scan['coverage'],
+            'elapsed_ms': scan['elapsed_ms'],
+        }
+
+
+# Shared archive instance run from the application lifespan
+access_archive = AccessArchive()
@@ -0,0 +1,162 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from app.config.config import settings
+from app.models.access import Access
+from app.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+alerts_total = registry.counter(
+    "doorguardian_alerts_total",
+    "Denied-attempt bursts detected by rule",
+    ("rule",)
+)
+
+# Pushed to subscribers when the detector shuts down
+CLOSED = object()
+
+
+class BurstRule:
+    """N denied attempts within M seconds, tracked with a ring buffer of N slots.
+
+    The buffer holds the arrival times of the last N denials. When it is full,
+    the newest and the oldest entry are N denials apart, so the burst check is
+    one subtraction per event, however long the window is.
+    """
+
+    def __init__(self, threshold: int, window_seconds: float):
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self.name = f"{threshold}/{window_seconds:g}s"
+        self._denials: Deque[Tuple[float, str, datetime]] = deque(maxlen=threshold)
+
+    def observe(self, arrived_at: float, access_id: str, date: datetime) -> Optional[List[Tuple[float, str, datetime]]]:
+        """Record a denial, returns the burst when this one completes it"""
+        self._denials.append((arrived_at, access_id, date))
+        if len(self._denials) < self.threshold or arrived_at - self._denials[0][0] > self.window_seconds:
+            return None
+
+        burst = list(self._denials)
+        # The next alert needs N new denials, not one more on top of this burst
+        self._denials.clear()
+        return burst
+
+
+def parse_rule(rule: str) -> BurstRule:
+    """Build a rule from its ``<denied attempts>/<seconds>`` setting"""
+    threshold, window_seconds = rule.split("/")
+    return BurstRule(int(threshold), float(window_seconds))
+
+
+class BurstDetector:
+    """Streaming detector for bursts of denied access attempts.
+
+    ``AccessService.create_access`` feeds every created record to ``observe``,
+    which updates one ring buffer per rule in O(1) on the request path, with
+    no database query. Alerts are kept in a bounded list for ``GET /alerts``
+    and pushed to every subscriber queue (the SSE stream).
+
+    Windows use the arrival time of the events, so backfilled records with old
+    dates cannot raise alerts. There is no door id in the schema, so the
+    windows cover every door of the deployment, and the state lives in the
+    worker's memory.
+    """
+
+    def __init__(self):
+        self.rules: Optional[List[BurstRule]] = None
+        self._alerts: Deque[Dict[str, Any]] = deque()
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._sequence = itertools.count(1)
+        self.stats: Dict[str, Any] = {
+            'observed': 0,
+            'denied': 0,
+            'alerts': 0,
+            'subscribers': 0,
+            'dropped': 0,
+            'last_alert_at': None,
+        }
+
+    def configure(self) -> None:
+        self.rules = [parse_rule(rule) for rule in settings.ALERT_RULES]
+        self._alerts = deque(self._alerts, maxlen=settings.ALERT_HISTORY_SIZE)
+
+    def observe(self, record: Access) -> None:
+        """Feed a created access record to every rule"""
+        if not settings.ALERTS_ENABLED:
+            return
+        if self.rules is None:
+            self.configure()
+
+        self.stats['observed'] += 1
+        if record.access:
+            return
+
+        self.stats['denied'] += 1
+        arrived_at = time.monotonic()
+        for rule in self.rules:
+            burst = rule.observe(arrived_at, record.id, record.date)
+            if burst:
+                self._raise(rule, burst)
+
+    def _raise(self, rule: BurstRule, burst: List[Tuple[float, str, datetime]]) -> None:
+        alert = {
+            'id': next(self._sequence),
+            'rule': rule.name,
+            'threshold': rule.threshold,
+            'window_seconds': rule.window_seconds,
+            'denied_attempts': len(burst),
+            'span_seconds': round(burst[-1][0] - burst[0][0], 3),
+            'first_attempt_at': burst[0][2].isoformat(),
+            'last_attempt_at': burst[-1][2].isoformat(),
+            'detected_at': datetime.now(timezone.utc).isoformat(),
+            'access_ids': [access_id for _, access_id, _ in burst],
+        }
+
+        self._alerts.append(alert)
+        self.stats['alerts'] += 1
+        self.stats['last_alert_at'] = alert['detected_at']
+        alerts_total.inc(rule=rule.name)
+        logger.warning(f"Denied-attempt burst: {alert['denied_attempts']} denials in {alert['span_seconds']}s (rule {rule.name})")
+
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(alert)
+            except asyncio.QueueFull:
+                # A slow subscriber misses alerts instead of holding up the request
+                self.stats['dropped'] += 1
+
+    def recent(self, limit: int, after_id: int = 0) -> List[Dict[str, Any]]:
+        """Most recent alerts first, optionally only those newer than an alert id"""
+        alerts = [alert for alert in reversed(self._alerts) if alert['id'] > after_id]
+        return alerts[:limit]
+
+    def subscribe(self) -> asyncio.Queue:
+        """Queue receiving every new alert until ``unsubscribe``"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.ALERT_SUBSCRIBER_QUEUE)
+        self._subscribers.add(queue)
+        self.stats['subscribers'] = len(self._subscribers)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        self.stats['subscribers'] = len(self._subscribers)
+
+    def close(self) -> None:
+        """End every subscriber stream, e.g. on shutdown"""
+        for queue in self._subscribers:
+            while True:
+                try:
+                    queue.put_nowait(CLOSED)
+                    break
+                except asyncio.QueueFull:
+                    queue.get_nowait()
+
+
+# Shared detector fed by AccessService.create_access
+burst_detector = BurstDetector()
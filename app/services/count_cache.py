@@ -0,0 +1,111 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.config.config import settings
+from app.config.extensions import get_repository
+from app.utils.metrics import cache_requests_total
+
+logger = logging.getLogger(__name__)
+
+
+class AccessCountCache:
+    """Exact access counts kept in memory for history pagination.
+
+    Counts are kept per access filter (all, granted, denied), recomputed in the
+    background and adjusted in place when records are created or deleted, so
+    /history never has to count the table on the request path. Bulk removals
+    (retention batches, dropped partitions) invalidate the totals and refresh
+    them right away in the worker that ran them; other workers pick the change
+    up at their next periodic refresh. Date-filtered queries are not cached.
+    """
+
+    def __init__(self):
+        self._totals: Dict[Optional[bool], int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.stats: Dict[str, Any] = {
+            'running': False,
+            'hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'invalidations': 0,
+            'last_refresh_at': None,
+            'last_error': None,
+        }
+
+    def get(self, access_filter: Optional[bool]) -> Optional[int]:
+        """Return the cached total for an access filter, or None if not loaded yet"""
+        total = self._totals.get(access_filter)
+        if total is None:
+            self.stats['misses'] += 1
+            cache_requests_total.inc(cache="access_count", result="miss")
+        else:
+            self.stats['hits'] += 1
+            cache_requests_total.inc(cache="access_count", result="hit")
+        return total
+
+    def adjust(self, access: bool, delta: int) -> None:
+        """Apply a created (+1) or deleted (-1) record to the cached totals"""
+        for key in (None, access):
+            if key in self._totals:
+                self._totals[key] = max(0, self._totals[key] + delta)
+
+    def invalidate(self) -> None:
+        """Forget the totals after rows were removed in bulk, /history estimates until the next refresh"""
+        self._totals = {}
+        self.stats['invalidations'] += 1
+        if self._wakeup:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Start the periodic refresh loop on the running event loop"""
+        self._wakeup = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_forever())
+            self.stats['running'] = True
+
+    async def stop(self) -> None:
+        """Cancel the refresh loop and wait for it to finish"""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.stats['running'] = False
+
+    async def _refresh_forever(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats['last_error'] = str(e)
+                logger.error(f"Access count refresh failed: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.HISTORY_COUNT_REFRESH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def refresh(self) -> None:
+        """Recompute the exact totals"""
+        repository = get_repository()
+
+        granted = await repository.count_access(True)
+        denied = await repository.count_access(False)
+
+        self._totals = {None: granted + denied, True: granted, False: denied}
+        self.stats['refreshes'] += 1
+        self.stats['last_refresh_at'] = datetime.utcnow().isoformat()
+
+
+# Shared cache instance refreshed from the application lifespan
+access_count_cache = AccessCountCache()
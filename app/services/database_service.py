@@ -1,13 +1,19 @@
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from app.config.extensions import get_supabase_client, get_supabase_admin_client
-from app.models.access import Access, AccessCreate, AccessWithImage
-from app.models.image import Image, ImageCreate
+from app.config.extensions import get_repository
+from app.models.access import AccessCreate, AccessWithImage
+from app.models.image import ImageCreate
+from app.services.storage_gc import storage_gc
+from app.services.count_cache import access_count_cache
+from app.services.alerts import burst_detector
+from app.config.config import settings
+from app.utils.tracing import traced
 
 class AccessService:
-    """Service for handling access operations with Supabase"""
-    
+    """Service for handling access operations through the configured repository"""
+
     @staticmethod
+    @traced()
     async def get_access_history(
         page: int = 1,
         per_page: int = 20,
@@ -18,68 +24,41 @@ class AccessService:
         date_to: Optional[datetime] = None
     ) -> Dict[str, Any]:
         """Get paginated access history with filtering"""
-        
-        # Use service role client to bypass RLS
-        supabase = get_supabase_admin_client()
-        
+
         # Calculate offset for pagination
         offset = (page - 1) * per_page
-        
-        # Build base query following Supabase pattern
-        response = (
-            supabase.table("access")
-            .select("*, images(*)")
-            .execute()
-        )
-        
-        # Get total count for pagination (without filters first)
-        count_response = (
-            supabase.table("access")
-            .select("*", count="exact")
-            .execute()
+
+        # Pick how the pagination total is computed; the cached count only
+        # covers unfiltered dates, so date ranges fall back to an estimate
+        count_mode = settings.HISTORY_COUNT_MODE
+        cached_total = None
+        if count_mode == "cached":
+            if date_from or date_to:
+                count_mode = "estimated"
+            else:
+                cached_total = access_count_cache.get(access_filter)
+                if cached_total is None:
+                    count_mode = "estimated"
+
+        # Filters, sorting and pagination run in the database
+        access_records, total = await get_repository().get_access_history(
+            offset=offset,
+            limit=per_page,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            access_filter=access_filter,
+            date_from=date_from,
+            date_to=date_to,
+            count_mode=None if count_mode == "cached" else count_mode
         )
-        
-        total = count_response.count if count_response.count else 0
-        
-        # Apply filters manually for now (can be optimized with Supabase queries)
-        filtered_data = response.data
-        
-        if access_filter is not None:
-            filtered_data = [r for r in filtered_data if r.get('access') == access_filter]
-            
-        if date_from:
-            date_from_str = date_from.isoformat()
-            filtered_data = [r for r in filtered_data if r.get('date', '') >= date_from_str]
-            
-        if date_to:
-            date_to_str = date_to.isoformat()
-            filtered_data = [r for r in filtered_data if r.get('date', '') <= date_to_str]
-        
-        # Apply sorting
-        reverse_sort = sort_order == "desc"
-        filtered_data.sort(key=lambda x: x.get(sort_by, ''), reverse=reverse_sort)
-        
-        # Apply pagination
-        paginated_data = filtered_data[offset:offset + per_page]
-        
-        # Transform data
-        access_records = []
-        for record in paginated_data:
-            try:
-                access_data = AccessWithImage(**record)
-                if record.get('images'):
-                    access_data.image = Image(**record['images'])
-                access_records.append(access_data)
-            except Exception as e:
-                # Skip invalid records
-                continue
-        
+
+        filtered_total = cached_total if count_mode == "cached" else total
+
         # Calculate pagination info
-        filtered_total = len(filtered_data)
         total_pages = (filtered_total + per_page - 1) // per_page if filtered_total > 0 else 1
         has_next = page < total_pages
         has_prev = page > 1
-        
+
         return {
             'access_records': access_records,
             'pagination': {
@@ -90,163 +69,41 @@ class AccessService:
                 'has_next': has_next,
                 'has_prev': has_prev,
                 'next_num': page + 1 if has_next else None,
-                'prev_num': page - 1 if has_prev else None
+                'prev_num': page - 1 if has_prev else None,
+                'count_mode': count_mode
             }
         }
-    
+
     @staticmethod
-    async def create_access(access_data: AccessCreate) -> AccessWithImage:
-        """Create a new access record"""
-        
-        # Use service role client to bypass RLS
-        supabase = get_supabase_admin_client()
-        
-        # Insert access record following Supabase pattern
-        # The trigger will automatically populate image_url if image_id is provided
-        insert_response = (
-            supabase.table("access")
-            .insert({
-                "access": access_data.access,
-                "date": access_data.date.isoformat(),
-                "image_id": access_data.image_id,
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat()
-            })
-            .execute()
-        )
-        
-        if not insert_response.data:
-            raise Exception("Failed to create access record")
-        
-        created_record = insert_response.data[0]
-        
-        # Now fetch the complete record with image data and image_url populated by trigger
-        response = (
-            supabase.table("access")
-            .select("*, images(*)")
-            .eq("id", created_record["id"])
-            .execute()
-        )
-        
-        if not response.data:
-            raise Exception("Failed to fetch created access record")
-        
-        access_record = response.data[0]
-        
-        # Extract image data if present
-        image_data = None
-        if access_record.get('images'):
-            image_data = Image(**access_record['images'])
-            # Remove the nested images data to avoid conflicts
-            access_record.pop('images', None)
-        
-        # Create AccessWithImage instance
-        result = AccessWithImage(**access_record)
-        if image_data:
-            result.image = image_data
-            
+    @traced()
+    async def create_access(
+        access_data: AccessCreate,
+        images_data: Optional[List[ImageCreate]] = None
+    ) -> AccessWithImage:
+        """Create a new access record, with its image records (in order) when given"""
+
+        # The Postgres backend runs the image, access and link inserts in one transaction
+        result = await get_repository().create_access(access_data, images_data)
+
+        access_count_cache.adjust(result.access, +1)
+        # Burst detection runs in memory, within the request
+        burst_detector.observe(result)
+
         return result
-    
+
     @staticmethod
+    @traced()
     async def delete_access(access_id: str) -> bool:
-        """Delete an access record and its associated image"""
-        
-        # Get Supabase client
-        supabase = get_supabase_client()
-        
-        # First, get the access record to check for associated image
-        access_response = (
-            supabase.table("access")
-            .select("*, images(*)")
-            .eq("id", access_id)
-            .execute()
-        )
-        
-        if not access_response.data:
+        """Delete an access record and its associated images"""
+
+        deleted_record = await get_repository().delete_access(access_id)
+        if deleted_record is None:
             return False
-        
-        access_record = access_response.data[0]
-        
-        # Delete associated image from storage and database if exists
-        if access_record.get('images'):
-            image = access_record['images']
-            
-            # Delete from Supabase storage
-            try:
-                supabase.storage.from_("images").remove([image['file_path']])
-            except:
-                pass  # Continue even if storage deletion fails
-            
-            # Delete image record
-            (
-                supabase.table("images")
-                .delete()
-                .eq("id", image['id'])
-                .execute()
-            )
-        
-        # Delete access record
-        delete_response = (
-            supabase.table("access")
-            .delete()
-            .eq("id", access_id)
-            .execute()
-        )
-        
-        return len(delete_response.data) > 0
 
+        # Storage removal happens in the background collector
+        if deleted_record.images:
+            storage_gc.enqueue([image.file_path for image in deleted_record.images])
 
-class ImageService:
-    """Service for handling image operations with Supabase"""
-    
-    @staticmethod
-    async def create_image(image_data: ImageCreate) -> Image:
-        """Create a new image record"""
-        
-        # Get Supabase client
-        supabase = get_supabase_client()
-        
-        response = (
-            supabase.table("images")
-            .insert({
-                "filename": image_data.filename,
-                "original_filename": image_data.original_filename,
-                "file_path": image_data.file_path,
-                "file_size": image_data.file_size,
-                "mime_type": image_data.mime_type,
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat()
-            })
-            .execute()
-        )
-        
-        if not response.data:
-            raise Exception("Failed to create image record")
-        
-        return Image(**response.data[0])
-    
-    @staticmethod
-    async def upload_image_to_storage(file_content: bytes, file_path: str) -> str:
-        """Upload image to Supabase storage"""
-        
-        # Get Supabase client
-        supabase = get_supabase_client()
-        
-        response = supabase.storage.from_("images").upload(
-            file_path, file_content
-        )
-        
-        if response.get('error'):
-            raise Exception(f"Failed to upload image: {response['error']}")
-        
-        return file_path
-    
-    @staticmethod
-    async def get_image_url(file_path: str) -> str:
-        """Get public URL for image"""
-        
-        # Get Supabase client
-        supabase = get_supabase_client()
-        
-        response = supabase.storage.from_("images").get_public_url(file_path)
-        return response.get('publicURL', '')
\ No newline at end of file
+        access_count_cache.adjust(deleted_record.access, -1)
+
+        return True
@@ -0,0 +1,146 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from app.config.config import settings
+from app.utils.metrics import cache_requests_total
+
+# Result of an attempt that failed, waiters retry it themselves
+_FAILED = object()
+
+
+class IdempotencyConflict(Exception):
+    """Raised when a key is reused with a different request"""
+
+
+class IdempotencyStoreFull(Exception):
+    """Raised when every stored key belongs to a request that is still running"""
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "future", "expires_at")
+
+    def __init__(self, fingerprint: Hashable, future: asyncio.Future):
+        self.fingerprint = fingerprint
+        self.future = future
+        self.expires_at: Optional[float] = None
+
+
+class IdempotencyStore:
+    """Results of /register kept by Idempotency-Key, bounded in size and age.
+
+    The first request with a key runs the operation; a retry with the same key
+    gets the stored result without uploading or inserting anything, and a
+    duplicate arriving while the first one is still running waits for it.
+    Only successful results are stored, so a failed attempt can be retried.
+    Keys of requests still running are never evicted; when the store is full
+    of them a new key is refused. The store lives in the worker's memory.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.stats: Dict[str, Any] = {
+            'keys': 0,
+            'executed': 0,
+            'replayed': 0,
+            'joined': 0,
+            'conflicts': 0,
+            'evicted': 0,
+        }
+
+    async def run(
+        self,
+        key: str,
+        fingerprint: Hashable,
+        operation: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """Run the operation once per key.
+
+        Returns the result and whether it was replayed from an earlier request.
+        """
+        while True:
+            self._purge_expired()
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at is not None and entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                return await self._execute(key, fingerprint, operation), False
+
+            if entry.fingerprint != fingerprint:
+                self.stats['conflicts'] += 1
+                raise IdempotencyConflict(f"Idempotency-Key {key} was already used with a different request")
+
+            joined = not entry.future.done()
+            # Shielded so a cancelled duplicate does not cancel the first request
+            result = await asyncio.shield(entry.future)
+            if result is _FAILED:
+                # The first attempt failed and released the key, try again
+                continue
+
+            self.stats['joined' if joined else 'replayed'] += 1
+            cache_requests_total.inc(cache="idempotency", result="hit")
+            return result, True
+
+    async def _execute(self, key: str, fingerprint: Hashable, operation: Callable[[], Awaitable[Any]]) -> Any:
+        if not self._make_room():
+            raise IdempotencyStoreFull("Too many requests with an Idempotency-Key in progress")
+
+        cache_requests_total.inc(cache="idempotency", result="miss")
+        entry = _Entry(fingerprint, asyncio.get_running_loop().create_future())
+        self._entries[key] = entry
+        self.stats['keys'] = len(self._entries)
+
+        try:
+            result = await operation()
+        except BaseException:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+            entry.future.set_result(_FAILED)
+            self.stats['keys'] = len(self._entries)
+            raise
+
+        entry.expires_at = time.monotonic() + settings.IDEMPOTENCY_TTL_SECONDS
+        entry.future.set_result(result)
+        self.stats['executed'] += 1
+        return result
+
+    def _purge_expired(self) -> None:
+        # Entries are kept in insertion order and share one TTL, so the
+        # expired ones are at the front; an in-flight entry stops the scan
+        now = time.monotonic()
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if entry.expires_at is None or entry.expires_at > now:
+                break
+            self._entries.popitem(last=False)
+        self.stats['keys'] = len(self._entries)
+
+    def _make_room(self) -> bool:
+        """Evict the oldest completed entries until one more key fits.
+
+        In-flight entries are skipped, evicting one would let a retry run the
+        operation a second time. Returns False when only in-flight entries are left.
+        """
+        excess = len(self._entries) - settings.IDEMPOTENCY_MAX_KEYS + 1
+        if excess <= 0:
+            return True
+
+        evictable = []
+        for key, entry in self._entries.items():
+            if entry.expires_at is not None:
+                evictable.append(key)
+                if len(evictable) == excess:
+                    break
+
+        for key in evictable:
+            del self._entries[key]
+        self.stats['evicted'] += len(evictable)
+        self.stats['keys'] = len(self._entries)
+        return len(evictable) == excess
+
+
+# Shared store used by the register endpoint
+idempotency_store = IdempotencyStore()
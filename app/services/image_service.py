@@ -1,81 +1,106 @@
-from typing import List, Optional
-from app.config.extensions import get_supabase_client, get_supabase_admin_client
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+from app.config.config import settings
+from app.config.extensions import get_supabase_client, get_supabase_admin_client, get_repository
 from app.models.image import ImageCreate, Image
+from app.services.storage_gc import storage_gc
+from app.utils.metrics import storage_operation_duration_seconds, storage_uploaded_bytes_total
+from app.utils.dataloader import DataLoader, request_loader
+from app.utils.tracing import traced
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Keeps the in_() filter of one batch well under URL length limits
+IMAGE_LOOKUP_BATCH_SIZE = 100
+
+async def _load_images(image_ids: List[str]) -> Dict[str, Image]:
+    return await get_repository().get_images(image_ids)
+
+def _image_loader() -> DataLoader:
+    """Image loader of the current request, created on first use"""
+    return request_loader("images", lambda: DataLoader(_load_images, IMAGE_LOOKUP_BATCH_SIZE))
+
+_upload_executor: Optional[ThreadPoolExecutor] = None
+
+def _get_upload_executor() -> ThreadPoolExecutor:
+    """Threads for the blocking storage uploads.
+
+    Kept apart from asyncio's default executor (CPU count + 4 threads), which
+    the database calls and image validation share, so a burst of uploads does
+    not queue behind them or starve them.
+    """
+    global _upload_executor
+    if _upload_executor is None:
+        _upload_executor = ThreadPoolExecutor(
+            max_workers=settings.UPLOAD_THREADS,
+            thread_name_prefix="storage-upload"
+        )
+    return _upload_executor
+
 class ImageService:
     """Service for managing image operations with Supabase"""
     
     @staticmethod
+    @traced()
     async def create_image(image_data: ImageCreate) -> Image:
         """Create a new image record in the database"""
         try:
-            # Use service role client to bypass RLS
-            supabase = get_supabase_admin_client()
-            
-            # Convert Pydantic model to dict
-            image_dict = image_data.model_dump()
-            
-            # Insert into database
-            result = supabase.table("images").insert(image_dict).execute()
-            
-            if not result.data:
-                raise Exception("Failed to create image record")
-            
-            return Image(**result.data[0])
+            return await get_repository().create_image(image_data)
             
         except Exception as e:
             logger.error(f"Error creating image: {e}")
             raise Exception(f"Failed to create image: {e}")
     
     @staticmethod
+    @traced()
     async def get_image_by_id(image_id: str) -> Optional[Image]:
-        """Get an image by its ID"""
+        """Get an image by its ID (lookups in the same tick share one query)"""
         try:
-            # Use service role client to bypass RLS
-            supabase = get_supabase_admin_client()
-            
-            result = supabase.table("images").select("*").eq("id", image_id).execute()
-            
-            if result.data:
-                return Image(**result.data[0])
-            
-            return None
+            return await _image_loader().load(image_id)
             
         except Exception as e:
             logger.error(f"Error fetching image: {e}")
             raise Exception(f"Failed to fetch image: {e}")
     
     @staticmethod
+    @traced()
+    async def get_images_by_ids(image_ids: List[str]) -> List[Optional[Image]]:
+        """Get images by ID in order, with one query per batch of IDs"""
+        try:
+            return await _image_loader().load_many(image_ids)
+            
+        except Exception as e:
+            logger.error(f"Error fetching images: {e}")
+            raise Exception(f"Failed to fetch images: {e}")
+    
+    @staticmethod
+    @traced()
     async def delete_image(image_id: str) -> bool:
         """Delete an image record and its file from storage"""
         try:
-            # Use service role client to bypass RLS
-            supabase = get_supabase_admin_client()
-            
             # First get the image to know the file path
             image = await ImageService.get_image_by_id(image_id)
             if not image:
                 return False
             
-            # Delete from storage
-            try:
-                await ImageService.delete_image_from_storage(image.file_path)
-            except Exception as e:
-                logger.warning(f"Could not delete file from storage: {e}")
-            
             # Delete from database
-            result = supabase.table("images").delete().eq("id", image_id).execute()
+            deleted = await get_repository().delete_image(image_id)
+            _image_loader().clear(image_id)
+            
+            # Storage removal happens in the background collector
+            storage_gc.enqueue([image.file_path])
             
-            return len(result.data) > 0
+            return deleted
             
         except Exception as e:
             logger.error(f"Error deleting image: {e}")
             raise Exception(f"Failed to delete image: {e}")
     
     @staticmethod
+    @traced()
     async def upload_image_to_storage(file_content: bytes, file_path: str, mime_type: str = None) -> str:
         """Upload image to Supabase Storage"""
         try:
@@ -87,12 +112,19 @@ class ImageService:
             if mime_type:
                 file_options["content-type"] = mime_type
             
-            # Upload to the 'images' bucket
-            result = supabase.storage.from_("images").upload(
-                path=file_path,
-                file=file_content,
-                file_options=file_options
-            )
+            # Upload to the 'images' bucket; the client blocks, so it runs in an
+            # upload thread and concurrent uploads overlap
+            with storage_operation_duration_seconds.time(operation="upload"):
+                result = await asyncio.get_running_loop().run_in_executor(
+                    _get_upload_executor(),
+                    partial(
+                        supabase.storage.from_("images").upload,
+                        path=file_path,
+                        file=file_content,
+                        file_options=file_options
+                    )
+                )
+            storage_uploaded_bytes_total.inc(len(file_content))
             
             if hasattr(result, 'error') and result.error:
                 raise Exception(f"Storage upload error: {result.error}")
@@ -108,12 +140,41 @@ class ImageService:
             raise Exception(f"Storage upload failed: {e}")
     
     @staticmethod
+    @traced()
+    async def upload_images_to_storage(uploads: List[Tuple[bytes, str, Optional[str]]]) -> List[str]:
+        """Upload (content, path, MIME type) tuples concurrently, returns their public URLs.
+
+        At most UPLOAD_CONCURRENCY uploads are in flight, so a batch takes about
+        as long as its slowest upload. If any upload fails, the ones that
+        succeeded are handed to the storage collector and the error is raised.
+        """
+        semaphore = asyncio.Semaphore(settings.UPLOAD_CONCURRENCY)
+        
+        async def upload(file_content: bytes, file_path: str, mime_type: Optional[str]) -> str:
+            async with semaphore:
+                return await ImageService.upload_image_to_storage(file_content, file_path, mime_type)
+        
+        results = await asyncio.gather(*(upload(*item) for item in uploads), return_exceptions=True)
+        
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            storage_gc.enqueue([
+                file_path for (_, file_path, _), result in zip(uploads, results)
+                if not isinstance(result, BaseException)
+            ])
+            raise errors[0]
+        
+        return results
+    
+    @staticmethod
+    @traced()
     async def delete_image_from_storage(file_path: str) -> bool:
         """Delete image from Supabase Storage"""
         try:
             supabase = get_supabase_admin_client()
             
-            result = supabase.storage.from_("images").remove([file_path])
+            with storage_operation_duration_seconds.time(operation="remove"):
+                result = supabase.storage.from_("images").remove([file_path])
             
             if hasattr(result, 'error') and result.error:
                 logger.error(f"Storage delete error: {result.error}")
@@ -127,6 +188,7 @@ class ImageService:
             return False
     
     @staticmethod
+    @traced()
     async def get_image_url(file_path: str) -> str:
         """Get public URL for an image"""
         try:
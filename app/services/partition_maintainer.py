@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.config.config import settings
+from app.config.extensions import get_repository
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionMaintainer:
+    """Background job that keeps monthly access partitions created ahead of time.
+
+    Runs at startup and then every ACCESS_PARTITIONS_INTERVAL_SECONDS, whatever
+    the retention settings are, so inserts keep landing in their own month
+    instead of access_default. A month whose rows already reached the default
+    partition has them moved over by ``create_access_partition`` (migration 004);
+    a month that still cannot be created is skipped by the database function.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.stats: Dict[str, Any] = {
+            'running': False,
+            'runs': 0,
+            'months_ready': None,
+            'errors': 0,
+            'last_error': None,
+            'last_run_at': None,
+        }
+
+    def start(self) -> None:
+        """Start the periodic maintenance loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_forever())
+            self.stats['running'] = True
+
+    async def stop(self) -> None:
+        """Cancel the maintenance loop and wait for it to finish"""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.stats['running'] = False
+
+    async def _run_forever(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats['errors'] += 1
+                self.stats['last_error'] = str(e)
+                logger.error(f"Access partition maintenance failed: {e}")
+
+            await asyncio.sleep(settings.ACCESS_PARTITIONS_INTERVAL_SECONDS)
+
+    async def run_once(self) -> int:
+        """Create the partitions of the current and next months, returns how many are ready"""
+        expected = settings.ACCESS_PARTITIONS_AHEAD + 1
+        ready = await get_repository().ensure_access_partitions(settings.ACCESS_PARTITIONS_AHEAD)
+
+        self.stats['runs'] += 1
+        self.stats['months_ready'] = ready
+        self.stats['last_run_at'] = datetime.utcnow().isoformat()
+        if ready < expected:
+            logger.warning(
+                f"Only {ready} of {expected} access partitions are ready, "
+                f"see the database log for the months that were skipped"
+            )
+        return ready
+
+
+# Shared maintainer instance started from the application lifespan
+partition_maintainer = PartitionMaintainer()
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from io import BytesIO
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config.config import settings
+from app.config.extensions import get_repository, get_supabase_admin_client
+from app.services.storage_gc import STORAGE_FOLDER
+from app.utils.metrics import storage_operation_duration_seconds
+
+logger = logging.getLogger(__name__)
+
+
+class ReadinessProbe:
+    """Startup warm-up and a cached readiness result for load balancers.
+
+    ``warm_up`` pays the first-request costs (lazy imports, client and pool
+    creation, TLS handshakes, the OpenAPI schema and model serializers) before
+    the worker takes traffic. Dependency probes run in the background every
+    ``READINESS_REFRESH_SECONDS``; ``/api/v1/ready`` only reads the cached
+    result, so probing never adds load to the database.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._last_probe: Optional[float] = None
+        self._shutting_down = False
+        self.stats: Dict[str, Any] = {
+            'running': False,
+            'warmed_up': False,
+            'warm_up_ms': {},
+            'checks': {},
+            'probes': 0,
+            'failures': 0,
+            'last_checked_at': None,
+        }
+
+    @property
+    def ready(self) -> bool:
+        """Warm, every dependency check passed and the last probe is recent"""
+        if self._shutting_down or self._last_probe is None:
+            return False
+        if settings.WARMUP_ENABLED and not self.stats['warmed_up']:
+            return False
+
+        # A stuck probe loop must not keep reporting an old success
+        max_age = 3 * settings.READINESS_REFRESH_SECONDS + settings.READINESS_TIMEOUT_SECONDS
+        if time.monotonic() - self._last_probe > max_age:
+            return False
+
+        return all(check['ok'] for check in self.stats['checks'].values())
+
+    async def warm_up(self, app) -> None:
+        """Run the first-request paths once, then probe the dependencies"""
+        steps = {
+            'imports': self._warm_imports,
+            'clients': self._warm_clients,
+            'openapi': lambda: self._warm_openapi(app),
+            'models': self._warm_models,
+        }
+        for name, step in steps.items():
+            started = time.perf_counter()
+            try:
+                result = step()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Warm-up step {name} failed: {e}")
+            self.stats['warm_up_ms'][name] = round((time.perf_counter() - started) * 1000, 1)
+
+        # Backend round trips open the connections the first requests will reuse
+        started = time.perf_counter()
+        await self.probe()
+        self.stats['warm_up_ms']['probe'] = round((time.perf_counter() - started) * 1000, 1)
+        self.stats['warmed_up'] = True
+
+    @staticmethod
+    def _warm_imports() -> None:
+        # Pillow and its JPEG/PNG plugins load on the first upload otherwise
+        from PIL import Image
+
+        from app.utils.file_utils import validate_image_content
+
+        for image_format in ("JPEG", "PNG"):
+            buffer = BytesIO()
+            Image.new("RGB", (8, 8)).save(buffer, format=image_format)
+            validate_image_content(buffer.getvalue())
+
+    @staticmethod
+    def _warm_clients() -> None:
+        get_repository()
+        # Building a query and a bucket creates the lazy postgrest and storage clients
+        client = get_supabase_admin_client()
+        client.table("access")
+        client.storage.from_("images")
+
+    @staticmethod
+    def _warm_openapi(app) -> None:
+        # Cached on the app after the first build
+        app.openapi()
+
+    @staticmethod
+    def _warm_models() -> None:
+        from app.models.access import AccessListResponse, AccessWithImage
+
+        now = datetime.utcnow()
+        record = AccessWithImage(
+            id="00000000-0000-0000-0000-000000000000",
+            access=True,
+            date=now,
+            created_at=now,
+            updated_at=now
+        )
+        AccessListResponse(
+            access_records=[record],
+            pagination={'page': 1, 'per_page': 20, 'total': 1, 'pages': 1}
+        ).model_dump_json()
+
+    async def probe(self) -> bool:
+        """Check every dependency once and cache the result"""
+        checks: Dict[str, Callable[[], Awaitable[Any]]] = {'database': get_repository().ping}
+        if settings.READINESS_CHECK_STORAGE:
+            checks['storage'] = self._ping_storage
+
+        results = await asyncio.gather(*(self._check(check) for check in checks.values()))
+        self.stats['checks'] = dict(zip(checks, results))
+        self.stats['probes'] += 1
+        self.stats['last_checked_at'] = datetime.utcnow().isoformat()
+        self._last_probe = time.monotonic()
+
+        healthy = all(result['ok'] for result in results)
+        if not healthy:
+            self.stats['failures'] += 1
+        return healthy
+
+    @staticmethod
+    async def _check(check: Callable[[], Awaitable[Any]]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(check(), timeout=settings.READINESS_TIMEOUT_SECONDS)
+            error = None
+        except asyncio.TimeoutError:
+            error = f"timed out after {settings.READINESS_TIMEOUT_SECONDS:g}s"
+        except Exception as e:
+            error = str(e)
+
+        return {
+            'ok': error is None,
+            'latency_ms': round((time.perf_counter() - started) * 1000, 1),
+            'error': error,
+        }
+
+    @staticmethod
+    async def _ping_storage() -> None:
+        bucket = get_supabase_admin_client().storage.from_("images")
+        with storage_operation_duration_seconds.time(operation="list"):
+            await asyncio.to_thread(bucket.list, STORAGE_FOLDER, {"limit": 1})
+
+    def start(self) -> None:
+        """Start the background probe loop on the running event loop"""
+        self._shutting_down = False
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._probe_forever())
+            self.stats['running'] = True
+
+    async def stop(self) -> None:
+        """Report not ready from now on and stop probing"""
+        self._shutting_down = True
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.stats['running'] = False
+
+    async def _probe_forever(self) -> None:
+        while True:
+            # The warm-up has just probed, no need to repeat it right away
+            fresh = self._last_probe is not None and time.monotonic() - self._last_probe < settings.READINESS_REFRESH_SECONDS
+            try:
+                if not fresh and not await self.probe():
+                    logger.warning(f"Readiness probe failed: {self.stats['checks']}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Readiness probe crashed: {e}")
+
+            await asyncio.sleep(settings.READINESS_REFRESH_SECONDS)
+
+
+# Shared probe warmed and refreshed from the application lifespan
+readiness_probe = ReadinessProbe()
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from app.config.config import settings
+from app.config.extensions import get_repository, get_supabase_admin_client
+from app.services.access_archive import access_archive
+from app.services.count_cache import access_count_cache
+from app.utils.metrics import storage_operation_duration_seconds
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionPurger:
+    """Background job that deletes expired access images and records in bounded batches"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.stats: Dict[str, Any] = {
+            'running': False,
+            'dry_run': None,
+            'runs': 0,
+            'batches': 0,
+            'images_deleted': 0,
+            'access_detached': 0,
+            'storage_objects_deleted': 0,
+            'access_deleted': 0,
+            'partitions_dropped': 0,
+            'images_pending': None,
+            'access_pending': None,
+            'errors': 0,
+            'last_error': None,
+            'last_run_started_at': None,
+            'last_run_finished_at': None,
+            'last_run_duration_seconds': None,
+        }
+
+    def start(self) -> None:
+        """Start the periodic purge loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_forever())
+            self.stats['running'] = True
+            self.stats['dry_run'] = settings.RETENTION_DRY_RUN
+
+    async def stop(self) -> None:
+        """Cancel the purge loop and wait for it to finish"""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.stats['running'] = False
+
+    async def _run_forever(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats['errors'] += 1
+                self.stats['last_error'] = str(e)
+                logger.error(f"Retention run failed: {e}")
+
+            await asyncio.sleep(settings.RETENTION_INTERVAL_SECONDS)
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Run a single purge pass over images and access records"""
+        started = datetime.utcnow()
+        self.stats['last_run_started_at'] = started.isoformat()
+        self.stats['dry_run'] = settings.RETENTION_DRY_RUN
+
+        now = datetime.utcnow()
+        image_cutoff = now - timedelta(days=settings.RETENTION_IMAGE_DAYS)
+        access_cutoff = now - timedelta(days=settings.RETENTION_ACCESS_DAYS)
+        if settings.ARCHIVE_ENABLED:
+            # Keep access records until their month is in the analytics archive with every row
+            access_cutoff = await access_archive.verified_through(access_cutoff)
+
+        if settings.RETENTION_DRY_RUN:
+            self.stats['images_pending'] = await self._count_expired("images", "created_at", image_cutoff)
+            self.stats['access_pending'] = await self._count_expired("access", "date", access_cutoff)
+            logger.info(
+                f"Retention dry run: {self.stats['images_pending']} images and "
+                f"{self.stats['access_pending']} access records would be deleted"
+            )
+        else:
+            removed_before = (self.stats['access_deleted'], self.stats['partitions_dropped'])
+            try:
+                budget = settings.RETENTION_MAX_BATCHES_PER_RUN
+                budget -= await self._purge_images(image_cutoff, budget)
+                await self._purge_access(access_cutoff, budget)
+            finally:
+                # Removed rows are not split by access value, so the cached
+                # history totals are recomputed instead of adjusted
+                if (self.stats['access_deleted'], self.stats['partitions_dropped']) != removed_before:
+                    access_count_cache.invalidate()
+
+        finished = datetime.utcnow()
+        self.stats['runs'] += 1
+        self.stats['last_run_finished_at'] = finished.isoformat()
+        self.stats['last_run_duration_seconds'] = (finished - started).total_seconds()
+
+        return self.stats
+
+    async def _count_expired(self, table: str, column: str, cutoff: datetime) -> int:
+        return await get_repository().count_expired(table, column, cutoff)
+
+    async def _purge_images(self, cutoff: datetime, max_batches: int) -> int:
+        """Delete expired images from storage and database, returns batches used"""
+        repository = get_repository()
+        supabase = get_supabase_admin_client()
+        batches = 0
+
+        while batches < max_batches:
+            rows: List[Dict[str, Any]] = await repository.list_expired_images(
+                cutoff, settings.RETENTION_BATCH_SIZE
+            )
+            if not rows:
+                break
+
+            paths = [row['file_path'] for row in rows if row.get('file_path')]
+            ids = [row['id'] for row in rows]
+
+            # Access records kept longer than their images stop pointing at
+            # them before the objects go, so /history never returns a dead URL
+            self.stats['access_detached'] += await repository.detach_images(ids)
+
+            if paths:
+                with storage_operation_duration_seconds.time(operation="remove"):
+                    await asyncio.to_thread(supabase.storage.from_("images").remove, paths)
+                self.stats['storage_objects_deleted'] += len(paths)
+
+            self.stats['images_deleted'] += await repository.delete_images(ids)
+
+            batches += 1
+            self.stats['batches'] += 1
+
+            if len(rows) < settings.RETENTION_BATCH_SIZE:
+                break
+            await asyncio.sleep(settings.RETENTION_BATCH_DELAY_SECONDS)
+
+        return batches
+
+    async def _purge_access(self, cutoff: datetime, max_batches: int) -> int:
+        """Delete expired access records, returns batches used"""
+        repository = get_repository()
+        batches = 0
+
+        if settings.ACCESS_PARTITIONED:
+            # Whole months are dropped as partitions, the batched delete below
+            # only has to clean up the month that straddles the cutoff (and
+            # covers for the drop when it fails)
+            try:
+                await self._drop_partitions(cutoff)
+            except Exception as e:
+                self.stats['errors'] += 1
+                self.stats['last_error'] = str(e)
+                logger.error(f"Dropping access partitions failed, continuing with batched deletes: {e}")
+
+        while batches < max_batches:
+            ids = await repository.list_expired_access_ids(cutoff, settings.RETENTION_BATCH_SIZE)
+            if not ids:
+                break
+
+            self.stats['access_deleted'] += await repository.delete_access_batch(ids, cutoff)
+
+            batches += 1
+            self.stats['batches'] += 1
+
+            if len(ids) < settings.RETENTION_BATCH_SIZE:
+                break
+            await asyncio.sleep(settings.RETENTION_BATCH_DELAY_SECONDS)
+
+        return batches
+
+    async def _drop_partitions(self, cutoff: datetime) -> None:
+        """Drop monthly access partitions older than the cutoff.
+
+        Upcoming partitions are created by the partition maintainer, which runs
+        whether or not retention is enabled.
+        """
+        dropped = await get_repository().drop_access_partitions_before(cutoff)
+        self.stats['partitions_dropped'] += dropped
+        if dropped:
+            logger.info(f"Retention dropped {dropped} access partitions older than {cutoff.date()}")
+
+
+# Shared purger instance started from the application lifespan
+retention_purger = RetentionPurger()
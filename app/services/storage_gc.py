@@ -0,0 +1,235 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.config.config import settings
+from app.config.extensions import get_repository, get_supabase_admin_client
+from app.utils.metrics import storage_operation_duration_seconds
+
+logger = logging.getLogger(__name__)
+
+# Folder inside the "images" bucket where access images are uploaded
+STORAGE_FOLDER = "access_images"
+
+
+class StorageGarbageCollector:
+    """Background collector that removes storage objects off the request path.
+
+    Request handlers only enqueue paths. The collector drains the queue in
+    batches and periodically reconciles the bucket listing against
+    ``images.file_path`` to catch objects that were never enqueued, e.g. an
+    upload whose database insert failed.
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, int] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._drain_task: Optional[asyncio.Task] = None
+        self._reconcile_task: Optional[asyncio.Task] = None
+        self.stats: Dict[str, Any] = {
+            'running': False,
+            'pending': 0,
+            'enqueued': 0,
+            'dropped': 0,
+            'removed': 0,
+            'kept': 0,
+            'failed': 0,
+            'orphans_found': 0,
+            'reconcile_runs': 0,
+            'last_error': None,
+            'last_drain_at': None,
+            'last_reconcile_at': None,
+        }
+
+    def enqueue(self, paths: Iterable[str]) -> None:
+        """Schedule storage objects for removal without waiting for it"""
+        for path in paths:
+            if not path or path in self._pending:
+                continue
+            if len(self._pending) >= settings.STORAGE_GC_MAX_PENDING:
+                # The reconcile pass will find it again later
+                self.stats['dropped'] += 1
+                continue
+            self._pending[path] = 0
+            self.stats['enqueued'] += 1
+
+        self.stats['pending'] = len(self._pending)
+        if self._wakeup and len(self._pending) >= settings.STORAGE_GC_BATCH_SIZE:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Start the drain and reconcile loops on the running event loop"""
+        self._wakeup = asyncio.Event()
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = asyncio.create_task(self._drain_forever())
+        if settings.STORAGE_GC_RECONCILE_ENABLED and (
+            self._reconcile_task is None or self._reconcile_task.done()
+        ):
+            self._reconcile_task = asyncio.create_task(self._reconcile_forever())
+        self.stats['running'] = True
+
+    async def stop(self) -> None:
+        """Stop the background loops, flushing what is already queued"""
+        for task in (self._reconcile_task, self._drain_task):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._drain_task = None
+        self._reconcile_task = None
+        self.stats['running'] = False
+
+        if self._pending:
+            try:
+                await self.drain()
+            except Exception as e:
+                logger.warning(f"Could not flush storage removals on shutdown: {e}")
+
+    async def _drain_forever(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=settings.STORAGE_GC_FLUSH_INTERVAL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.drain()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats['last_error'] = str(e)
+                logger.error(f"Storage GC drain failed: {e}")
+
+    async def _reconcile_forever(self) -> None:
+        while True:
+            await asyncio.sleep(settings.STORAGE_GC_RECONCILE_INTERVAL_SECONDS)
+            try:
+                await self.reconcile()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats['last_error'] = str(e)
+                logger.error(f"Storage GC reconcile failed: {e}")
+
+    async def drain(self) -> int:
+        """Remove every queued object in batches, returns the number removed"""
+        supabase = get_supabase_admin_client()
+        removed = 0
+
+        while self._pending:
+            batch = list(self._pending)[:settings.STORAGE_GC_BATCH_SIZE]
+
+            try:
+                # Never remove an object an image record still points to, e.g.
+                # one enqueued by a request that failed after its insert committed
+                referenced = await get_repository().find_referenced_paths(batch)
+                if referenced:
+                    for path in referenced:
+                        self._pending.pop(path, None)
+                    self.stats['kept'] += len(referenced)
+                    self.stats['pending'] = len(self._pending)
+                    batch = [path for path in batch if path not in referenced]
+                if batch:
+                    with storage_operation_duration_seconds.time(operation="remove"):
+                        await asyncio.to_thread(supabase.storage.from_("images").remove, batch)
+            except Exception as e:
+                self.stats['last_error'] = str(e)
+                logger.warning(f"Storage removal of {len(batch)} objects failed: {e}")
+                self._retry_later(batch)
+                break
+
+            for path in batch:
+                self._pending.pop(path, None)
+            removed += len(batch)
+            self.stats['removed'] += len(batch)
+            self.stats['pending'] = len(self._pending)
+
+            if self._pending:
+                await asyncio.sleep(settings.STORAGE_GC_BATCH_DELAY_SECONDS)
+
+        self.stats['last_drain_at'] = datetime.utcnow().isoformat()
+        return removed
+
+    def _retry_later(self, batch: List[str]) -> None:
+        for path in batch:
+            attempts = self._pending.get(path, 0) + 1
+            if attempts >= settings.STORAGE_GC_MAX_ATTEMPTS:
+                self._pending.pop(path, None)
+                self.stats['failed'] += 1
+            else:
+                self._pending[path] = attempts
+        self.stats['pending'] = len(self._pending)
+
+    async def reconcile(self) -> int:
+        """Enqueue bucket objects that no image record points to, returns the count"""
+        supabase = get_supabase_admin_client()
+        bucket = supabase.storage.from_("images")
+        grace_cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.STORAGE_GC_GRACE_SECONDS)
+        page_size = settings.STORAGE_GC_BATCH_SIZE
+        orphans = 0
+        offset = 0
+
+        # The whole listing is collected before anything is enqueued: removing
+        # orphans while paging by offset would shift later objects to lower
+        # offsets, and the pass would skip them
+        candidates: List[str] = []
+        while True:
+            with storage_operation_duration_seconds.time(operation="list"):
+                objects = await asyncio.to_thread(
+                    bucket.list,
+                    STORAGE_FOLDER,
+                    {"limit": page_size, "offset": offset, "sortBy": {"column": "name", "order": "asc"}},
+                )
+            if not objects:
+                break
+
+            # Skip folder placeholders and objects that may belong to an in-flight upload
+            candidates.extend(
+                f"{STORAGE_FOLDER}/{obj['name']}"
+                for obj in objects
+                if obj.get('id') and _created_before(obj.get('created_at'), grace_cutoff)
+            )
+
+            if len(objects) < page_size:
+                break
+            offset += page_size
+            await asyncio.sleep(settings.STORAGE_GC_BATCH_DELAY_SECONDS)
+
+        for start in range(0, len(candidates), page_size):
+            batch = candidates[start:start + page_size]
+            referenced = await get_repository().find_referenced_paths(batch)
+            missing = [path for path in batch if path not in referenced]
+            if missing:
+                self.enqueue(missing)
+                orphans += len(missing)
+
+        self.stats['orphans_found'] += orphans
+        self.stats['reconcile_runs'] += 1
+        self.stats['last_reconcile_at'] = datetime.utcnow().isoformat()
+        if orphans:
+            logger.info(f"Storage GC found {orphans} orphaned objects")
+        return orphans
+
+
+def _created_before(created_at: Optional[str], cutoff: datetime) -> bool:
+    """Check an ISO timestamp from the storage listing against a cutoff"""
+    if not created_at:
+        return False
+    try:
+        created = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+    except ValueError:
+        return False
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    return created < cutoff
+
+
+# Shared collector instance started from the application lifespan
+storage_gc = StorageGarbageCollector()
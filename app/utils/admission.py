@@ -0,0 +1,244 @@
+"""
+Admission control and load shedding for the hot routes.
+
+Each limited route has its own concurrency limit and a bounded wait queue,
+and all of them share a global limit. A request waits at most its route's
+queue-time budget for both slots; when the queue is full or the budget runs
+out it gets an immediate ``503`` with ``Retry-After`` instead of piling up
+behind the requests already in flight. Door events (``POST /register``) are
+admitted before dashboard reads (``GET /history``) whenever both wait for a
+shared slot, and may take a queued read's place when the shared queue is full.
+
+Everything runs on the event loop of one worker, so no locks are needed.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config.config import settings
+from app.utils.metrics import ROUTE_LABEL_KEY, registry
+from app.utils.tracing import record_span
+
+# Lower values are admitted first
+PRIORITY_WRITE = 0
+PRIORITY_READ = 1
+
+admission_queue_wait_seconds = registry.histogram(
+    "doorguardian_admission_queue_wait_seconds",
+    "Time admitted requests waited for a concurrency slot",
+    ("route",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+admission_rejected_total = registry.counter(
+    "doorguardian_admission_rejected_total",
+    "Requests shed with 503 by route and reason (queue_full or timeout)",
+    ("route", "reason")
+)
+admission_queued = registry.gauge(
+    "doorguardian_admission_queued",
+    "Requests waiting for a concurrency slot",
+    ("limiter",)
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot get a slot within its budget"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class ConcurrencyLimiter:
+    """Concurrency limit with a bounded priority wait queue.
+
+    A released slot is handed directly to the best waiter (lowest priority
+    value, then arrival order), so a newcomer cannot overtake the queue.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters: List[List[Any]] = []
+        self._sequence = itertools.count()
+
+    async def acquire(self, priority: int, timeout: float) -> None:
+        """Take a slot, waiting at most ``timeout`` seconds"""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+
+        if len(self._waiters) >= self.max_queue and not self._evict_for(priority):
+            raise AdmissionRejected("queue_full")
+        if timeout <= 0:
+            raise AdmissionRejected("timeout")
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._sequence), future]
+        heapq.heappush(self._waiters, entry)
+        admission_queued.set(len(self._waiters), limiter=self.name)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            # The slot may have been handed over as the budget ran out
+            if self._handed_over(future):
+                return
+            self._discard(entry)
+            future.cancel()
+            raise AdmissionRejected("timeout")
+        except asyncio.CancelledError:
+            self._discard(entry)
+            if self._handed_over(future):
+                self.release()
+            future.cancel()
+            raise
+
+    def release(self) -> None:
+        """Free a slot, handing it to the best waiter if there is one"""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # The slot moves to the waiter, active stays the same
+                future.set_result(None)
+                admission_queued.set(len(self._waiters), limiter=self.name)
+                return
+        admission_queued.set(0, limiter=self.name)
+        self.active -= 1
+
+    @staticmethod
+    def _handed_over(future: asyncio.Future) -> bool:
+        return future.done() and not future.cancelled() and future.exception() is None
+
+    def _evict_for(self, priority: int) -> bool:
+        """Reject the worst queued request if it has a lower priority"""
+        worst = max(self._waiters, key=lambda entry: (entry[0], entry[1]))
+        if worst[0] <= priority:
+            return False
+        self._discard(worst)
+        worst[2].set_exception(AdmissionRejected("queue_full"))
+        return True
+
+    def _discard(self, entry: List[Any]) -> None:
+        try:
+            self._waiters.remove(entry)
+        except ValueError:
+            return
+        heapq.heapify(self._waiters)
+        admission_queued.set(len(self._waiters), limiter=self.name)
+
+
+class AdmissionController:
+    """Per-route limiters plus the shared limit, built from the settings on first use"""
+
+    def __init__(self):
+        self.routes: Optional[Dict[str, Tuple[ConcurrencyLimiter, int, float]]] = None
+        self.shared: Optional[ConcurrencyLimiter] = None
+
+    def configure(self) -> None:
+        self.shared = ConcurrencyLimiter("shared", settings.ADMISSION_MAX_CONCURRENCY, settings.ADMISSION_SHARED_QUEUE)
+        self.routes = {
+            'register': (
+                ConcurrencyLimiter("register", settings.ADMISSION_REGISTER_CONCURRENCY, settings.ADMISSION_REGISTER_QUEUE),
+                PRIORITY_WRITE,
+                settings.ADMISSION_REGISTER_QUEUE_TIMEOUT_MS / 1000
+            ),
+            'history': (
+                ConcurrencyLimiter("history", settings.ADMISSION_HISTORY_CONCURRENCY, settings.ADMISSION_HISTORY_QUEUE),
+                PRIORITY_READ,
+                settings.ADMISSION_HISTORY_QUEUE_TIMEOUT_MS / 1000
+            ),
+        }
+
+    async def acquire(self, route: str) -> None:
+        """Take the route slot and a shared slot within the route's queue budget"""
+        if self.routes is None:
+            self.configure()
+
+        limiter, priority, budget = self.routes[route]
+        started = time.perf_counter()
+        deadline = started + budget
+
+        try:
+            await limiter.acquire(priority, budget)
+            try:
+                await self.shared.acquire(priority, deadline - time.perf_counter())
+            except BaseException:
+                limiter.release()
+                raise
+        except AdmissionRejected as e:
+            admission_rejected_total.inc(route=route, reason=e.reason)
+            raise
+
+        waited = time.perf_counter() - started
+        admission_queue_wait_seconds.observe(waited, route=route)
+        record_span("admission.wait", waited, route=route)
+
+    def release(self, route: str) -> None:
+        self.shared.release()
+        self.routes[route][0].release()
+
+
+# Shared controller used by the admission middleware
+admission_controller = AdmissionController()
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying admission control to /register and /history.
+
+    Routes are matched on method and path before routing; everything else
+    (health, readiness, metrics, deletes) is never limited.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.register_path = f"{settings.API_V1_STR}/register"
+        self.history_path = f"{settings.API_V1_STR}/history"
+        self.retry_after = str(max(1, math.ceil(settings.ADMISSION_RETRY_AFTER_SECONDS))).encode("latin-1")
+
+    def _route(self, scope) -> Optional[str]:
+        method, path = scope["method"], scope["path"].rstrip("/")
+        if method == "POST" and path == self.register_path:
+            return 'register'
+        if method == "GET" and (path == self.history_path or path.startswith(self.history_path + "/")):
+            return 'history'
+        return None
+
+    async def __call__(self, scope, receive, send):
+        route = self._route(scope) if scope["type"] == "http" else None
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await admission_controller.acquire(route)
+        except AdmissionRejected as e:
+            # Shed requests never reach the router, label them with the limited
+            # path so the 503s show up under their route instead of "unmatched"
+            scope[ROUTE_LABEL_KEY] = self.register_path if route == 'register' else self.history_path
+            await self._reject(send, e.reason)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_controller.release(route)
+
+    async def _reject(self, send, reason: str) -> None:
+        body = json.dumps({"error": "Server overloaded, retry later", "reason": reason}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", self.retry_after),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,136 @@
+"""
+Request-scoped batching loaders.
+
+A ``DataLoader`` collects every ``load()`` made during one event-loop tick
+and resolves them with a single call to its batch function, so code that
+looks records up one at a time (e.g. with ``asyncio.gather``) costs one
+round trip instead of N. Results are memoized for the lifetime of the loader.
+
+Loaders returned by ``request_loader()`` live for one HTTP request (opened by
+``LoaderScopeMiddleware``) or one ``loader_scope()`` block, so nothing is
+cached across requests. Outside a scope every call gets a fresh loader, which
+still batches ``load_many()``.
+"""
+import asyncio
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator, List, Optional, Set
+
+BatchFunction = Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+
+
+class DataLoader:
+    """Coalesces loads of one tick into batched calls, with a per-loader memo"""
+
+    def __init__(self, batch_fn: BatchFunction, max_batch_size: int = 100):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self._memo: Dict[Hashable, asyncio.Future] = {}
+        self._queue: List[Hashable] = []
+        self._dispatch_scheduled = False
+        self._batches: Set[asyncio.Task] = set()
+        self.stats: Dict[str, int] = {'loads': 0, 'memo_hits': 0, 'batches': 0}
+
+    async def load(self, key: Hashable) -> Any:
+        """Value for a key, or None when the batch function did not return it"""
+        self.stats['loads'] += 1
+        future = self._memo.get(key)
+        if future is not None:
+            self.stats['memo_hits'] += 1
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        future = self._memo[key] = loop.create_future()
+        future.add_done_callback(functools.partial(self._evict_failed, key))
+        self._queue.append(key)
+        if not self._dispatch_scheduled:
+            # Runs after every task already scheduled for this tick has queued its keys
+            self._dispatch_scheduled = True
+            loop.call_soon(self._dispatch)
+        # Shielded so a cancelled caller does not cancel the load for the
+        # other callers waiting on the same key
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: List[Hashable]) -> List[Any]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def clear(self, key: Hashable) -> None:
+        """Forget a memoized key, e.g. after the record was deleted"""
+        self._memo.pop(key, None)
+
+    def _evict_failed(self, key: Hashable, future: asyncio.Future) -> None:
+        # Cancelled or failed loads are not memoized, a later load tries again
+        if (future.cancelled() or future.exception() is not None) and self._memo.get(key) is future:
+            del self._memo[key]
+
+    def _dispatch(self) -> None:
+        self._dispatch_scheduled = False
+        queue, self._queue = self._queue, []
+        for start in range(0, len(queue), self.max_batch_size):
+            task = asyncio.ensure_future(self._run_batch(queue[start:start + self.max_batch_size]))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, keys: List[Hashable]) -> None:
+        self.stats['batches'] += 1
+        try:
+            results = await self.batch_fn(keys)
+        except asyncio.CancelledError:
+            for key in keys:
+                future = self._memo.get(key)
+                if future is not None and not future.done():
+                    future.cancel()
+            raise
+        except Exception as e:
+            for key in keys:
+                # Failed keys are not memoized, a later load tries again
+                future = self._memo.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+
+        for key in keys:
+            future = self._memo.get(key)
+            if future is not None and not future.done():
+                future.set_result(results.get(key))
+
+
+_loaders: ContextVar[Optional[Dict[str, DataLoader]]] = ContextVar("doorguardian_loaders", default=None)
+
+
+@contextmanager
+def loader_scope() -> Iterator[None]:
+    """Share loaders (and their memo) between everything run inside the block"""
+    token = _loaders.set({})
+    try:
+        yield
+    finally:
+        _loaders.reset(token)
+
+
+def request_loader(name: str, factory: Callable[[], DataLoader]) -> DataLoader:
+    """The scope's loader with this name, created on first use"""
+    loaders = _loaders.get()
+    if loaders is None:
+        return factory()
+
+    loader = loaders.get(name)
+    if loader is None:
+        loader = loaders[name] = factory()
+    return loader
+
+
+class LoaderScopeMiddleware:
+    """ASGI middleware giving every HTTP request its own loaders"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with loader_scope():
+            await self.app(scope, receive, send)
@@ -2,7 +2,6 @@ import os
 import uuid
 import mimetypes
 from io import BytesIO
-from PIL import Image
 from typing import Dict, Any
 from fastapi import UploadFile
 from app.config.config import settings
@@ -21,6 +20,9 @@ def allowed_mime_type(mime_type: str) -> bool:
 
 def validate_image_content(file_content: bytes) -> bool:
     """Validate if file content is a valid image"""
+    # Pillow is imported on the first upload instead of at startup
+    from PIL import Image
+    
     try:
         with Image.open(BytesIO(file_content)) as img:
             img.verify()  # Verify it's a valid image
@@ -60,6 +62,8 @@ def get_file_info_from_upload(file: UploadFile, file_size: int, file_content: by
     
     # 3. For images, try to detect from file content if available
     if file_content and (not mime_type or mime_type == 'text/plain'):
+        from PIL import Image
+        
         try:
             with Image.open(BytesIO(file_content)) as img:
                 format_map = {
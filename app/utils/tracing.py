@@ -0,0 +1,312 @@
+"""
+Lightweight request tracing with contextvars.
+
+Every HTTP request gets a trace with a root span; ``span()`` and ``traced()``
+add child spans for request stages and service calls. The active trace and
+span live in contextvars, so spans nest correctly across awaits, tasks and
+``asyncio.to_thread``. Outside a request (background jobs) spans are no-ops.
+
+Finished traces are written by a local exporter (log or JSON lines file), and
+requests slower than ``TRACING_SLOW_REQUEST_MS`` get their full span breakdown
+logged.
+"""
+import functools
+import json
+import logging
+import queue
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.config.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Incoming trace ids are reused only if they look like ids, not arbitrary text
+TRACE_ID_PATTERN = re.compile(r"^[A-Za-z0-9-]{8,64}$")
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+
+class Trace:
+    """Spans recorded for one request"""
+
+    def __init__(self, trace_id: str, name: str):
+        self.trace_id = trace_id
+        self.started_at = datetime.now(timezone.utc)
+        self.root = Span(name, None, {})
+        self.spans: List[Span] = [self.root]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'name': self.root.name,
+            'started_at': self.started_at.isoformat(),
+            'duration_ms': round(self.root.duration * 1000, 3),
+            'attributes': self.root.attributes,
+            'spans': [
+                {
+                    'name': span.name,
+                    'span_id': span.span_id,
+                    'parent_id': span.parent_id,
+                    'offset_ms': round((span.start - self.root.start) * 1000, 3),
+                    'duration_ms': round(span.duration * 1000, 3),
+                    'attributes': span.attributes,
+                    'error': span.error,
+                }
+                for span in self.spans[1:]
+            ],
+        }
+
+    def format_breakdown(self) -> str:
+        """Indented span tree with offsets and durations, for the slow request log"""
+        children: Dict[Optional[str], List[Span]] = {}
+        for span in self.spans[1:]:
+            children.setdefault(span.parent_id, []).append(span)
+
+        lines = []
+
+        def walk(span: Span, depth: int) -> None:
+            offset = (span.start - self.root.start) * 1000
+            error = f" ❌ {span.error}" if span.error else ""
+            lines.append(f"{'  ' * depth}{span.name:<{48 - 2 * depth}} +{offset:>8.1f}ms {span.duration * 1000:>9.1f}ms{error}")
+            for child in sorted(children.get(span.span_id, []), key=lambda item: item.start):
+                walk(child, depth + 1)
+
+        walk(self.root, 0)
+        return "\n".join(lines)
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("doorguardian_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("doorguardian_span", default=None)
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Record a child span of the current span for the duration of the block"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _current_span.get()
+    current = Span(name, parent.span_id if parent else trace.root.span_id, attributes)
+    trace.spans.append(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def record_span(name: str, duration: float, **attributes: Any) -> None:
+    """Add an already finished span, for timings reported after the fact"""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+
+    parent = _current_span.get()
+    finished = Span(name, parent.span_id if parent else trace.root.span_id, attributes)
+    finished.end = time.perf_counter()
+    finished.start = finished.end - duration
+    trace.spans.append(finished)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator wrapping every call of an async function in a span"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(span_name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class TraceExporter:
+    """Writes finished traces to the log or a JSON lines file.
+
+    JSON lines are written by a background thread, requests only put the
+    finished trace on a queue so the event loop never blocks on file I/O.
+    """
+
+    def __init__(self, kind: Optional[str] = None, path: Optional[str] = None):
+        # Unset values are read from the settings on first export
+        self._kind = kind
+        self._path = path
+        self._lock = threading.Lock()
+        self._queue: "queue.SimpleQueue[Optional[Trace]]" = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+
+    @property
+    def kind(self) -> str:
+        return self._kind or settings.TRACING_EXPORTER
+
+    @property
+    def path(self) -> str:
+        return self._path or settings.TRACING_EXPORT_PATH
+
+    def export(self, trace: Trace) -> None:
+        if self.kind == "log":
+            logger.info(f"trace {trace.trace_id} {trace.root.name} {trace.root.duration * 1000:.1f}ms")
+        elif self.kind == "jsonl":
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(
+                        target=self._write_forever, args=(self.path,), name="trace-exporter", daemon=True
+                    )
+                    self._writer.start()
+            self._queue.put(trace)
+
+    def _write_forever(self, path: str) -> None:
+        try:
+            file = open(path, "a", encoding="utf-8")
+        except OSError as e:
+            # Keep draining so the queue does not grow, the traces are lost
+            logger.error(f"Could not open trace export file {path}: {e}")
+            file = None
+
+        while True:
+            # Write whatever piled up since the last flush in one go
+            batch = [self._queue.get()]
+            while batch[-1] is not None:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if file is not None:
+                for trace in batch:
+                    if trace is None:
+                        continue
+                    try:
+                        file.write(json.dumps(trace.to_dict(), default=str) + "\n")
+                    except Exception as e:
+                        logger.error(f"Could not export trace {trace.trace_id}: {e}")
+                file.flush()
+
+            if batch[-1] is None:
+                if file is not None:
+                    file.close()
+                return
+
+    def close(self) -> None:
+        """Stop the writer thread once the queued traces are written"""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join()
+
+
+# Exporter selected by TRACING_EXPORTER
+trace_exporter = TraceExporter()
+
+
+class TracingMiddleware:
+    """ASGI middleware that opens a trace per request and returns its id in a header.
+
+    An incoming id in the same header is reused so traces can be correlated
+    with the caller (e.g. a door controller or reverse proxy).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.header = settings.TRACING_HEADER.lower().encode("latin-1")
+        self.slow_seconds = settings.TRACING_SLOW_REQUEST_MS / 1000
+
+    def _trace_id(self, scope) -> str:
+        for key, value in scope.get("headers", []):
+            if key == self.header:
+                incoming = value.decode("latin-1")
+                if TRACE_ID_PATTERN.match(incoming):
+                    return incoming
+        return uuid.uuid4().hex
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(self._trace_id(scope), f"{scope['method']} {scope['path']}")
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(trace.root)
+        status_code = 500
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal status_code, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Server-Sent Events stay open on purpose, they are not slow requests
+                streaming = any(
+                    key == b"content-type" and value.startswith(b"text/event-stream")
+                    for key, value in message.get("headers", [])
+                )
+                message["headers"] = list(message.get("headers", [])) + [
+                    (self.header, trace.trace_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            trace.root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            trace.root.end = time.perf_counter()
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+
+            # Name the trace after the route template once routing is done
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                trace.root.name = f"{scope['method']} {route}"
+            trace.root.attributes = {'path': scope["path"], 'status': status_code}
+
+            self._finish(trace, streaming)
+
+    def _finish(self, trace: Trace, streaming: bool = False) -> None:
+        try:
+            trace_exporter.export(trace)
+            if trace.root.duration >= self.slow_seconds and not streaming:
+                logger.warning(
+                    f"Slow request {trace.root.name} took {trace.root.duration * 1000:.1f}ms "
+                    f"(status {trace.root.attributes['status']}, trace {trace.trace_id})\n"
+                    f"{trace.format_breakdown()}"
+                )
+        except Exception as e:
+            logger.error(f"Could not export trace {trace.trace_id}: {e}")
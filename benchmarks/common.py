@@ -0,0 +1,170 @@
+"""
+Shared helpers for the benchmark suite: environment bootstrap, installing the
+fake Supabase backend into the app, timing statistics and JSON result files.
+"""
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.fake_supabase import FakeSupabaseClient, Latency
+
+# Minimal settings so the app can be imported without a .env file
+BENCHMARK_ENV = {
+    "ENVIRONMENT": "benchmark",
+    "DEBUG": "False",
+    "API_V1_STR": "/api/v1",
+    "PROJECT_NAME": "DoorGuardian API",
+    "VERSION": "1.0.0",
+    "SUPABASE_URL": "https://fake-project.supabase.co",
+    "SUPABASE_KEY": "fake-anon-key",
+    "SUPABASE_SERVICE_ROLE_KEY": "fake-service-role-key",
+    "SECRET_KEY": "benchmark",
+    "UPLOAD_FOLDER": "uploads/images",
+    "MAX_FILE_SIZE": "16777216",
+    "DATABASE_BACKEND": "supabase",
+}
+
+
+def prepare_environment(**overrides: str) -> None:
+    """Set the settings the app needs, must run before importing app modules"""
+    for key, value in BENCHMARK_ENV.items():
+        os.environ.setdefault(key, value)
+    for key, value in overrides.items():
+        if value is not None:
+            os.environ[key] = str(value)
+
+
+def install_fake_backend(latency: Optional[Latency] = None, seed_rows: int = 0) -> FakeSupabaseClient:
+    """Route every Supabase client the app creates to one in-memory fake"""
+    from app.config import extensions
+
+    fake = FakeSupabaseClient(latency)
+    if seed_rows:
+        fake.seed(seed_rows)
+
+    extensions.create_client = lambda url, key, *args, **kwargs: fake
+    extensions._supabase_client = None
+    extensions._supabase_admin_client = None
+    extensions._repository = None
+    return fake
+
+
+def create_benchmark_app():
+    """Build a fresh FastAPI app instance"""
+    from app.app_factory import create_app
+
+    return create_app()
+
+
+def sample_image(fmt: str = "JPEG", size: int = 640) -> bytes:
+    """Encode a synthetic camera frame"""
+    from PIL import Image
+
+    image = Image.effect_noise((size, size * 3 // 4), 64).convert("RGB")
+    buffer = BytesIO()
+    image.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency statistics in milliseconds for a list of durations in seconds"""
+    ordered = sorted(samples)
+    count = len(ordered)
+
+    def percentile(p: float) -> float:
+        # Nearest-rank percentile
+        index = min(count - 1, max(0, math.ceil(p / 100 * count) - 1))
+        return ordered[index] * 1000
+
+    total = sum(ordered)
+    return {
+        'iterations': count,
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'median_ms': statistics.median(ordered) * 1000,
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'min_ms': ordered[0] * 1000,
+        'max_ms': ordered[-1] * 1000,
+        'stdev_ms': statistics.stdev(ordered) * 1000 if count > 1 else 0.0,
+        'ops_per_sec': count / total if total else 0.0,
+    }
+
+
+def time_sync(func: Callable[[], Any], iterations: int, warmup: int = 10) -> List[float]:
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def time_async(func: Callable[[], Any], iterations: int, warmup: int = 5) -> List[float]:
+    for _ in range(warmup):
+        await func()
+
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def environment_metadata() -> Dict[str, Any]:
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_revision': _git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def write_results(path: Path, suite: str, config: Dict[str, Any], results: List[Dict[str, Any]]) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        'suite': suite,
+        'meta': environment_metadata(),
+        'config': config,
+        'results': results,
+    }
+    path.write_text(json.dumps(payload, indent=2))
+    return path
+
+
+def compare_results(baseline_path: Path, results: List[Dict[str, Any]]) -> None:
+    """Print the change of the median against a previous results file"""
+    baseline = {item['name']: item for item in json.loads(baseline_path.read_text())['results']}
+
+    print()
+    print(f"📊 Compared with {baseline_path}")
+    print(f"{'benchmark':<48} {'before':>10} {'after':>10} {'change':>9}")
+    for item in results:
+        before = baseline.get(item['name'])
+        if not before or not before['median_ms']:
+            continue
+        change = (item['median_ms'] - before['median_ms']) / before['median_ms'] * 100
+        print(f"{item['name']:<48} {before['median_ms']:>8.3f}ms {item['median_ms']:>8.3f}ms {change:>+8.1f}%")
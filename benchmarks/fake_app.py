@@ -0,0 +1,31 @@
+"""
+ASGI app backed by the in-memory fake Supabase client, for load tests against
+a real server:
+
+    uvicorn benchmarks.fake_app:app --workers 4 --port 8001
+
+Every worker process gets its own in-memory backend. The simulated backend is
+configured with environment variables:
+
+    BENCHMARK_DB_LATENCY_MS       latency per table/rpc call (default 0)
+    BENCHMARK_STORAGE_LATENCY_MS  latency per storage call (default 0)
+    BENCHMARK_JITTER              latency jitter as a fraction (default 0)
+    BENCHMARK_SEED_ROWS           access rows loaded at startup (default 2000)
+"""
+import os
+
+from benchmarks.common import create_benchmark_app, install_fake_backend, prepare_environment
+from benchmarks.fake_supabase import Latency
+
+prepare_environment()
+
+fake = install_fake_backend(
+    Latency(
+        table=float(os.getenv("BENCHMARK_DB_LATENCY_MS", "0")) / 1000,
+        storage=float(os.getenv("BENCHMARK_STORAGE_LATENCY_MS", "0")) / 1000,
+        jitter=float(os.getenv("BENCHMARK_JITTER", "0")),
+    ),
+    seed_rows=int(os.getenv("BENCHMARK_SEED_ROWS", "2000")),
+)
+
+app = create_benchmark_app()
@@ -0,0 +1,295 @@
+"""
+In-memory stand-in for the parts of the supabase client used by DoorGuardian.
+
+Implements the PostgREST query builder (``table().select().eq()...execute()``),
+``rpc()`` and the storage bucket API on top of Python dicts, with configurable
+latency injected on every call so benchmarks can model a remote project.
+"""
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+PUBLIC_URL = "https://fake-project.supabase.co/storage/v1/object/public"
+
+
+@dataclass
+class Latency:
+    """Simulated round-trip latency in seconds, with +/- jitter as a fraction"""
+    table: float = 0.0
+    storage: float = 0.0
+    jitter: float = 0.0
+
+    def sleep(self, base: float) -> None:
+        if base <= 0:
+            return
+        if self.jitter:
+            base *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        # The real client is blocking, so the delay blocks too
+        time.sleep(base)
+
+
+@dataclass
+class FakeResponse:
+    data: Any
+    count: Optional[int] = None
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FakeQuery:
+    """Chainable query mirroring the postgrest request builders"""
+
+    def __init__(self, client: "FakeSupabaseClient", table: str):
+        self._client = client
+        self._table = table
+        self._action = "select"
+        self._embed_images = False
+        self._count: Optional[str] = None
+        self._head = False
+        self._payload: List[Dict[str, Any]] = []
+        self._filters: List[Tuple[str, str, Any]] = []
+        self._order: Optional[Tuple[str, bool]] = None
+        self._range: Optional[Tuple[int, int]] = None
+        self._limit: Optional[int] = None
+
+    # Actions
+
+    def select(self, *columns: str, count: Optional[str] = None, head: bool = False) -> "FakeQuery":
+        self._action = "select"
+        self._embed_images = any("images(" in column for column in columns)
+        self._count = count
+        self._head = head
+        return self
+
+    def insert(self, json: Any, **kwargs) -> "FakeQuery":
+        self._action = "insert"
+        self._payload = json if isinstance(json, list) else [json]
+        return self
+
+    def delete(self, **kwargs) -> "FakeQuery":
+        self._action = "delete"
+        return self
+
+    # Filters and modifiers
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        self._filters.append(("eq", column, value))
+        return self
+
+    def gte(self, column: str, value: Any) -> "FakeQuery":
+        self._filters.append(("gte", column, value))
+        return self
+
+    def lte(self, column: str, value: Any) -> "FakeQuery":
+        self._filters.append(("lte", column, value))
+        return self
+
+    def lt(self, column: str, value: Any) -> "FakeQuery":
+        self._filters.append(("lt", column, value))
+        return self
+
+    def in_(self, column: str, values: List[Any]) -> "FakeQuery":
+        self._filters.append(("in", column, set(values)))
+        return self
+
+    def order(self, column: str, desc: bool = False, **kwargs) -> "FakeQuery":
+        self._order = (column, desc)
+        return self
+
+    def range(self, start: int, end: int) -> "FakeQuery":
+        self._range = (start, end)
+        return self
+
+    def limit(self, size: int) -> "FakeQuery":
+        self._limit = size
+        return self
+
+    # Execution
+
+    def _matches(self, row: Dict[str, Any]) -> bool:
+        for op, column, value in self._filters:
+            current = row.get(column)
+            if op == "eq" and current != value:
+                return False
+            if op == "gte" and (current is None or current < value):
+                return False
+            if op == "lte" and (current is None or current > value):
+                return False
+            if op == "lt" and (current is None or current >= value):
+                return False
+            if op == "in" and current not in value:
+                return False
+        return True
+
+    def execute(self) -> FakeResponse:
+        self._client.latency.sleep(self._client.latency.table)
+        self._client.calls[f"{self._table}.{self._action}"] += 1
+
+        with self._client.lock:
+            rows = self._client.tables.setdefault(self._table, {})
+
+            if self._action == "insert":
+                return FakeResponse(data=[self._client._insert(self._table, dict(row)) for row in self._payload])
+
+            matched = [row for row in rows.values() if self._matches(row)]
+
+            if self._action == "delete":
+                for row in matched:
+                    rows.pop(row['id'], None)
+                if self._table == "images":
+                    # Mirrors ON DELETE CASCADE of access_images.image_id
+                    deleted = {row['id'] for row in matched}
+                    links = self._client.tables.setdefault("access_images", {})
+                    for key in [key for key, link in links.items() if link['image_id'] in deleted]:
+                        del links[key]
+                return FakeResponse(data=[dict(row) for row in matched])
+
+            count = len(matched) if self._count else None
+            if self._head:
+                return FakeResponse(data=[], count=count)
+
+            if self._order:
+                column, desc = self._order
+                matched.sort(key=lambda row: row.get(column) or "", reverse=desc)
+            if self._range:
+                matched = matched[self._range[0]:self._range[1] + 1]
+            if self._limit is not None:
+                matched = matched[:self._limit]
+
+            images = self._client.tables.setdefault("images", {})
+            data = []
+            for row in matched:
+                row = dict(row)
+                if self._embed_images:
+                    image = images.get(row.get('image_id'))
+                    row['images'] = dict(image) if image else None
+                data.append(row)
+
+            return FakeResponse(data=data, count=count)
+
+
+class FakeRpc:
+    def __init__(self, client: "FakeSupabaseClient", name: str, params: Dict[str, Any]):
+        self._client = client
+        self._name = name
+        self._params = params
+
+    def execute(self) -> FakeResponse:
+        self._client.latency.sleep(self._client.latency.table)
+        self._client.calls[f"rpc.{self._name}"] += 1
+        # Partition maintenance functions have nothing to do in memory
+        return FakeResponse(data=0)
+
+
+class FakeBucket:
+    def __init__(self, client: "FakeSupabaseClient", bucket: str):
+        self._client = client
+        self._bucket = bucket
+
+    @property
+    def _objects(self) -> Dict[str, Dict[str, Any]]:
+        return self._client.buckets.setdefault(self._bucket, {})
+
+    def upload(self, path: str, file: bytes, file_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        self._client.latency.sleep(self._client.latency.storage)
+        self._client.calls["storage.upload"] += 1
+        with self._client.lock:
+            if path in self._objects:
+                raise Exception(f"The resource already exists: {path}")
+            self._objects[path] = {
+                'id': str(uuid.uuid4()),
+                'size': len(file),
+                'content_type': (file_options or {}).get("content-type"),
+                'created_at': _now(),
+            }
+        return {'path': path, 'full_path': f"{self._bucket}/{path}"}
+
+    def remove(self, paths: List[str]) -> List[Dict[str, Any]]:
+        self._client.latency.sleep(self._client.latency.storage)
+        self._client.calls["storage.remove"] += 1
+        with self._client.lock:
+            return [{'name': path} for path in paths if self._objects.pop(path, None) is not None]
+
+    def list(self, path: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        self._client.latency.sleep(self._client.latency.storage)
+        self._client.calls["storage.list"] += 1
+        options = options or {}
+        prefix = f"{path}/" if path else ""
+        with self._client.lock:
+            names = sorted(key for key in self._objects if key.startswith(prefix))
+            items = [
+                {'name': key[len(prefix):], 'id': self._objects[key]['id'], 'created_at': self._objects[key]['created_at']}
+                for key in names
+            ]
+        offset = options.get("offset", 0)
+        return items[offset:offset + options.get("limit", 100)]
+
+    def get_public_url(self, path: str, options: Optional[Dict[str, Any]] = None) -> str:
+        return f"{PUBLIC_URL}/{self._bucket}/{path}"
+
+
+class FakeStorage:
+    def __init__(self, client: "FakeSupabaseClient"):
+        self._client = client
+
+    def from_(self, bucket: str) -> FakeBucket:
+        return FakeBucket(self._client, bucket)
+
+
+class FakeSupabaseClient:
+    """Thread-safe in-memory replacement for ``supabase.Client``"""
+
+    def __init__(self, latency: Optional[Latency] = None):
+        self.latency = latency or Latency()
+        self.lock = threading.RLock()
+        self.tables: Dict[str, Dict[str, Dict[str, Any]]] = {"access": {}, "images": {}, "access_images": {}}
+        self.buckets: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.calls: Counter = Counter()
+        self.storage = FakeStorage(self)
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> FakeRpc:
+        return FakeRpc(self, name, params or {})
+
+    def _insert(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        now = _now()
+        row.setdefault('id', str(uuid.uuid4()))
+        row.setdefault('created_at', now)
+        row.setdefault('updated_at', now)
+
+        if table == "access":
+            # Mirrors the update_access_image_url trigger from migration 001
+            image = self.tables["images"].get(row.get('image_id'))
+            row['image_url'] = f"{PUBLIC_URL}/images/{image['file_path']}" if image else None
+
+        self.tables[table][row['id']] = row
+        return dict(row)
+
+    def seed(self, access_rows: int, with_images: bool = True, days: int = 365) -> None:
+        """Fill the tables with synthetic door events spread over the last days"""
+        now = datetime.now(timezone.utc).timestamp()
+        for i in range(access_rows):
+            image_id = None
+            if with_images and i % 2 == 0:
+                image_id = self._insert("images", {
+                    'filename': f"seed-{i}.jpg",
+                    'original_filename': f"seed-{i}.jpg",
+                    'file_path': f"access_images/seed-{i}.jpg",
+                    'file_size': 1024,
+                    'mime_type': "image/jpeg",
+                })['id']
+            date = datetime.fromtimestamp(now - random.random() * days * 86400, timezone.utc)
+            self._insert("access", {
+                'access': random.random() > 0.3,
+                'date': date.isoformat(),
+                'image_id': image_id,
+            })
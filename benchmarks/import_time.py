@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Startup import-time budget for DoorGuardian.
+
+Imports ``main`` (which also builds the app) in fresh interpreters with
+``python -X importtime`` and checks the median against a budget. It also checks
+that the heavy dependencies loaded on first use (Pillow, postgrest, storage3,
+asyncpg, numpy) and the unused supabase auth/realtime stack stay out of startup.
+Exits with status 1 when the budget or the lazy-import list is violated, so it
+can run in CI.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 600 --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+from benchmarks.common import BENCHMARK_ENV, write_results
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Modules that must only be imported on first use, never at startup
+LAZY_MODULES = (
+    "PIL",
+    "supabase",
+    "supabase_auth",
+    "gotrue",
+    "realtime",
+    "postgrest",
+    "storage3",
+    "asyncpg",
+    "numpy",
+)
+
+
+def measure_once(module: str) -> Tuple[float, Dict[str, int], Set[str]]:
+    """Import a module in a fresh interpreter.
+
+    Returns the total import time in ms, the cumulative time per module in
+    microseconds and the set of top-level packages that were imported.
+    """
+    env = {**os.environ, **BENCHMARK_ENV}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+    cumulative: Dict[str, int] = {}
+    packages: Set[str] = set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|", 1).split("|"))
+        cumulative[name] = int(cumulative_us)
+        packages.add(name.split(".")[0])
+
+    return cumulative[module] / 1000, cumulative, packages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check the startup import time of DoorGuardian")
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreter runs, the median is checked")
+    parser.add_argument("--budget-ms", type=float, default=800.0, help="Maximum median import time")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list")
+    parser.add_argument("--output", type=Path, default=None, help="Results file (default: benchmarks/results/import-<timestamp>.json)")
+    args = parser.parse_args()
+
+    runs = [measure_once(args.module) for _ in range(args.runs)]
+    totals: List[float] = [total for total, _, _ in runs]
+    eager: Set[str] = set().union(*(packages.intersection(LAZY_MODULES) for _, _, packages in runs))
+
+    median = statistics.median(totals)
+    # Module breakdown of the run closest to the median
+    breakdown: Dict[str, int] = min(runs, key=lambda run: abs(run[0] - median))[1]
+
+    print(f"⏱️  import {args.module}: median {median:.1f}ms over {args.runs} runs "
+          f"(min {min(totals):.1f}ms, max {max(totals):.1f}ms, budget {args.budget_ms:g}ms)")
+    print()
+    print(f"{'module':<48} {'cumulative':>12}")
+    slowest = sorted(
+        ((name, us) for name, us in breakdown.items() if name != args.module),
+        key=lambda item: item[1], reverse=True
+    )[:args.top]
+    for name, us in slowest:
+        print(f"{name:<48} {us / 1000:>10.1f}ms")
+    print()
+
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f"median import time {median:.1f}ms exceeds the {args.budget_ms:g}ms budget")
+    if eager:
+        failures.append(f"imported at startup but should be lazy: {', '.join(sorted(eager))}")
+
+    output = args.output or RESULTS_DIR / f"import-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    write_results(output, "benchmarks.import_time", vars(args) | {'output': str(output)}, [{
+        'name': f"import {args.module}",
+        'group': "startup",
+        'median_ms': median,
+        'min_ms': min(totals),
+        'max_ms': max(totals),
+        'runs': args.runs,
+        'eager_lazy_modules': sorted(eager),
+        'slowest_modules_ms': {name: us / 1000 for name, us in slowest},
+    }])
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+
+    print(f"✅ Within budget, no heavy dependency imported at startup (results in {output})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+DoorGuardian load generator.
+
+Replays bursty door traffic against the API: image uploads to /register,
+/history polling and deletes, with periodic bursts (shift changes, lunch) and
+controller retries on failures. Arrivals are open-loop (Poisson at the
+scheduled rate) and latency is measured from the scheduled send time, so a
+saturated server shows up as growing latency instead of a slower generator.
+
+Targets:
+    in-process  the ASGI app with the fake backend, in this process (default)
+    --workers N uvicorn benchmarks.fake_app:app with N worker processes
+    --url URL   any running server, e.g. a staging deployment
+
+Usage:
+    python -m benchmarks.load --rate 20 --duration 30
+    python -m benchmarks.load --workers 4 --db-latency-ms 20 --sweep 10,20,40,80
+    python -m benchmarks.load --url http://127.0.0.1:8001 --rate 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+from benchmarks.common import prepare_environment, sample_image, summarize, write_results
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+REGISTER_IMAGE = "POST /register[image]"
+REGISTER = "POST /register"
+HISTORY = "GET /history"
+DELETE = "DELETE /history/{id}"
+
+MIX_KEYS = {
+    "register_image": REGISTER_IMAGE,
+    "register": REGISTER,
+    "history": HISTORY,
+    "delete": DELETE,
+}
+DEFAULT_MIX = "register_image=35,register=10,history=50,delete=5"
+
+# Controllers retry writes that failed on the server side
+RETRYABLE = {REGISTER_IMAGE, REGISTER}
+
+
+@dataclass
+class Profile:
+    """Offered load: base arrival rate with periodic bursts"""
+    rate: float
+    duration: float
+    burst_factor: float = 4.0
+    burst_every: float = 20.0
+    burst_length: float = 4.0
+
+    def rate_at(self, elapsed: float) -> float:
+        if self.burst_every and elapsed % self.burst_every < self.burst_length:
+            return self.rate * self.burst_factor
+        return self.rate
+
+    @property
+    def mean_rate(self) -> float:
+        if not self.burst_every:
+            return self.rate
+        burst_share = min(self.burst_length, self.burst_every) / self.burst_every
+        return self.rate * (1 + (self.burst_factor - 1) * burst_share)
+
+
+@dataclass
+class EndpointStats:
+    latencies: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    skipped: int = 0
+    not_found: int = 0
+    shed: int = 0
+
+
+class LoadRun:
+    def __init__(self, client, profile: Profile, mix: Dict[str, float], image: bytes,
+                 retries: int, retry_delay: float, max_in_flight: int, idempotency_keys: bool = False):
+        self.client = client
+        self.profile = profile
+        self.mix_names = list(mix)
+        self.mix_weights = list(mix.values())
+        self.image = image
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.max_in_flight = max_in_flight
+        self.idempotency_keys = idempotency_keys
+        self.stats: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+        self.created: Deque[str] = deque()
+        self.in_flight = 0
+        self.dropped = 0
+
+    async def prime(self, count: int) -> None:
+        """Create records for the deletes to consume, outside the measurement"""
+        for _ in range(count):
+            response = await self.client.post("/api/v1/register", data={"access": "true"})
+            if response.status_code == 200:
+                self.created.append(response.json()["access_record"]["id"])
+
+    async def _send(self, name: str, access_id: Optional[str], headers: Dict[str, str], access: str):
+        if name == REGISTER_IMAGE:
+            return await self.client.post(
+                "/api/v1/register",
+                data={"access": access},
+                files={"image": ("camera.jpg", self.image, "image/jpeg")},
+                headers=headers
+            )
+        if name == REGISTER:
+            return await self.client.post("/api/v1/register", data={"access": access}, headers=headers)
+        if name == HISTORY:
+            params = {"page": 1, "per_page": 20}
+            if random.random() < 0.2:
+                params["access"] = "false"
+            return await self.client.get("/api/v1/history", params=params)
+        return await self.client.delete(f"/api/v1/history/{access_id}")
+
+    async def _request(self, name: str, scheduled: float, access_id: Optional[str]) -> None:
+        stats = self.stats[name]
+        attempt = 0
+        # One key per access event, shared by all its retries
+        headers = {"Idempotency-Key": uuid.uuid4().hex} if self.idempotency_keys else {}
+        access = random.choice(["true", "false"])
+        while True:
+            stats.requests += 1
+            try:
+                response = await self._send(name, access_id, headers, access)
+                status = response.status_code
+            except Exception as e:
+                response = None
+                status = type(e).__name__
+
+            stats.statuses[status] += 1
+            if name == DELETE and status == 404:
+                # With --workers each process has its own fake backend, so a
+                # record created through another worker is not found here
+                stats.not_found += 1
+                return
+            if response is not None and response.status_code < 400:
+                stats.latencies.append(time.perf_counter() - scheduled)
+                if name in (REGISTER, REGISTER_IMAGE):
+                    self.created.append(response.json()["access_record"]["id"])
+                return
+
+            stats.errors += 1
+            retry_delay = self.retry_delay
+            if status == 503 and "retry-after" in response.headers:
+                # Shed by admission control, retry when the server asks to
+                stats.shed += 1
+                retry_delay = float(response.headers["retry-after"])
+            retryable = response is None or response.status_code >= 500
+            if name not in RETRYABLE or not retryable or attempt >= self.retries:
+                return
+            attempt += 1
+            stats.retries += 1
+            await asyncio.sleep(retry_delay)
+            scheduled = time.perf_counter()
+
+    async def _fire(self, name: str, scheduled: float, access_id: Optional[str]) -> None:
+        self.in_flight += 1
+        try:
+            await self._request(name, scheduled, access_id)
+        finally:
+            self.in_flight -= 1
+
+    async def run(self) -> float:
+        tasks = set()
+        started = time.perf_counter()
+        next_at = 0.0
+
+        while True:
+            next_at += random.expovariate(self.profile.rate_at(next_at))
+            if next_at >= self.profile.duration:
+                break
+            delay = started + next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            name = random.choices(self.mix_names, self.mix_weights)[0]
+            if self.in_flight >= self.max_in_flight:
+                # The generator is saturated too, count it instead of queueing
+                self.dropped += 1
+                continue
+
+            access_id = None
+            if name == DELETE:
+                if not self.created:
+                    self.stats[name].skipped += 1
+                    continue
+                access_id = self.created.popleft()
+
+            task = asyncio.create_task(self._fire(name, started + next_at, access_id))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float) -> List[Dict[str, Any]]:
+        results = []
+        total = EndpointStats()
+        for name in self.mix_names:
+            stats = self.stats.get(name)
+            if not stats or not stats.requests:
+                continue
+            results.append(self._endpoint_result(name, stats, elapsed))
+            total.latencies += stats.latencies
+            total.statuses.update(stats.statuses)
+            total.requests += stats.requests
+            total.errors += stats.errors
+            total.retries += stats.retries
+            total.skipped += stats.skipped
+            total.not_found += stats.not_found
+            total.shed += stats.shed
+
+        if total.requests:
+            overall = self._endpoint_result("ALL", total, elapsed)
+            overall['dropped'] = self.dropped
+            results.append(overall)
+        return results
+
+    def _endpoint_result(self, name: str, stats: EndpointStats, elapsed: float) -> Dict[str, Any]:
+        latency = summarize(stats.latencies) if stats.latencies else {}
+        return {
+            'name': name,
+            'group': "load",
+            'offered_rate': self.profile.rate,
+            'requests': stats.requests,
+            'ok': len(stats.latencies),
+            'errors': stats.errors,
+            'error_rate': stats.errors / stats.requests,
+            'retries': stats.retries,
+            'skipped': stats.skipped,
+            'not_found': stats.not_found,
+            'shed': stats.shed,
+            'statuses': {str(status): count for status, count in stats.statuses.items()},
+            'throughput_rps': len(stats.latencies) / elapsed if elapsed else 0.0,
+            'p50_ms': latency.get('median_ms'),
+            'p95_ms': latency.get('p95_ms'),
+            'p99_ms': latency.get('p99_ms'),
+            'max_ms': latency.get('max_ms'),
+        }
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for item in value.split(","):
+        key, _, weight = item.partition("=")
+        if key.strip() not in MIX_KEYS:
+            raise argparse.ArgumentTypeError(f"Unknown mix entry '{key}', expected one of {', '.join(MIX_KEYS)}")
+        mix[MIX_KEYS[key.strip()]] = float(weight)
+    return mix
+
+
+def parse_rates(value: str) -> List[float]:
+    return [float(rate) for rate in value.split(",")]
+
+
+def start_server(args) -> subprocess.Popen:
+    """Run benchmarks.fake_app under uvicorn with the requested worker count"""
+    env = {
+        **os.environ,
+        "BENCHMARK_DB_LATENCY_MS": str(args.db_latency_ms),
+        "BENCHMARK_STORAGE_LATENCY_MS": str(args.storage_latency_ms),
+        "BENCHMARK_JITTER": str(args.jitter),
+        "BENCHMARK_SEED_ROWS": str(args.seed_rows),
+    }
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "benchmarks.fake_app:app",
+            "--host", "127.0.0.1", "--port", str(args.port),
+            "--workers", str(args.workers), "--log-level", "warning", "--no-access-log",
+        ],
+        env=env,
+    )
+
+
+async def wait_until_healthy(client, timeout: float = 30.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            response = await client.get("/api/v1/health")
+            if response.status_code == 200:
+                return
+        except Exception:
+            pass
+        if time.perf_counter() > deadline:
+            raise RuntimeError("Server did not become healthy in time")
+        await asyncio.sleep(0.2)
+
+
+async def run_load(args, rates: List[float]) -> List[Dict[str, Any]]:
+    import httpx
+
+    if args.url or args.workers:
+        transport = None
+        base_url = args.url or f"http://127.0.0.1:{args.port}"
+    else:
+        from benchmarks.common import create_benchmark_app, install_fake_backend
+        from benchmarks.fake_supabase import Latency
+
+        install_fake_backend(
+            Latency(args.db_latency_ms / 1000, args.storage_latency_ms / 1000, args.jitter),
+            seed_rows=args.seed_rows
+        )
+        transport = httpx.ASGITransport(app=create_benchmark_app())
+        base_url = "http://loadtest"
+
+    image = sample_image("JPEG", args.image_size)
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    results = []
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        if transport is None:
+            await wait_until_healthy(client)
+
+        for rate in rates:
+            profile = Profile(
+                rate=rate,
+                duration=args.duration,
+                burst_factor=args.burst_factor,
+                burst_every=args.burst_every,
+                burst_length=args.burst_length
+            )
+            load = LoadRun(client, profile, args.mix, image, args.retries, args.retry_delay, args.max_in_flight,
+                           args.idempotency_keys)
+            await load.prime(args.prime)
+
+            print(f"🚪 {rate:g} req/s base, {profile.mean_rate:.1f} req/s mean offered, {args.duration:g}s")
+            elapsed = await load.run()
+            run_results = load.report(elapsed)
+            for item in run_results:
+                item['mean_offered_rate'] = profile.mean_rate
+            print_report(run_results)
+            results += run_results
+
+    return results
+
+
+def _ms(value: Optional[float]) -> str:
+    return f"{value:>8.1f}ms" if value is not None else f"{'-':>10}"
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    print(f"{'endpoint':<24} {'reqs':>7} {'rps':>8} {'p50':>10} {'p95':>10} {'p99':>10} {'errors':>8} {'shed':>7}")
+    for item in results:
+        print(
+            f"{item['name']:<24} {item['requests']:>7} {item['throughput_rps']:>8.1f} "
+            f"{_ms(item['p50_ms'])} {_ms(item['p95_ms'])} {_ms(item['p99_ms'])} {item['error_rate']:>7.1%} "
+            f"{item['shed']:>7}"
+        )
+    print()
+
+
+def print_saturation(results: List[Dict[str, Any]], slo_p99_ms: float, max_error_rate: float) -> None:
+    """Summarize a sweep and point at the first rate the target could not sustain"""
+    overall = [item for item in results if item['name'] == "ALL"]
+    saturated_at = None
+
+    print(f"📈 Saturation sweep (p99 SLO {slo_p99_ms:g}ms, max error rate {max_error_rate:.1%})")
+    print(f"{'offered':>10} {'achieved':>10} {'p99':>10} {'errors':>8}  status")
+    for item in overall:
+        reasons = []
+        if item['throughput_rps'] < 0.9 * item['mean_offered_rate'] * (1 - item['error_rate']):
+            reasons.append("throughput")
+        if item['p99_ms'] is None or item['p99_ms'] > slo_p99_ms:
+            reasons.append("p99")
+        if item['error_rate'] > max_error_rate:
+            reasons.append("errors")
+        if item['dropped']:
+            reasons.append("dropped")
+        if reasons and saturated_at is None:
+            saturated_at = item['offered_rate']
+
+        print(
+            f"{item['mean_offered_rate']:>10.1f} {item['throughput_rps']:>10.1f} {_ms(item['p99_ms'])} "
+            f"{item['error_rate']:>7.1%}  {'❌ ' + ', '.join(reasons) if reasons else '✅'}"
+        )
+
+    if saturated_at is None:
+        print("✅ No saturation within the sweep")
+    else:
+        print(f"⚠️  Saturated at {saturated_at:g} req/s base rate")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay bursty door traffic against DoorGuardian")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default=None, help="Base URL of a running server")
+    target.add_argument("--workers", type=int, default=0, help="Start uvicorn benchmarks.fake_app:app with N workers")
+    parser.add_argument("--port", type=int, default=8001, help="Port for --workers")
+
+    parser.add_argument("--rate", type=float, default=20.0, help="Base arrival rate in requests per second")
+    parser.add_argument("--sweep", type=parse_rates, default=None, help="Comma separated base rates to run in sequence")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per run")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Endpoint weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--burst-factor", type=float, default=4.0, help="Rate multiplier during bursts")
+    parser.add_argument("--burst-every", type=float, default=20.0, help="Seconds between burst starts (0 disables bursts)")
+    parser.add_argument("--burst-length", type=float, default=4.0, help="Burst length in seconds")
+    parser.add_argument("--retries", type=int, default=2, help="Controller retries for failed /register calls")
+    parser.add_argument("--retry-delay", type=float, default=0.2, help="Seconds before a controller retries")
+    parser.add_argument("--idempotency-keys", action="store_true", help="Send an Idempotency-Key per access event on /register")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Request timeout in seconds")
+    parser.add_argument("--max-in-flight", type=int, default=512, help="Requests in flight before arrivals are dropped")
+    parser.add_argument("--prime", type=int, default=50, help="Records created before each run for the deletes")
+    parser.add_argument("--image-size", type=int, default=640, help="Width of the uploaded JPEG frame")
+
+    parser.add_argument("--seed-rows", type=int, default=2000, help="Access rows loaded into the fake backend")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="Injected latency per table call")
+    parser.add_argument("--storage-latency-ms", type=float, default=0.0, help="Injected latency per storage call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Latency jitter as a fraction (0.2 = +/-20%%)")
+
+    parser.add_argument("--slo-p99-ms", type=float, default=1000.0, help="p99 latency considered saturated")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Error rate considered saturated")
+    parser.add_argument("--output", type=Path, default=None, help="Results file (default: benchmarks/results/load-<timestamp>.json)")
+    args = parser.parse_args()
+
+    prepare_environment()
+
+    server = start_server(args) if args.workers else None
+    try:
+        rates = args.sweep or [args.rate]
+        results = asyncio.run(run_load(args, rates))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    if len(rates) > 1:
+        print_saturation(results, args.slo_p99_ms, args.max_error_rate)
+
+    output = args.output or RESULTS_DIR / f"load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    config = {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()}
+    config['target'] = args.url or (f"uvicorn --workers {args.workers}" if args.workers else "in-process")
+    write_results(output, "benchmarks.load", config, results)
+    print()
+    print(f"💾 Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+DoorGuardian performance benchmarks.
+
+Runs microbenchmarks of the file_utils validators and model serialization,
+endpoint benchmarks through the ASGI app backed by the in-memory fake
+Supabase client, and batched vs one-query-per-id image lookups. Results are written as JSON so runs can be compared.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --db-latency-ms 20 --storage-latency-ms 60
+    python -m benchmarks.run --compare benchmarks/results/baseline.json
+"""
+import argparse
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.common import (
+    compare_results,
+    create_benchmark_app,
+    install_fake_backend,
+    prepare_environment,
+    sample_image,
+    summarize,
+    time_async,
+    time_sync,
+    write_results,
+)
+from benchmarks.fake_supabase import Latency
+
+RESULTS_DIR = Path(__file__).parent / "results"
+WARMUP = 5
+IMAGE_LOOKUPS = 50
+
+
+def run_microbenchmarks(iterations: int) -> List[Dict[str, Any]]:
+    from fastapi import UploadFile
+    from starlette.datastructures import Headers
+
+    from app.models.access import AccessListResponse, AccessWithImage
+    from app.utils.file_utils import (
+        allowed_file,
+        allowed_mime_type,
+        generate_unique_filename,
+        get_file_info_from_upload,
+        validate_image_content,
+    )
+
+    jpeg = sample_image("JPEG")
+    png = sample_image("PNG")
+    # No extension and a generic content type force the Pillow-based sniffing
+    upload = UploadFile(file=None, filename="camera", headers=Headers({"content-type": "text/plain"}))
+
+    record = {
+        'id': str(uuid.uuid4()),
+        'access': True,
+        'date': datetime.now(timezone.utc).isoformat(),
+        'image_id': str(uuid.uuid4()),
+        'image_url': "https://fake-project.supabase.co/storage/v1/object/public/images/access_images/a.jpg",
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'updated_at': datetime.now(timezone.utc).isoformat(),
+        'image': {
+            'id': str(uuid.uuid4()),
+            'filename': "a.jpg",
+            'original_filename': "camera.jpg",
+            'file_path': "access_images/a.jpg",
+            'file_size': len(jpeg),
+            'mime_type': "image/jpeg",
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'updated_at': datetime.now(timezone.utc).isoformat(),
+        },
+    }
+    page = AccessListResponse(
+        access_records=[AccessWithImage(**record) for _ in range(100)],
+        pagination={'page': 1, 'per_page': 100, 'total': 100, 'pages': 1},
+    )
+
+    cases = {
+        "file_utils.allowed_file": lambda: allowed_file("camera.JPG"),
+        "file_utils.allowed_mime_type": lambda: allowed_mime_type("image/webp"),
+        "file_utils.generate_unique_filename": lambda: generate_unique_filename("camera.jpg"),
+        "file_utils.validate_image_content[jpeg]": lambda: validate_image_content(jpeg),
+        "file_utils.validate_image_content[png]": lambda: validate_image_content(png),
+        "file_utils.get_file_info_from_upload[sniff]": lambda: get_file_info_from_upload(upload, len(jpeg), jpeg),
+        "models.AccessWithImage.validate": lambda: AccessWithImage(**record),
+        "models.AccessWithImage.dump_json": lambda: page.access_records[0].model_dump_json(),
+        "models.AccessListResponse.dump_json[100]": lambda: page.model_dump_json(),
+    }
+
+    results = []
+    for name, func in cases.items():
+        stats = summarize(time_sync(func, iterations))
+        results.append({'name': name, 'group': "micro", **stats})
+    return results
+
+
+async def run_endpoint_benchmarks(app, fake, iterations: int) -> List[Dict[str, Any]]:
+    import httpx
+
+    from app.config.extensions import get_repository
+    from app.services.image_service import ImageService
+    from app.utils.dataloader import loader_scope
+
+    jpeg = sample_image("JPEG")
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        async def history_first_page():
+            response = await client.get("/api/v1/history")
+            response.raise_for_status()
+
+        async def history_filtered():
+            response = await client.get(
+                "/api/v1/history",
+                params={"access": "false", "date_from": "2000-01-01T00:00:00", "page": 3, "per_page": 50}
+            )
+            response.raise_for_status()
+
+        async def register_without_image():
+            response = await client.post("/api/v1/register", data={"access": "true"})
+            response.raise_for_status()
+
+        async def register_with_image():
+            response = await client.post(
+                "/api/v1/register",
+                data={"access": "false"},
+                files={"image": ("camera.jpg", jpeg, "image/jpeg")}
+            )
+            response.raise_for_status()
+
+        async def register_with_images():
+            # Uploads overlap, so this should stay close to register_with_image
+            response = await client.post(
+                "/api/v1/register",
+                data={"access": "false"},
+                files=[("image", ("camera.jpg", jpeg, "image/jpeg"))] + [
+                    ("images", (f"camera-{i}.jpg", jpeg, "image/jpeg")) for i in range(1, 4)
+                ]
+            )
+            response.raise_for_status()
+
+        created: List[str] = []
+
+        async def register_for_delete():
+            response = await client.post("/api/v1/register", data={"access": "true"})
+            created.append(response.json()["access_record"]["id"])
+
+        async def delete_access():
+            response = await client.delete(f"/api/v1/history/{created.pop()}")
+            response.raise_for_status()
+
+        cases = [
+            ("GET /history", history_first_page),
+            ("GET /history?access&date_from&page=3", history_filtered),
+            ("POST /register", register_without_image),
+            ("POST /register[image]", register_with_image),
+            ("POST /register[4 images]", register_with_images),
+        ]
+
+        results = []
+
+        async def measure(name, func, group="endpoint"):
+            # Backend round trips per request catch N+1 regressions that
+            # zero-latency timings would hide
+            calls_before = sum(fake.calls.values())
+            stats = summarize(await time_async(func, iterations, warmup=WARMUP))
+            calls = sum(fake.calls.values()) - calls_before
+            results.append({
+                'name': name,
+                'group': group,
+                'backend_calls_per_request': calls / (iterations + WARMUP),
+                **stats
+            })
+
+        for name, func in cases:
+            await measure(name, func)
+
+        for _ in range(iterations + WARMUP):
+            await register_for_delete()
+        await measure("DELETE /history/{id}", delete_access)
+
+    # Image lookups for a page of records: one query per id vs the batching loader
+    image_ids = list(fake.tables["images"])[:IMAGE_LOOKUPS]
+    repository = get_repository()
+
+    async def images_one_query_each():
+        await asyncio.gather(*(repository.get_image(image_id) for image_id in image_ids))
+
+    async def images_batched():
+        with loader_scope():
+            await asyncio.gather(*(ImageService.get_image_by_id(image_id) for image_id in image_ids))
+
+    await measure(f"{len(image_ids)} image lookups (one query each)", images_one_query_each, group="service")
+    await measure(f"{len(image_ids)} image lookups (batched loader)", images_batched, group="service")
+
+    return results
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    print(f"{'benchmark':<48} {'median':>10} {'p95':>10} {'ops/s':>10}")
+    for item in results:
+        print(
+            f"{item['name']:<48} {item['median_ms']:>8.3f}ms {item['p95_ms']:>8.3f}ms "
+            f"{item['ops_per_sec']:>10.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run DoorGuardian performance benchmarks")
+    parser.add_argument("--suite", choices=["all", "micro", "endpoints"], default="all")
+    parser.add_argument("--iterations", type=int, default=200, help="Measured iterations per benchmark")
+    parser.add_argument("--seed-rows", type=int, default=2000, help="Access rows loaded into the fake backend")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="Injected latency per table call")
+    parser.add_argument("--storage-latency-ms", type=float, default=0.0, help="Injected latency per storage call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Latency jitter as a fraction (0.2 = +/-20%%)")
+    parser.add_argument("--count-mode", default=None, help="Override HISTORY_COUNT_MODE")
+    parser.add_argument("--output", type=Path, default=None, help="Results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", type=Path, default=None, help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    prepare_environment(HISTORY_COUNT_MODE=args.count_mode)
+
+    results: List[Dict[str, Any]] = []
+    if args.suite in ("all", "micro"):
+        results += run_microbenchmarks(args.iterations)
+
+    if args.suite in ("all", "endpoints"):
+        latency = Latency(
+            table=args.db_latency_ms / 1000,
+            storage=args.storage_latency_ms / 1000,
+            jitter=args.jitter
+        )
+        fake = install_fake_backend(latency, seed_rows=args.seed_rows)
+        app = create_benchmark_app()
+        results += asyncio.run(run_endpoint_benchmarks(app, fake, args.iterations))
+
+    print_results(results)
+
+    output = args.output or RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    config = {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()}
+    write_results(output, "benchmarks.run", config, results)
+    print()
+    print(f"💾 Results written to {output}")
+
+    if args.compare:
+        compare_results(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the monthly partitioned access table against a local Postgres.
+
+Creates a scratch schema with the old single heap layout and the partitioned
+layout from migration 002, loads the same synthetic door events into both and
+prints the query plans of the /history queries and of the retention delete.
+
+Usage:
+    python database/benchmark_partitions.py --dsn postgresql://postgres@localhost:5432/postgres
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import asyncpg
+
+SCHEMA = "partition_bench"
+
+SETUP_SQL = f"""
+DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+CREATE SCHEMA {SCHEMA};
+
+-- Old layout: single heap with single-column indexes
+CREATE TABLE {SCHEMA}.access_heap (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    date TIMESTAMPTZ NOT NULL,
+    access BOOLEAN NOT NULL,
+    image_id UUID,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX ON {SCHEMA}.access_heap(date);
+CREATE INDEX ON {SCHEMA}.access_heap(access);
+CREATE INDEX ON {SCHEMA}.access_heap(created_at);
+
+-- New layout: monthly range partitions with composite indexes
+CREATE TABLE {SCHEMA}.access_part (
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
+    date TIMESTAMPTZ NOT NULL,
+    access BOOLEAN NOT NULL,
+    image_id UUID,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, date)
+) PARTITION BY RANGE (date);
+CREATE TABLE {SCHEMA}.access_part_default PARTITION OF {SCHEMA}.access_part DEFAULT;
+CREATE INDEX ON {SCHEMA}.access_part(access, date DESC);
+CREATE INDEX ON {SCHEMA}.access_part(date DESC);
+CREATE INDEX ON {SCHEMA}.access_part(created_at);
+"""
+
+QUERIES = {
+    "history: denied in the last 30 days, first page": """
+        SELECT * FROM {table}
+        WHERE access = false AND date >= NOW() - INTERVAL '30 days'
+        ORDER BY date DESC LIMIT 20
+    """,
+    "history: one month, page 50": """
+        SELECT * FROM {table}
+        WHERE date >= date_trunc('month', NOW()) - INTERVAL '2 months'
+          AND date < date_trunc('month', NOW()) - INTERVAL '1 month'
+        ORDER BY date DESC LIMIT 20 OFFSET 980
+    """,
+    "history: exact count for a granted range": """
+        SELECT count(*) FROM {table}
+        WHERE access = true AND date >= NOW() - INTERVAL '90 days'
+    """,
+}
+
+
+async def create_tables(conn: asyncpg.Connection, months: int) -> None:
+    """Create both layouts and one partition per month of data"""
+    await conn.execute(SETUP_SQL)
+    for offset in range(-months, 2):
+        await conn.execute(f"""
+            DO $$
+            DECLARE
+                start_date DATE := (date_trunc('month', NOW()) + make_interval(months => {offset}))::DATE;
+            BEGIN
+                EXECUTE format(
+                    'CREATE TABLE {SCHEMA}.%I PARTITION OF {SCHEMA}.access_part FOR VALUES FROM (%L) TO (%L)',
+                    'access_p' || to_char(start_date, 'YYYY_MM'), start_date, start_date + INTERVAL '1 month'
+                );
+            END $$;
+        """)
+
+
+async def load_rows(conn: asyncpg.Connection, rows: int, months: int) -> None:
+    """Load the same synthetic events (about a third denied) into both layouts"""
+    await conn.execute(f"""
+        INSERT INTO {SCHEMA}.access_heap (date, access)
+        SELECT NOW() - random() * INTERVAL '{months} months', random() > 0.3
+        FROM generate_series(1, {rows})
+    """)
+    await conn.execute(f"""
+        INSERT INTO {SCHEMA}.access_part (id, date, access, image_id, created_at)
+        SELECT id, date, access, image_id, created_at FROM {SCHEMA}.access_heap
+    """)
+    await conn.execute(f"ANALYZE {SCHEMA}.access_heap")
+    await conn.execute(f"ANALYZE {SCHEMA}.access_part")
+
+
+async def explain(conn: asyncpg.Connection, sql: str) -> str:
+    rows = await conn.fetch(f"EXPLAIN (ANALYZE, BUFFERS) {sql}")
+    return "\n".join(row[0] for row in rows)
+
+
+async def benchmark_retention(conn: asyncpg.Connection, months: int) -> None:
+    """Compare a mass delete on the heap with dropping the oldest partition"""
+    cutoff = f"(date_trunc('month', NOW()) - INTERVAL '{months - 1} months')"
+    oldest = await conn.fetchval(
+        f"SELECT 'access_p' || to_char(date_trunc('month', NOW()) - INTERVAL '{months} months', 'YYYY_MM')"
+    )
+
+    tx = conn.transaction()
+    await tx.start()
+    started = time.perf_counter()
+    result = await conn.execute(f"DELETE FROM {SCHEMA}.access_heap WHERE date < {cutoff}")
+    heap_ms = (time.perf_counter() - started) * 1000
+    await tx.rollback()
+
+    tx = conn.transaction()
+    await tx.start()
+    started = time.perf_counter()
+    await conn.execute(f"DROP TABLE {SCHEMA}.{oldest}")
+    part_ms = (time.perf_counter() - started) * 1000
+    await tx.rollback()
+
+    print("🧹 Retention of the oldest month")
+    print(f"   heap  DELETE ({result}): {heap_ms:.1f} ms")
+    print(f"   part  DROP TABLE {oldest}: {part_ms:.1f} ms")
+
+
+async def run(dsn: str, rows: int, months: int, keep: bool) -> None:
+    conn = await asyncpg.connect(dsn)
+    try:
+        print(f"📦 Loading {rows} rows over {months} months into schema '{SCHEMA}'...")
+        started = time.perf_counter()
+        await create_tables(conn, months)
+        await load_rows(conn, rows, months)
+        print(f"   done in {time.perf_counter() - started:.1f}s")
+        print()
+
+        for name, template in QUERIES.items():
+            for table in ("access_heap", "access_part"):
+                print(f"📊 {name} [{table}]")
+                print("-" * 60)
+                print(await explain(conn, template.format(table=f"{SCHEMA}.{table}")))
+                print()
+
+        await benchmark_retention(conn, months)
+    finally:
+        if not keep:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the partitioned access table on a local Postgres")
+    parser.add_argument(
+        "--dsn",
+        default=os.environ.get("BENCHMARK_DATABASE_URL", "postgresql://postgres@localhost:5432/postgres"),
+        help="Postgres connection string (default: $BENCHMARK_DATABASE_URL)"
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of access rows to generate")
+    parser.add_argument("--months", type=int, default=24, help="Months of history to spread the rows over")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark schema after running")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.dsn, args.rows, args.months, args.keep))
+
+
+if __name__ == "__main__":
+    main()
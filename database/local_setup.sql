@@ -0,0 +1,14 @@
+-- Local Postgres bootstrap for DoorGuardian
+-- Run this before schema.sql when using DATABASE_BACKEND=postgres against a plain
+-- Postgres instead of a Supabase project. It provides the pieces of the Supabase
+-- auth schema referenced by the RLS policies.
+
+CREATE SCHEMA IF NOT EXISTS auth;
+
+-- Connections from the API act as the service role
+CREATE OR REPLACE FUNCTION auth.role()
+RETURNS TEXT AS $$
+    SELECT 'service_role'::TEXT;
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION auth.role() IS 'Local stand-in for Supabase auth.role(), always service_role';
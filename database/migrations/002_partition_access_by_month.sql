@@ -0,0 +1,155 @@
+-- Migration: Partition access table by month
+-- Created: 2026-10-18
+-- Description: Converts public.access into a table range-partitioned by month on "date",
+--              adds composite indexes matching the /history filters and helper functions
+--              used by the retention job to create and drop partitions.
+--
+-- Only needed for databases created before this migration. database/schema.sql already
+-- creates the partitioned layout for new projects.
+
+BEGIN;
+
+-- 1. Keep the current heap around while the data is copied
+ALTER TABLE public.access RENAME TO access_legacy;
+DROP TRIGGER IF EXISTS update_access_updated_at ON public.access_legacy;
+DROP TRIGGER IF EXISTS trigger_update_access_image_url ON public.access_legacy;
+DROP INDEX IF EXISTS idx_access_date;
+DROP INDEX IF EXISTS idx_access_access;
+DROP INDEX IF EXISTS idx_access_created_at;
+DROP INDEX IF EXISTS idx_access_image_id;
+DROP INDEX IF EXISTS idx_access_image_url;
+
+-- 2. Create the partitioned table (the partition key must be part of the primary key)
+CREATE TABLE public.access (
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
+    date TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    access BOOLEAN NOT NULL DEFAULT FALSE,
+    image_id UUID REFERENCES public.images(id) ON DELETE SET NULL,
+    image_url TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, date)
+) PARTITION BY RANGE (date);
+
+-- Catches rows outside of the pre-created months
+CREATE TABLE public.access_default PARTITION OF public.access DEFAULT;
+
+-- 3. Composite indexes matching the /history filters (created on every partition)
+CREATE INDEX IF NOT EXISTS idx_access_access_date ON public.access(access, date DESC);
+CREATE INDEX IF NOT EXISTS idx_access_date ON public.access(date DESC);
+CREATE INDEX IF NOT EXISTS idx_access_created_at ON public.access(created_at);
+CREATE INDEX IF NOT EXISTS idx_access_image_id ON public.access(image_id);
+
+-- 4. Partition management functions
+CREATE OR REPLACE FUNCTION public.create_access_partition(month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    start_date DATE := date_trunc('month', month)::DATE;
+    end_date DATE := (date_trunc('month', month) + INTERVAL '1 month')::DATE;
+    partition_name TEXT := 'access_p' || to_char(start_date, 'YYYY_MM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS public.%I PARTITION OF public.access FOR VALUES FROM (%L) TO (%L)',
+        partition_name, start_date, end_date
+    );
+
+    -- Partitions are tables of their own in the exposed schema: RLS without
+    -- policies and no API role grants keep them reachable only through access
+    EXECUTE format('ALTER TABLE public.%I ENABLE ROW LEVEL SECURITY', partition_name);
+    EXECUTE format('REVOKE ALL ON public.%I FROM anon, authenticated', partition_name);
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION public.ensure_access_partitions(months_back INTEGER DEFAULT 0, months_ahead INTEGER DEFAULT 3)
+RETURNS INTEGER AS $$
+DECLARE
+    offset_months INTEGER;
+    created INTEGER := 0;
+BEGIN
+    FOR offset_months IN -months_back..months_ahead LOOP
+        PERFORM public.create_access_partition((date_trunc('month', NOW()) + make_interval(months => offset_months))::DATE);
+        created := created + 1;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION public.drop_access_partitions_before(cutoff TIMESTAMPTZ)
+RETURNS INTEGER AS $$
+DECLARE
+    partition_name TEXT;
+    dropped INTEGER := 0;
+BEGIN
+    -- Only drop monthly partitions whose whole range is older than the cutoff
+    FOR partition_name IN
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        JOIN pg_namespace ns ON ns.oid = parent.relnamespace
+        WHERE ns.nspname = 'public'
+          AND parent.relname = 'access'
+          AND child.relname ~ '^access_p[0-9]{4}_[0-9]{2}$'
+          AND to_date(substring(child.relname FROM 9), 'YYYY_MM') + INTERVAL '1 month' <= cutoff
+    LOOP
+        EXECUTE format('DROP TABLE IF EXISTS public.%I', partition_name);
+        dropped := dropped + 1;
+    END LOOP;
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- The partition functions run as their owner (SECURITY DEFINER) and PostgREST exposes
+-- every function of public, so only the service role may call them
+REVOKE EXECUTE ON FUNCTION public.create_access_partition(DATE) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.ensure_access_partitions(INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.drop_access_partitions_before(TIMESTAMPTZ) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.create_access_partition(DATE) TO service_role;
+GRANT EXECUTE ON FUNCTION public.ensure_access_partitions(INTEGER, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.drop_access_partitions_before(TIMESTAMPTZ) TO service_role;
+
+-- 5. Create partitions covering the existing data and the next months, then copy it
+SELECT public.create_access_partition(month::DATE)
+FROM generate_series(
+    date_trunc('month', COALESCE((SELECT MIN(date) FROM public.access_legacy), NOW())),
+    date_trunc('month', NOW()) + INTERVAL '3 months',
+    INTERVAL '1 month'
+) AS month;
+
+INSERT INTO public.access (id, date, access, image_id, image_url, created_at, updated_at)
+SELECT id, date, access, image_id, image_url, created_at, updated_at
+FROM public.access_legacy;
+
+DROP TABLE public.access_legacy;
+
+-- 6. Recreate triggers on the partitioned table
+DROP TRIGGER IF EXISTS update_access_updated_at ON public.access;
+CREATE TRIGGER update_access_updated_at
+    BEFORE UPDATE ON public.access
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+DROP TRIGGER IF EXISTS trigger_update_access_image_url ON public.access;
+CREATE TRIGGER trigger_update_access_image_url
+    BEFORE INSERT OR UPDATE OF image_id ON public.access
+    FOR EACH ROW
+    EXECUTE FUNCTION update_access_image_url();
+
+-- 7. Restore row level security
+ALTER TABLE public.access ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can do everything on access" ON public.access;
+CREATE POLICY "Service role can do everything on access" ON public.access
+    FOR ALL USING (auth.role() = 'service_role');
+
+-- Partitions are exposed as tables of their own, the parent's policies do not apply to them
+ALTER TABLE public.access_default ENABLE ROW LEVEL SECURITY;
+REVOKE ALL ON public.access_default FROM anon, authenticated;
+
+-- 8. Comment the changes
+COMMENT ON TABLE public.access IS 'Stores door access records, range-partitioned by month on date';
+COMMENT ON FUNCTION public.create_access_partition(DATE) IS 'Creates the monthly access partition containing the given date';
+COMMENT ON FUNCTION public.ensure_access_partitions(INTEGER, INTEGER) IS 'Creates monthly access partitions around the current month';
+COMMENT ON FUNCTION public.drop_access_partitions_before(TIMESTAMPTZ) IS 'Drops monthly access partitions entirely older than the cutoff';
+
+COMMIT;
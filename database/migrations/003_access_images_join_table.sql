@@ -0,0 +1,41 @@
+-- Migration: Link several images to one access record
+-- Created: 2026-10-19
+-- Description: Adds the access_images join table used by /register when an event comes
+--              with more than one image. access.image_id keeps pointing at the first image
+--              (position 0), so image_url and clients reading `image` keep working.
+--
+-- There is no foreign key to public.access: a key referencing the partitioned table would
+-- stop the retention job from dropping whole monthly partitions. Join rows are removed with
+-- their images (ON DELETE CASCADE) and by the API when an access record is deleted.
+
+BEGIN;
+
+-- 1. Join table, one row per image of an access record
+CREATE TABLE IF NOT EXISTS public.access_images (
+    access_id UUID NOT NULL,
+    image_id UUID NOT NULL REFERENCES public.images(id) ON DELETE CASCADE,
+    position SMALLINT NOT NULL CHECK (position >= 0),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (access_id, position)
+);
+
+CREATE INDEX IF NOT EXISTS idx_access_images_image_id ON public.access_images(image_id);
+
+-- 2. Existing single-image records become position 0
+INSERT INTO public.access_images (access_id, image_id, position)
+SELECT id, image_id, 0
+FROM public.access
+WHERE image_id IS NOT NULL
+ON CONFLICT DO NOTHING;
+
+-- 3. Same RLS setup as the other tables
+ALTER TABLE public.access_images ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can do everything on access_images" ON public.access_images;
+CREATE POLICY "Service role can do everything on access_images" ON public.access_images
+    FOR ALL USING (auth.role() = 'service_role');
+
+COMMENT ON TABLE public.access_images IS 'Images of an access record in upload order; position 0 is also access.image_id';
+COMMENT ON COLUMN public.access_images.position IS 'Order of the image in the /register request, starting at 0';
+
+COMMIT;
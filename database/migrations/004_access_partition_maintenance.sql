@@ -0,0 +1,114 @@
+-- Migration: Keep access partitions maintainable when rows reach access_default
+-- Created: 2026-10-19
+-- Description: create_access_partition moves the month's rows out of access_default
+--              (detach, create, move, re-attach) instead of failing on them, and takes an
+--              advisory lock since every API worker runs partition maintenance.
+--              ensure_access_partitions skips a month that cannot be created, with a
+--              warning, and returns how many months are ready.
+--              The partition functions can only be executed by the service role, and every
+--              partition gets RLS (with no policy) and no grants for the anon and
+--              authenticated roles, since PostgREST exposes the partitions as tables.
+--
+-- Only needed for databases created before this migration. database/schema.sql already
+-- contains the new functions.
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION public.create_access_partition(month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    start_date DATE := date_trunc('month', month)::DATE;
+    end_date DATE := (date_trunc('month', month) + INTERVAL '1 month')::DATE;
+    partition_name TEXT := 'access_p' || to_char(start_date, 'YYYY_MM');
+    moved BIGINT;
+BEGIN
+    -- Every API worker runs partition maintenance, callers take turns
+    PERFORM pg_advisory_xact_lock(hashtext('public.create_access_partition'));
+
+    IF to_regclass(format('public.%I', partition_name)) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM public.access_default WHERE date >= start_date AND date < end_date) THEN
+        -- Rows of this month already landed in the default partition, and a
+        -- partition cannot be created over them: detach the default, create
+        -- the month, move its rows over and attach the default again
+        ALTER TABLE public.access DETACH PARTITION public.access_default;
+        EXECUTE format(
+            'CREATE TABLE public.%I PARTITION OF public.access FOR VALUES FROM (%L) TO (%L)',
+            partition_name, start_date, end_date
+        );
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM public.access_default WHERE date >= %L AND date < %L RETURNING *) '
+            'INSERT INTO public.%I SELECT * FROM moved',
+            start_date, end_date, partition_name
+        );
+        GET DIAGNOSTICS moved = ROW_COUNT;
+        ALTER TABLE public.access ATTACH PARTITION public.access_default DEFAULT;
+        RAISE NOTICE 'Moved % rows from access_default into %', moved, partition_name;
+    ELSE
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS public.%I PARTITION OF public.access FOR VALUES FROM (%L) TO (%L)',
+            partition_name, start_date, end_date
+        );
+    END IF;
+
+    -- Partitions are tables of their own in the exposed schema: RLS without
+    -- policies and no API role grants keep them reachable only through access
+    EXECUTE format('ALTER TABLE public.%I ENABLE ROW LEVEL SECURITY', partition_name);
+    EXECUTE format('REVOKE ALL ON public.%I FROM anon, authenticated', partition_name);
+
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION public.ensure_access_partitions(months_back INTEGER DEFAULT 0, months_ahead INTEGER DEFAULT 3)
+RETURNS INTEGER AS $$
+DECLARE
+    offset_months INTEGER;
+    month DATE;
+    ready INTEGER := 0;
+BEGIN
+    -- A month that cannot be created is reported and skipped, the others still are
+    FOR offset_months IN -months_back..months_ahead LOOP
+        month := (date_trunc('month', NOW()) + make_interval(months => offset_months))::DATE;
+        BEGIN
+            PERFORM public.create_access_partition(month);
+            ready := ready + 1;
+        EXCEPTION WHEN OTHERS THEN
+            RAISE WARNING 'Could not create access partition for %: %', to_char(month, 'YYYY-MM'), SQLERRM;
+        END;
+    END LOOP;
+    RETURN ready;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- The partition functions run as their owner (SECURITY DEFINER) and PostgREST exposes
+-- every function of public, so only the service role may call them
+REVOKE EXECUTE ON FUNCTION public.create_access_partition(DATE) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.ensure_access_partitions(INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.drop_access_partitions_before(TIMESTAMPTZ) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.create_access_partition(DATE) TO service_role;
+GRANT EXECUTE ON FUNCTION public.ensure_access_partitions(INTEGER, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.drop_access_partitions_before(TIMESTAMPTZ) TO service_role;
+
+-- Lock down the partitions created before this migration, including access_default
+DO $$
+DECLARE
+    partition_name TEXT;
+BEGIN
+    FOR partition_name IN
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        JOIN pg_namespace ns ON ns.oid = parent.relnamespace
+        WHERE ns.nspname = 'public' AND parent.relname = 'access'
+    LOOP
+        EXECUTE format('ALTER TABLE public.%I ENABLE ROW LEVEL SECURITY', partition_name);
+        EXECUTE format('REVOKE ALL ON public.%I FROM anon, authenticated', partition_name);
+    END LOOP;
+END;
+$$;
+
+COMMIT;
@@ -16,26 +16,156 @@ CREATE TABLE IF NOT EXISTS public.images (
     updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
--- Create access table
+-- Create access table, range-partitioned by month on date
+-- (the partition key must be part of the primary key)
 CREATE TABLE IF NOT EXISTS public.access (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
     date TIMESTAMPTZ NOT NULL DEFAULT NOW(),
     access BOOLEAN NOT NULL DEFAULT FALSE,
     image_id UUID REFERENCES public.images(id) ON DELETE SET NULL,
     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, date)
+) PARTITION BY RANGE (date);
+
+-- Catches rows outside of the pre-created months
+CREATE TABLE IF NOT EXISTS public.access_default PARTITION OF public.access DEFAULT;
+
+-- Images of an access record in upload order, position 0 is also access.image_id
+-- (no foreign key to the partitioned access table, so whole partitions can be dropped)
+CREATE TABLE IF NOT EXISTS public.access_images (
+    access_id UUID NOT NULL,
+    image_id UUID NOT NULL REFERENCES public.images(id) ON DELETE CASCADE,
+    position SMALLINT NOT NULL CHECK (position >= 0),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (access_id, position)
 );
 
 -- Create indexes for better performance
-CREATE INDEX IF NOT EXISTS idx_access_date ON public.access(date);
-CREATE INDEX IF NOT EXISTS idx_access_access ON public.access(access);
+-- (access, date) matches the /history filters; indexes are created on every partition
+CREATE INDEX IF NOT EXISTS idx_access_access_date ON public.access(access, date DESC);
+CREATE INDEX IF NOT EXISTS idx_access_date ON public.access(date DESC);
 CREATE INDEX IF NOT EXISTS idx_access_created_at ON public.access(created_at);
 CREATE INDEX IF NOT EXISTS idx_access_image_id ON public.access(image_id);
 CREATE INDEX IF NOT EXISTS idx_images_filename ON public.images(filename);
+CREATE INDEX IF NOT EXISTS idx_images_created_at ON public.images(created_at);
+CREATE INDEX IF NOT EXISTS idx_access_images_image_id ON public.access_images(image_id);
+
+-- Partition management functions (used by the partition maintainer and retention job through RPC)
+CREATE OR REPLACE FUNCTION public.create_access_partition(month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    start_date DATE := date_trunc('month', month)::DATE;
+    end_date DATE := (date_trunc('month', month) + INTERVAL '1 month')::DATE;
+    partition_name TEXT := 'access_p' || to_char(start_date, 'YYYY_MM');
+    moved BIGINT;
+BEGIN
+    -- Every API worker runs partition maintenance, callers take turns
+    PERFORM pg_advisory_xact_lock(hashtext('public.create_access_partition'));
+
+    IF to_regclass(format('public.%I', partition_name)) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM public.access_default WHERE date >= start_date AND date < end_date) THEN
+        -- Rows of this month already landed in the default partition, and a
+        -- partition cannot be created over them: detach the default, create
+        -- the month, move its rows over and attach the default again
+        ALTER TABLE public.access DETACH PARTITION public.access_default;
+        EXECUTE format(
+            'CREATE TABLE public.%I PARTITION OF public.access FOR VALUES FROM (%L) TO (%L)',
+            partition_name, start_date, end_date
+        );
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM public.access_default WHERE date >= %L AND date < %L RETURNING *) '
+            'INSERT INTO public.%I SELECT * FROM moved',
+            start_date, end_date, partition_name
+        );
+        GET DIAGNOSTICS moved = ROW_COUNT;
+        ALTER TABLE public.access ATTACH PARTITION public.access_default DEFAULT;
+        RAISE NOTICE 'Moved % rows from access_default into %', moved, partition_name;
+    ELSE
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS public.%I PARTITION OF public.access FOR VALUES FROM (%L) TO (%L)',
+            partition_name, start_date, end_date
+        );
+    END IF;
+
+    -- Partitions are tables of their own in the exposed schema: RLS without
+    -- policies and no API role grants keep them reachable only through access
+    EXECUTE format('ALTER TABLE public.%I ENABLE ROW LEVEL SECURITY', partition_name);
+    EXECUTE format('REVOKE ALL ON public.%I FROM anon, authenticated', partition_name);
+
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION public.ensure_access_partitions(months_back INTEGER DEFAULT 0, months_ahead INTEGER DEFAULT 3)
+RETURNS INTEGER AS $$
+DECLARE
+    offset_months INTEGER;
+    month DATE;
+    ready INTEGER := 0;
+BEGIN
+    -- A month that cannot be created is reported and skipped, the others still are
+    FOR offset_months IN -months_back..months_ahead LOOP
+        month := (date_trunc('month', NOW()) + make_interval(months => offset_months))::DATE;
+        BEGIN
+            PERFORM public.create_access_partition(month);
+            ready := ready + 1;
+        EXCEPTION WHEN OTHERS THEN
+            RAISE WARNING 'Could not create access partition for %: %', to_char(month, 'YYYY-MM'), SQLERRM;
+        END;
+    END LOOP;
+    RETURN ready;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION public.drop_access_partitions_before(cutoff TIMESTAMPTZ)
+RETURNS INTEGER AS $$
+DECLARE
+    partition_name TEXT;
+    dropped INTEGER := 0;
+BEGIN
+    -- Only drop monthly partitions whose whole range is older than the cutoff
+    FOR partition_name IN
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        JOIN pg_namespace ns ON ns.oid = parent.relnamespace
+        WHERE ns.nspname = 'public'
+          AND parent.relname = 'access'
+          AND child.relname ~ '^access_p[0-9]{4}_[0-9]{2}$'
+          AND to_date(substring(child.relname FROM 9), 'YYYY_MM') + INTERVAL '1 month' <= cutoff
+    LOOP
+        EXECUTE format('DROP TABLE IF EXISTS public.%I', partition_name);
+        dropped := dropped + 1;
+    END LOOP;
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- The partition functions run as their owner (SECURITY DEFINER) and PostgREST exposes
+-- every function of public, so only the service role may call them
+REVOKE EXECUTE ON FUNCTION public.create_access_partition(DATE) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.ensure_access_partitions(INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.drop_access_partitions_before(TIMESTAMPTZ) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.create_access_partition(DATE) TO service_role;
+GRANT EXECUTE ON FUNCTION public.ensure_access_partitions(INTEGER, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.drop_access_partitions_before(TIMESTAMPTZ) TO service_role;
+
+-- Create partitions for the current and next months
+SELECT public.ensure_access_partitions(0, 3);
 
 -- Enable Row Level Security (RLS)
 ALTER TABLE public.images ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.access ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.access_images ENABLE ROW LEVEL SECURITY;
+
+-- Partitions are exposed as tables of their own, the parent's policies do not apply to them
+ALTER TABLE public.access_default ENABLE ROW LEVEL SECURITY;
+REVOKE ALL ON public.access_default FROM anon, authenticated;
 
 -- Create policies for service role access (adjust as needed for your security requirements)
 -- These policies allow full access to service role key
@@ -45,6 +175,9 @@ CREATE POLICY "Service role can do everything on images" ON public.images
 CREATE POLICY "Service role can do everything on access" ON public.access
     FOR ALL USING (auth.role() = 'service_role');
 
+CREATE POLICY "Service role can do everything on access_images" ON public.access_images
+    FOR ALL USING (auth.role() = 'service_role');
+
 -- Optional: Create policies for authenticated users (uncomment if needed)
 -- CREATE POLICY "Authenticated users can read images" ON public.images
 --     FOR SELECT USING (auth.role() = 'authenticated');
@@ -93,9 +226,10 @@ CREATE TRIGGER update_access_updated_at
 -- (true, NOW() - INTERVAL '3 days');
 
 COMMENT ON TABLE public.images IS 'Stores metadata for uploaded access images';
-COMMENT ON TABLE public.access IS 'Stores door access records with optional associated images';
+COMMENT ON TABLE public.access IS 'Stores door access records with optional associated images, partitioned by month on date';
 COMMENT ON COLUMN public.access.access IS 'True if access was granted, false if denied';
 COMMENT ON COLUMN public.access.date IS 'Date and time when the access attempt occurred';
-COMMENT ON COLUMN public.access.image_id IS 'Optional reference to associated image';
+COMMENT ON COLUMN public.access.image_id IS 'Optional reference to the first associated image';
+COMMENT ON TABLE public.access_images IS 'Images of an access record in upload order; position 0 is also access.image_id';
 COMMENT ON COLUMN public.images.file_path IS 'Path to file in Supabase storage';
 COMMENT ON COLUMN public.images.mime_type IS 'MIME type of the uploaded file';
\ No newline at end of file
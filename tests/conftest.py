@@ -0,0 +1,21 @@
+"""
+Shared test setup: the minimal settings the app needs, so its modules import
+without a .env file, and a fixture overriding single settings per test.
+"""
+import pytest
+
+from benchmarks.common import prepare_environment
+
+prepare_environment(ENVIRONMENT="test")
+
+
+@pytest.fixture
+def override_settings(monkeypatch):
+    """Set settings attributes for the duration of one test"""
+    from app.config.config import get_settings
+
+    def override(**values):
+        for name, value in values.items():
+            monkeypatch.setattr(get_settings(), name, value)
+
+    return override
@@ -0,0 +1,193 @@
+import asyncio
+
+import pytest
+
+from app.config.config import settings
+from app.utils import admission
+from app.utils.admission import (
+    PRIORITY_READ,
+    PRIORITY_WRITE,
+    AdmissionController,
+    AdmissionMiddleware,
+    AdmissionRejected,
+    ConcurrencyLimiter,
+)
+from app.utils.metrics import MetricsMiddleware, http_requests_total
+
+
+async def _queue(limiter: ConcurrencyLimiter, priority: int, admitted: list, label: str, timeout: float = 1.0):
+    """Waiter task that records its label once it gets a slot"""
+    async def wait():
+        await limiter.acquire(priority, timeout)
+        admitted.append(label)
+
+    task = asyncio.ensure_future(wait())
+    # Let the waiter reach the queue before the next one is created
+    await asyncio.sleep(0)
+    return task
+
+
+@pytest.mark.asyncio
+async def test_free_slot_is_taken_without_queueing():
+    limiter = ConcurrencyLimiter("test", limit=2, max_queue=1)
+
+    await limiter.acquire(PRIORITY_READ, 0)
+    await limiter.acquire(PRIORITY_READ, 0)
+
+    assert limiter.active == 2
+    assert limiter._waiters == []
+
+
+@pytest.mark.asyncio
+async def test_released_slot_goes_to_writes_before_reads_then_in_arrival_order():
+    limiter = ConcurrencyLimiter("test", limit=1, max_queue=10)
+    await limiter.acquire(PRIORITY_READ, 0)
+    admitted = []
+
+    tasks = [
+        await _queue(limiter, PRIORITY_READ, admitted, "read-1"),
+        await _queue(limiter, PRIORITY_WRITE, admitted, "write-1"),
+        await _queue(limiter, PRIORITY_READ, admitted, "read-2"),
+        await _queue(limiter, PRIORITY_WRITE, admitted, "write-2"),
+    ]
+    for _ in tasks:
+        limiter.release()
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+
+    assert admitted == ["write-1", "write-2", "read-1", "read-2"]
+
+
+@pytest.mark.asyncio
+async def test_release_hands_the_slot_over_instead_of_freeing_it():
+    limiter = ConcurrencyLimiter("test", limit=1, max_queue=10)
+    await limiter.acquire(PRIORITY_READ, 0)
+    admitted = []
+    waiter = await _queue(limiter, PRIORITY_READ, admitted, "waiter")
+
+    limiter.release()
+
+    # The slot belongs to the waiter, a newcomer cannot take it in between
+    assert limiter.active == 1
+    with pytest.raises(AdmissionRejected) as rejected:
+        await limiter.acquire(PRIORITY_WRITE, 0)
+    assert rejected.value.reason == "timeout"
+
+    await waiter
+    assert admitted == ["waiter"]
+    limiter.release()
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_requests_of_the_same_priority():
+    limiter = ConcurrencyLimiter("test", limit=1, max_queue=1)
+    await limiter.acquire(PRIORITY_WRITE, 0)
+    waiter = await _queue(limiter, PRIORITY_WRITE, [], "queued")
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await limiter.acquire(PRIORITY_WRITE, 1.0)
+
+    assert rejected.value.reason == "queue_full"
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_write_evicts_the_newest_queued_read_when_the_queue_is_full():
+    limiter = ConcurrencyLimiter("test", limit=1, max_queue=2)
+    await limiter.acquire(PRIORITY_READ, 0)
+    admitted = []
+    first_read = await _queue(limiter, PRIORITY_READ, admitted, "read-1")
+    second_read = await _queue(limiter, PRIORITY_READ, admitted, "read-2")
+
+    write = await _queue(limiter, PRIORITY_WRITE, admitted, "write")
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await second_read
+    assert rejected.value.reason == "queue_full"
+
+    limiter.release()
+    await write
+    limiter.release()
+    await first_read
+    assert admitted == ["write", "read-1"]
+
+
+@pytest.mark.asyncio
+async def test_waiter_is_rejected_and_dequeued_when_its_budget_runs_out():
+    limiter = ConcurrencyLimiter("test", limit=1, max_queue=1)
+    await limiter.acquire(PRIORITY_READ, 0)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await limiter.acquire(PRIORITY_READ, 0.01)
+
+    assert rejected.value.reason == "timeout"
+    assert limiter._waiters == []
+    limiter.release()
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    limiter = ConcurrencyLimiter("test", limit=1, max_queue=1)
+    await limiter.acquire(PRIORITY_READ, 0)
+    waiter = await _queue(limiter, PRIORITY_READ, [], "cancelled")
+
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+
+    assert limiter._waiters == []
+    limiter.release()
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_route_slot_is_released_when_the_shared_slot_times_out(override_settings):
+    override_settings(
+        ADMISSION_MAX_CONCURRENCY=1,
+        ADMISSION_SHARED_QUEUE=4,
+        ADMISSION_REGISTER_CONCURRENCY=2,
+        ADMISSION_REGISTER_QUEUE=4,
+        ADMISSION_REGISTER_QUEUE_TIMEOUT_MS=10,
+    )
+    controller = AdmissionController()
+    await controller.acquire("register")
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await controller.acquire("register")
+
+    assert rejected.value.reason == "timeout"
+    register_limiter = controller.routes["register"][0]
+    assert register_limiter.active == 1
+    controller.release("register")
+    assert register_limiter.active == 0
+    assert controller.shared.active == 0
+
+
+@pytest.mark.asyncio
+async def test_shed_request_is_labelled_with_its_route_in_metrics(override_settings, monkeypatch):
+    override_settings(
+        ADMISSION_MAX_CONCURRENCY=4,
+        ADMISSION_HISTORY_CONCURRENCY=1,
+        ADMISSION_HISTORY_QUEUE=1,
+        ADMISSION_HISTORY_QUEUE_TIMEOUT_MS=10,
+    )
+    monkeypatch.setattr(admission, "admission_controller", AdmissionController())
+    await admission.admission_controller.acquire("history")
+
+    async def app(scope, receive, send):
+        raise AssertionError("shed requests never reach the app")
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    key = http_requests_total._key({'method': "GET", 'route': f"{settings.API_V1_STR}/history", 'status': "503"})
+    before = http_requests_total._values.get(key, 0)
+    scope = {"type": "http", "method": "GET", "path": f"{settings.API_V1_STR}/history", "headers": []}
+    await MetricsMiddleware(AdmissionMiddleware(app))(scope, None, send)
+
+    assert sent[0]["status"] == 503
+    assert http_requests_total._values[key] == before + 1
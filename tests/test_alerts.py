@@ -0,0 +1,180 @@
+import asyncio
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.access import Access
+from app.routes import alert_routes
+from app.services import alerts
+from app.services.alerts import CLOSED, BurstDetector, BurstRule, parse_rule
+
+DATE = datetime(2026, 10, 19, 8, 0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable arrival time of the alerts module"""
+    now = [1000.0]
+    monkeypatch.setattr(alerts, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def detector(override_settings, clock):
+    override_settings(
+        ALERTS_ENABLED=True,
+        ALERT_RULES=["3/10"],
+        ALERT_HISTORY_SIZE=100,
+        ALERT_SUBSCRIBER_QUEUE=10,
+        ALERT_STREAM_HEARTBEAT_SECONDS=0.01,
+    )
+    return BurstDetector()
+
+
+def _attempt(granted: bool = False) -> Access:
+    return Access(access=granted, date=DATE)
+
+
+def _deny(detector: BurstDetector, clock, *offsets: float) -> None:
+    """Denied attempts arriving the given number of seconds after the current time"""
+    start = clock[0]
+    for offset in offsets:
+        clock[0] = start + offset
+        detector.observe(_attempt())
+
+
+def test_rule_fires_when_the_threshold_is_reached_within_the_window():
+    rule = BurstRule(3, 10)
+
+    assert rule.observe(0, "a", DATE) is None
+    assert rule.observe(4, "b", DATE) is None
+    burst = rule.observe(10, "c", DATE)
+
+    assert [access_id for _, access_id, _ in burst] == ["a", "b", "c"]
+
+
+def test_rule_ignores_denials_spread_over_more_than_the_window():
+    rule = BurstRule(3, 10)
+
+    rule.observe(0, "a", DATE)
+    rule.observe(6, "b", DATE)
+    assert rule.observe(10.5, "c", DATE) is None
+    # The ring buffer slides, the last three denials are within 10 seconds
+    assert rule.observe(12, "d", DATE) is not None
+
+
+def test_next_alert_needs_a_whole_new_burst():
+    rule = BurstRule(2, 10)
+
+    rule.observe(0, "a", DATE)
+    assert rule.observe(1, "b", DATE) is not None
+    assert rule.observe(2, "c", DATE) is None
+    assert rule.observe(3, "d", DATE) is not None
+
+
+def test_parse_rule():
+    rule = parse_rule("5/60")
+
+    assert (rule.threshold, rule.window_seconds, rule.name) == (5, 60.0, "5/60s")
+
+
+def test_granted_attempts_never_count(detector, clock):
+    for _ in range(5):
+        detector.observe(_attempt(granted=True))
+
+    assert detector.recent(10) == []
+    assert detector.stats['observed'] == 5
+    assert detector.stats['denied'] == 0
+
+
+def test_detector_raises_an_alert_per_rule(detector, clock, override_settings):
+    override_settings(ALERT_RULES=["3/10", "2/1"])
+
+    _deny(detector, clock, 0, 0.5, 5)
+
+    alerts_raised = detector.recent(10)
+    assert [alert['rule'] for alert in alerts_raised] == ["3/10s", "2/1s"]
+    assert alerts_raised[0]['denied_attempts'] == 3
+    assert alerts_raised[0]['span_seconds'] == 5
+    assert alerts_raised[1]['span_seconds'] == 0.5
+
+
+def test_disabled_detector_ignores_attempts(detector, clock, override_settings):
+    override_settings(ALERTS_ENABLED=False)
+
+    _deny(detector, clock, 0, 1, 2)
+
+    assert detector.recent(10) == []
+    assert detector.stats['observed'] == 0
+
+
+def test_recent_returns_newest_first_after_an_id(detector, clock):
+    _deny(detector, clock, 0, 1, 2, 3, 4, 5, 6, 7, 8)
+
+    assert [alert['id'] for alert in detector.recent(10)] == [3, 2, 1]
+    assert [alert['id'] for alert in detector.recent(10, after_id=1)] == [3, 2]
+    assert [alert['id'] for alert in detector.recent(1)] == [3]
+
+
+def test_subscribers_receive_alerts_and_slow_ones_drop_them(detector, clock, override_settings):
+    override_settings(ALERT_SUBSCRIBER_QUEUE=1)
+    queue = detector.subscribe()
+
+    _deny(detector, clock, 0, 1, 2, 3, 4, 5)
+
+    assert queue.get_nowait()['id'] == 1
+    assert queue.empty()
+    assert detector.stats['dropped'] == 1
+
+    detector.close()
+    assert queue.get_nowait() is CLOSED
+    detector.unsubscribe(queue)
+    assert detector.stats['subscribers'] == 0
+
+
+def _event_ids(events):
+    return [json.loads(event.split("data: ", 1)[1])['id'] for event in events if "event: alert" in event]
+
+
+async def _next_events(stream, count: int):
+    return [await asyncio.wait_for(stream.__anext__(), 1) for _ in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_stream_replays_missed_alerts_then_pushes_new_ones_once(detector, clock, monkeypatch):
+    monkeypatch.setattr(alert_routes, "burst_detector", detector)
+    _deny(detector, clock, 0, 1, 2, 3, 4, 5)
+
+    stream = alert_routes._alert_stream(last_event_id=1)
+    assert await _next_events(stream, 1) == [": connected\n\n"]
+
+    # Raised after subscribing: in the queue, not in the replay snapshot
+    _deny(detector, clock, 6, 7, 8)
+    events = await _next_events(stream, 3)
+
+    assert _event_ids(events) == [2, 3]
+    assert events[-1] == ": keep-alive\n\n"
+    await stream.aclose()
+    assert detector.stats['subscribers'] == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_skips_queued_alerts_already_replayed(detector, clock, monkeypatch):
+    monkeypatch.setattr(alert_routes, "burst_detector", detector)
+    _deny(detector, clock, 0, 1, 2)
+
+    stream = alert_routes._alert_stream(last_event_id=0)
+    await _next_events(stream, 1)
+    # Same alert delivered again through the subscriber queue
+    for queue in detector._subscribers:
+        queue.put_nowait(detector.recent(1)[0])
+    events = await _next_events(stream, 2)
+
+    assert _event_ids(events) == [1]
+    assert events[-1] == ": keep-alive\n\n"
+
+    detector.close()
+    with pytest.raises(StopAsyncIteration):
+        await _next_events(stream, 1)
@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+
+from app.utils.dataloader import DataLoader, loader_scope, request_loader
+
+
+class Batches:
+    """Batch function recording the keys of every call"""
+
+    def __init__(self, error=None):
+        self.calls = []
+        self.error = error
+
+    async def __call__(self, keys):
+        self.calls.append(list(keys))
+        if self.error is not None:
+            raise self.error
+        return {key: f"value-{key}" for key in keys if key != "missing"}
+
+
+@pytest.mark.asyncio
+async def test_loads_of_one_tick_share_one_batch_call():
+    batches = Batches()
+    loader = DataLoader(batches)
+
+    values = await asyncio.gather(loader.load("a"), loader.load("b"), loader.load("c"))
+
+    assert values == ["value-a", "value-b", "value-c"]
+    assert batches.calls == [["a", "b", "c"]]
+
+
+@pytest.mark.asyncio
+async def test_loads_of_later_ticks_get_their_own_batch():
+    batches = Batches()
+    loader = DataLoader(batches)
+
+    await loader.load("a")
+    await loader.load("b")
+
+    assert batches.calls == [["a"], ["b"]]
+
+
+@pytest.mark.asyncio
+async def test_key_missing_from_the_batch_result_loads_as_none():
+    loader = DataLoader(Batches())
+
+    assert await loader.load_many(["a", "missing"]) == ["value-a", None]
+
+
+@pytest.mark.asyncio
+async def test_repeated_keys_are_memoized():
+    batches = Batches()
+    loader = DataLoader(batches)
+
+    await loader.load_many(["a", "a", "b"])
+    assert await loader.load("a") == "value-a"
+
+    assert batches.calls == [["a", "b"]]
+    assert loader.stats == {'loads': 4, 'memo_hits': 2, 'batches': 1}
+
+
+@pytest.mark.asyncio
+async def test_cleared_key_is_loaded_again():
+    batches = Batches()
+    loader = DataLoader(batches)
+    await loader.load("a")
+
+    loader.clear("a")
+    await loader.load("a")
+
+    assert batches.calls == [["a"], ["a"]]
+
+
+@pytest.mark.asyncio
+async def test_large_ticks_are_split_by_max_batch_size():
+    batches = Batches()
+    loader = DataLoader(batches, max_batch_size=2)
+
+    await loader.load_many(["a", "b", "c", "d", "e"])
+
+    assert batches.calls == [["a", "b"], ["c", "d"], ["e"]]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_raised_to_every_load_and_not_memoized():
+    batches = Batches(error=RuntimeError("database down"))
+    loader = DataLoader(batches)
+
+    results = await asyncio.gather(loader.load("a"), loader.load("b"), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    batches.error = None
+    assert await loader.load("a") == "value-a"
+    assert batches.calls == [["a", "b"], ["a"]]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_other_callers_of_its_key():
+    batches = Batches()
+    loader = DataLoader(batches)
+
+    first = asyncio.ensure_future(loader.load("a"))
+    second = asyncio.ensure_future(loader.load("a"))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "value-a"
+    assert first.cancelled()
+    assert await loader.load("a") == "value-a"
+    assert batches.calls == [["a"]]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_batch_cancels_its_loads_and_is_not_memoized():
+    batches = Batches(error=asyncio.CancelledError())
+    loader = DataLoader(batches)
+
+    results = await asyncio.gather(loader.load("a"), loader.load("b"), return_exceptions=True)
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+
+    batches.error = None
+    assert await loader.load("a") == "value-a"
+    assert batches.calls == [["a", "b"], ["a"]]
+
+
+@pytest.mark.asyncio
+async def test_request_loader_is_shared_inside_a_scope_only():
+    created = []
+
+    def factory():
+        created.append(DataLoader(Batches()))
+        return created[-1]
+
+    with loader_scope():
+        first = request_loader("images", factory)
+        assert request_loader("images", factory) is first
+        assert request_loader("other", factory) is not first
+
+    with loader_scope():
+        assert request_loader("images", factory) is not first
+
+    # Outside a scope every call gets a fresh loader
+    assert request_loader("images", factory) is not request_loader("images", factory)
+    assert len(created) == 5
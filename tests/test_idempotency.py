@@ -0,0 +1,182 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import idempotency
+from app.services.idempotency import IdempotencyConflict, IdempotencyStore, IdempotencyStoreFull
+
+
+class Operation:
+    """Counts its calls, optionally failing or waiting on an event"""
+
+    def __init__(self, result="created", error=None, gate=None):
+        self.result = result
+        self.error = error
+        self.gate = gate
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.monotonic() of the idempotency module, the event loop keeps the real one"""
+    now = [1000.0]
+    monkeypatch.setattr(idempotency, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+@pytest.mark.asyncio
+async def test_retry_with_the_same_key_replays_the_stored_result():
+    store = IdempotencyStore()
+    operation = Operation()
+
+    first = await store.run("key", "request", operation)
+    second = await store.run("key", "request", operation)
+
+    assert first == ("created", False)
+    assert second == ("created", True)
+    assert operation.calls == 1
+    assert store.stats['replayed'] == 1
+
+
+@pytest.mark.asyncio
+async def test_duplicate_joins_the_request_still_running():
+    store = IdempotencyStore()
+    operation = Operation(gate=asyncio.Event())
+
+    first = asyncio.ensure_future(store.run("key", "request", operation))
+    await asyncio.sleep(0)
+    duplicate = asyncio.ensure_future(store.run("key", "request", operation))
+    await asyncio.sleep(0)
+    operation.gate.set()
+
+    assert await first == ("created", False)
+    assert await duplicate == ("created", True)
+    assert operation.calls == 1
+    assert store.stats['joined'] == 1
+
+
+@pytest.mark.asyncio
+async def test_same_key_with_a_different_request_conflicts():
+    store = IdempotencyStore()
+    await store.run("key", "request", Operation())
+
+    with pytest.raises(IdempotencyConflict):
+        await store.run("key", "other request", Operation())
+
+
+@pytest.mark.asyncio
+async def test_failed_attempt_is_not_stored_and_can_be_retried():
+    store = IdempotencyStore()
+
+    with pytest.raises(RuntimeError):
+        await store.run("key", "request", Operation(error=RuntimeError("upload failed")))
+    retry = Operation()
+    result = await store.run("key", "request", retry)
+
+    assert result == ("created", False)
+    assert retry.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_duplicate_waiting_on_a_failed_attempt_runs_the_operation_itself():
+    store = IdempotencyStore()
+    failing = Operation(error=RuntimeError("upload failed"), gate=asyncio.Event())
+    retry = Operation()
+
+    first = asyncio.ensure_future(store.run("key", "request", failing))
+    await asyncio.sleep(0)
+    duplicate = asyncio.ensure_future(store.run("key", "request", retry))
+    await asyncio.sleep(0)
+    failing.gate.set()
+
+    with pytest.raises(RuntimeError):
+        await first
+    assert await duplicate == ("created", False)
+    assert retry.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_result_expires_after_the_ttl(override_settings, clock):
+    override_settings(IDEMPOTENCY_TTL_SECONDS=60)
+    store = IdempotencyStore()
+    operation = Operation()
+
+    await store.run("key", "request", operation)
+    clock[0] += 59
+    assert (await store.run("key", "request", operation))[1] is True
+
+    clock[0] += 2
+    assert (await store.run("key", "request", operation))[1] is False
+    assert operation.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_purged_from_the_front(override_settings, clock):
+    override_settings(IDEMPOTENCY_TTL_SECONDS=60)
+    store = IdempotencyStore()
+    await store.run("old", "request", Operation())
+    clock[0] += 30
+    await store.run("recent", "request", Operation())
+
+    clock[0] += 31
+    await store.run("new", "request", Operation())
+
+    assert list(store._entries) == ["recent", "new"]
+
+
+@pytest.mark.asyncio
+async def test_full_store_evicts_the_oldest_completed_key_first(override_settings):
+    override_settings(IDEMPOTENCY_MAX_KEYS=2)
+    store = IdempotencyStore()
+    await store.run("first", "request", Operation())
+    await store.run("second", "request", Operation())
+
+    await store.run("third", "request", Operation())
+
+    assert list(store._entries) == ["second", "third"]
+    assert store.stats['evicted'] == 1
+
+
+@pytest.mark.asyncio
+async def test_in_flight_keys_are_never_evicted(override_settings):
+    override_settings(IDEMPOTENCY_MAX_KEYS=2)
+    store = IdempotencyStore()
+    running = Operation(gate=asyncio.Event())
+    in_flight = asyncio.ensure_future(store.run("running", "request", running))
+    await asyncio.sleep(0)
+    await store.run("done", "request", Operation())
+
+    # The completed key makes room, the running one stays
+    await store.run("new", "request", Operation())
+    assert list(store._entries) == ["running", "new"]
+
+    running.gate.set()
+    await in_flight
+    duplicate = Operation()
+    assert await store.run("running", "request", duplicate) == ("created", True)
+    assert duplicate.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_new_key_is_refused_when_every_stored_key_is_in_flight(override_settings):
+    override_settings(IDEMPOTENCY_MAX_KEYS=1)
+    store = IdempotencyStore()
+    running = Operation(gate=asyncio.Event())
+    in_flight = asyncio.ensure_future(store.run("running", "request", running))
+    await asyncio.sleep(0)
+
+    with pytest.raises(IdempotencyStoreFull):
+        await store.run("new", "request", Operation())
+
+    running.gate.set()
+    await in_flight
+    assert (await store.run("new", "request", Operation()))[1] is False